@@ -0,0 +1,65 @@
+"""
+Import-time benchmark for the `mintapi` package
+
+Runs `python -X importtime -c "import <module>"` in fresh interpreters and
+reports the median cumulative import time, the slowest imports, and whether
+any of the heavy optional dependencies were loaded. Run from the repository
+root:
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --module mintapi.cli --repeat 10
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+# only needed for browser sign in, csv output or the keyring respectively
+HEAVY_MODULES = ("selenium", "seleniumrequests", "oathtool", "pandas", "keyring")
+
+
+def import_times(module):
+    """
+    Returns {module name: cumulative microseconds} for one fresh import
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--module", default="mintapi")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    options = parser.parse_args()
+
+    runs = [import_times(options.module) for _ in range(options.repeat)]
+    totals = [run[options.module] for run in runs]
+    print(
+        f"import {options.module}: median {statistics.median(totals) / 1000:.1f} ms "
+        f"over {options.repeat} runs (min {min(totals) / 1000:.1f} ms)"
+    )
+
+    print("\nslowest imports (cumulative, last run):")
+    slowest = sorted(runs[-1].items(), key=lambda item: item[1], reverse=True)
+    for name, cumulative in slowest[: options.top]:
+        print(f"{cumulative / 1000:>10.1f} ms  {name}")
+
+    loaded = [name for name in HEAVY_MODULES if name in runs[-1]]
+    print(f"\nheavy modules loaded: {', '.join(loaded) if loaded else 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+End-to-end throughput benchmark for `RESTClient` against the local mock server
+
+Reports records/second, peak traced memory and request counts for full
+transaction pulls. The mock server runs in a child process so only client
+work is measured. Run from the repository root:
+
+    python -m benchmarks.rest_client
+    python -m benchmarks.rest_client --sizes 1000 100000 --latency 0.05 --max-workers 4 --stream
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import requests
+
+from mintapi.rest import RESTClient
+from tests.mock_server import route, serve_in_process
+
+DEFAULT_SIZES = (1000, 100000, 1000000)
+
+
+def pull(url, max_workers=1, limit=1000, stream=False):
+    client = RESTClient(
+        api_key="benchmark", cookies="benchmark", max_workers=max_workers
+    )
+    route(client.session, url)
+    try:
+        kwargs = dict(include_investment=True, remove_pending=False, limit=limit)
+        if stream:
+            return sum(1 for _ in client.iter_transaction_data(**kwargs))
+        return len(client.get_transaction_data(**kwargs))
+    finally:
+        client.close()
+
+
+def stats(url):
+    return requests.get(f"{url}/_mock/stats").json()
+
+
+def run(size, latency=0.0, max_workers=1, limit=1000, stream=False, memory=True):
+    """
+    Pull `size` transactions and return throughput figures. Peak memory is
+    measured on a second, traced pull since tracemalloc slows the client down
+    """
+    with serve_in_process(transactions=size, latency=latency) as url:
+        start = time.perf_counter()
+        records = pull(url, max_workers=max_workers, limit=limit, stream=stream)
+        elapsed = time.perf_counter() - start
+        counters = stats(url)
+
+        peak = None
+        if memory:
+            tracemalloc.start()
+            pull(url, max_workers=max_workers, limit=limit, stream=stream)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    return {
+        "transactions": size,
+        "records": records,
+        "seconds": elapsed,
+        "records_per_second": records / elapsed if elapsed else float("inf"),
+        "peak_memory_mb": peak / 2**20 if peak is not None else float("nan"),
+        "requests": counters["requests"],
+        "megabytes_received": counters["bytes"] / 2**20,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="per request, in seconds"
+    )
+    parser.add_argument("--max-workers", type=int, default=1)
+    parser.add_argument("--limit", type=int, default=1000, help="page size")
+    parser.add_argument(
+        "--stream", action="store_true", help="use iter_transaction_data"
+    )
+    parser.add_argument(
+        "--no-memory", action="store_true", help="skip the traced peak memory pull"
+    )
+    options = parser.parse_args()
+
+    print(
+        f"{'transactions':>12} {'records/s':>12} {'seconds':>9} "
+        f"{'peak MB':>9} {'requests':>9} {'MB recv':>9}"
+    )
+    for size in options.sizes:
+        result = run(
+            size,
+            latency=options.latency,
+            max_workers=options.max_workers,
+            limit=options.limit,
+            stream=options.stream,
+            memory=not options.no_memory,
+        )
+        print(
+            f"{result['transactions']:>12} {result['records_per_second']:>12.0f} "
+            f"{result['seconds']:>9.2f} {result['peak_memory_mb']:>9.1f} "
+            f"{result['requests']:>9} {result['megabytes_received']:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
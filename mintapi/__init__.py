@@ -1,7 +1,59 @@
+import importlib
 import logging
 
 from mintapi.api import *
-from mintapi.signIn import *
+from mintapi.auth_cache import AuthCache
+from mintapi.rest import RESTClient
+
+# the selenium based sign in (and everything it exports) is imported on first
+# use, from the module each name is defined in. anything else is an
+# AttributeError without importing selenium
+_LAZY_NAMES = {
+    "SeleniumBrowser": "mintapi.browser",
+    **dict.fromkeys(
+        (
+            "MFAMethodNotAvailableError",
+            "MFA_METHODS",
+            "DEFAULT_MFA_INPUT_PROMPT",
+            "STANDARD_MISSING_EXCEPTIONS",
+            "SELECT_CSS_SELECTORS_LABEL",
+            "INPUT_CSS_SELECTORS_LABEL",
+            "SPAN_CSS_SELECTORS_LABEL",
+            "BUTTON_CSS_SELECTORS_LABEL",
+            "get_email_code",
+            "sign_in",
+            "handle_same_page_username_password",
+            "handle_different_page_username_password",
+            "handle_login_failures",
+            "bypass_verified_user_page",
+            "mfa_selection_page",
+            "bypass_passwordless_login_page",
+            "mfa_page",
+            "search_mfa_method",
+            "set_mfa_method",
+            "handle_soft_token",
+            "handle_email_by_imap",
+            "handle_other_mfa",
+            "submit_mfa_code",
+            "account_selection_page",
+            "password_page",
+            "handle_wait_for_sync",
+        ),
+        "mintapi.signIn",
+    ),
+}
+_LAZY_SUBMODULES = ("browser", "signIn")
+
+
+def __getattr__(name):
+    if name in _LAZY_SUBMODULES:
+        return importlib.import_module(f"{__name__}.{name}")
+    module_name = _LAZY_NAMES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
 
 
 logging.getLogger("mintapi").setLevel(logging.INFO)
@@ -1,7 +1,37 @@
-from typing import Dict, List, Optional, Union
+import atexit
+import hashlib
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple, Union
 
-from mintapi.browser import SeleniumBrowser
-from mintapi.rest import RESTClient
+from mintapi.auth_cache import AuthCache, authorize_from_cache
+from mintapi.cache import DiskCache, ResponseCache
+from mintapi.ratelimit import RateLimiter
+from mintapi.rest import DEFAULT_TIMEOUT, RESTClient
+from mintapi.retry import RetryPolicy
+
+LOGGER = logging.getLogger(__name__)
+
+# seconds a session shared by the helper functions may sit unused before it
+# is closed (quitting its browser)
+DEFAULT_SESSION_IDLE_TIMEOUT = 15 * 60
+
+
+def __getattr__(name):
+    # selenium is slow to import and rest-only sessions never touch it, so
+    # the browser module is only loaded once something asks for it
+    if name == "SeleniumBrowser":
+        from mintapi.browser import SeleniumBrowser
+
+        globals()[name] = SeleniumBrowser
+        return SeleniumBrowser
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _selenium_browser():
+    return globals().get("SeleniumBrowser") or __getattr__("SeleniumBrowser")
 
 
 class Mint(object):
@@ -16,7 +46,14 @@ class Mint(object):
         api_key: Optional[str] = None,
         cookies: Optional[Union[str, List[Dict]]] = None,
         use_rest_client: bool = False,
-        **browser_params
+        max_workers: int = 1,
+        auth_cache: Optional[Union[str, AuthCache]] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        response_cache: Optional[Union[str, ResponseCache]] = None,
+        pool_maxsize: Optional[int] = None,
+        timeout: Optional[Union[float, Tuple[float, float]]] = DEFAULT_TIMEOUT,
+        **browser_params,
     ):
         """
         Passes forward parameters to the browser and rest client
@@ -27,20 +64,64 @@ class Mint(object):
 
         Backward compatibility flag defaults to not use new rest client
         (behavior subject to change in future releases)
+
+        max_workers sets how many pages the rest client fetches concurrently
+        (the browser always paginates sequentially)
+
+        auth_cache (an AuthCache or a directory path) persists the auth the
+        browser extracts so later rest client sessions for the same email can
+        skip the browser sign in while the cached auth is still accepted
+
+        retry_policy controls how the rest client retries transient failures
+        (throttling, gateway errors) of individual requests
+
+        rate_limiter paces every request sent through the browser or rest
+        client, e.g. to share one request budget between worker processes
+
+        response_cache (a ResponseCache or a directory path) reuses results of
+        slow changing endpoints (categories, tags, rules) until their ttl
+        expires. pass bypass_cache=True to an accessor to force a fresh
+        request
+
+        pool_maxsize sets how many kept-alive connections the rest client
+        holds per Mint host (by default enough for max_workers), and timeout
+        the (connect, read) seconds after which a stalled request is abandoned
+        (and retried per retry_policy)
         """
+        self.email = email
+        if isinstance(auth_cache, str):
+            auth_cache = AuthCache(auth_cache)
+        self.auth_cache = auth_cache
+        if isinstance(response_cache, str):
+            # a directory may be shared, so keep each identity's data apart
+            response_cache = DiskCache(response_cache, namespace=email)
+
         if not use_rest_client:
             # legacy behavior
-            self.browser = SeleniumBrowser(
+            self.browser = _selenium_browser()(
                 email=email, password=password, **browser_params
             )
+            self.browser.rate_limiter = rate_limiter
+            self.browser.response_cache = response_cache
             self.rest_client = None
 
         else:
-            self.rest_client = RESTClient(api_key=api_key, cookies=cookies)
+            self.rest_client = RESTClient(
+                api_key=api_key,
+                cookies=cookies,
+                max_workers=max_workers,
+                retry_policy=retry_policy,
+                rate_limiter=rate_limiter,
+                response_cache=response_cache,
+                pool_maxsize=pool_maxsize,
+                timeout=timeout,
+            )
 
             # only use browser if not sufficiently authorized already
-            if not api_key or not cookies:
-                self.browser = SeleniumBrowser(
+            if (not api_key or not cookies) and self._load_cached_auth():
+                self.browser = None
+            elif not api_key or not cookies:
+                self.browser = _selenium_browser()(
                     email=email, password=password, **browser_params
                 )
 
@@ -54,6 +135,17 @@ class Mint(object):
         api_key = self.browser._get_api_key_header()["authorization"]
         cookies = self.browser._get_cookies()
         self.rest_client.authorize(cookies=cookies, api_key=api_key)
+        if self.auth_cache is not None and self.email:
+            self.auth_cache.save(self.email, api_key=api_key, cookies=cookies)
+
+    def _load_cached_auth(self):
+        """
+        Authorize the rest client from the auth cache, if a cached entry
+        exists and still passes the probe request
+        """
+        if self.auth_cache is None or not self.email:
+            return False
+        return authorize_from_cache(self.auth_cache, self.email, self.rest_client)
 
     def __getattr__(self, attr):
         """
@@ -68,31 +160,174 @@ class Mint(object):
             raise NotImplementedError
 
 
+class _Session(object):
+    def __init__(self):
+        # held while the session is in use, so calls for one identity
+        # don't share a browser concurrently
+        self.lock = threading.Lock()
+        self.mint = None
+        self.last_used = 0.0
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+        if self.mint is None:
+            return
+        try:
+            self.mint.close()
+        except Exception as e:
+            LOGGER.warning(f"Failed to close Mint session: {e}")
+        self.mint = None
+
+
+class MintSessions(object):
+    """
+    Signed in Mint sessions shared by the helper functions (get_accounts,
+    get_net_worth, ...), one per identity, so a script calling several of
+    them signs in once
+
+    An identity is the email, password and Mint parameters of a call.
+    Sessions unused for `idle_timeout` seconds are closed, as are the ones
+    whose call raised (the next call signs in again) and, at exit, all of
+    them. `close` closes them early
+    """
+
+    def __init__(self, idle_timeout: float = DEFAULT_SESSION_IDLE_TIMEOUT, clock=None):
+        self.idle_timeout = idle_timeout
+        self.clock = clock or time.monotonic
+        self._sessions: Dict[Tuple[str, str], _Session] = {}
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def __len__(self):
+        return len(self._sessions)
+
+    @contextmanager
+    def session(self, email: str, password: str, **kwargs):
+        """Yields the identity's Mint, signing in on first use."""
+        key = _session_key(email, password, kwargs)
+        while True:
+            with self._lock:
+                session = self._sessions.setdefault(key, _Session())
+            session.lock.acquire()
+            if not session.closed:
+                break
+            # closed while we waited for it
+            session.lock.release()
+
+        try:
+            if session.mint is None:
+                session.mint = Mint(email=email, password=password, **kwargs)
+            yield session.mint
+        except BaseException:
+            self._discard(key, session)
+            raise
+        finally:
+            session.last_used = self.clock()
+            session.lock.release()
+        self._schedule_expiry()
+
+    def close(self, email: Optional[str] = None):
+        """Closes the sessions of `email`, or all of them."""
+        with self._lock:
+            keys = [
+                key
+                for key in self._sessions
+                if email is None or key[0] == email.lower()
+            ]
+            sessions = [self._sessions.pop(key) for key in keys]
+            if email is None and self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        for session in sessions:
+            with session.lock:
+                session.close()
+
+    def expire(self):
+        """Closes the sessions unused for `idle_timeout` seconds."""
+        now = self.clock()
+        idle = []
+        with self._lock:
+            for key, session in list(self._sessions.items()):
+                if now - session.last_used < self.idle_timeout:
+                    continue
+                # sessions in use aren't idle
+                if session.lock.acquire(blocking=False):
+                    del self._sessions[key]
+                    idle.append(session)
+        for session in idle:
+            try:
+                session.close()
+            finally:
+                session.lock.release()
+
+    def _discard(self, key, session):
+        with self._lock:
+            if self._sessions.get(key) is session:
+                del self._sessions[key]
+        session.close()
+
+    def _schedule_expiry(self):
+        with self._lock:
+            if self._timer is not None or not self._sessions:
+                return
+            self._timer = threading.Timer(self.idle_timeout, self._run_expiry)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _run_expiry(self):
+        with self._lock:
+            self._timer = None
+        self.expire()
+        self._schedule_expiry()
+
+
+def _session_key(email, password, kwargs):
+    # the password and parameters are part of the identity (a wrong password
+    # must not be handed someone else's session), but are only kept hashed
+    identity = hashlib.sha256()
+    identity.update(password.encode() if password else b"")
+    for name, value in sorted(kwargs.items()):
+        identity.update(f"\0{name}={value!r}".encode())
+    return (email or "").lower(), identity.hexdigest()
+
+
+_sessions = MintSessions()
+atexit.register(_sessions.close)
+
+
+def close_sessions(email: Optional[str] = None):
+    """
+    Closes the Mint sessions the helper functions keep for `email`, or for
+    every identity
+    """
+    _sessions.close(email)
+
+
+def _call(method, email, password, kwargs):
+    with _sessions.session(email, password, **kwargs) as mint:
+        return getattr(mint, method)()
+
+
 def get_accounts(email, password, **kwargs):
-    mint = Mint(email=email, password=password, **kwargs)
-    return mint.get_account_data()
+    return _call("get_account_data", email, password, kwargs)
 
 
 def get_net_worth(email, password, **kwargs):
-    mint = Mint(email=email, password=password, **kwargs)
-    return mint.get_net_worth_data()
+    return _call("get_net_worth_data", email, password, kwargs)
 
 
 def get_budgets(email, password, **kwargs):
-    mint = Mint(email=email, password=password, **kwargs)
-    return mint.get_budget_data()
+    return _call("get_budget_data", email, password, kwargs)
 
 
 def get_credit_score(email, password, **kwargs):
-    mint = Mint(email=email, password=password, **kwargs)
-    return mint.get_credit_score()
+    return _call("get_credit_score_data", email, password, kwargs)
 
 
 def get_credit_report(email, password, **kwargs):
-    mint = Mint(email=email, password=password, **kwargs)
-    return mint.get_credit_report()
+    return _call("get_credit_report_data", email, password, kwargs)
 
 
 def initiate_account_refresh(email, password, **kwargs):
-    mint = Mint(email=email, password=password, **kwargs)
-    return mint.initiate_account_refresh()
+    return _call("initiate_account_refresh", email, password, kwargs)
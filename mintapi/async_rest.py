@@ -0,0 +1,532 @@
+"""
+Module for asyncio based REST API
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from itertools import islice
+from typing import Dict, List, Optional, Union
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - optional dependency
+    httpx = None
+
+from mintapi.cache import MISS, ResponseCache
+from mintapi.endpoints import (
+    BALANCE_HISTORY_REPORTS,
+    BATCHED_BALANCE_HISTORY_REPORTS,
+    MintEndpoints,
+    _ResponseMetadata,
+    _annotate_balance_history,
+    _extract_credit_score,
+    _keep_transaction,
+    _merge_net_worth,
+    _process_utilization,
+    _split_balance_history,
+)
+from mintapi.filters import DateFilter
+from mintapi.metrics import ClientMetrics
+from mintapi.ratelimit import RateLimiter
+from mintapi.retry import RetryPolicy
+from mintapi.trends import ReportView
+
+LOGGER = logging.getLogger(__name__)
+
+
+class AsyncRESTClient(MintEndpoints):
+    """
+    asyncio counterpart to `RESTClient`
+
+    Exposes the same endpoint surface, but every accessor returns an awaitable
+    (or an async iterator for the `iter_*` variants) so many pulls, for one or
+    many users, can be fanned out from a single event loop.
+
+    Auth is held per client rather than on the underlying connection pool, so
+    several clients can share one `httpx.AsyncClient` by passing it as `client`
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        cookies: Optional[Union[str, List[Dict]]] = None,
+        max_workers: int = 1,
+        client: Optional["httpx.AsyncClient"] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        response_cache: Optional[ResponseCache] = None,
+        **client_kwargs,
+    ):
+        if httpx is None:
+            raise ImportError(
+                "AsyncRESTClient requires httpx. Install it with `pip install mintapi[async]`"
+            )
+
+        self._owns_client = client is None
+        self.session = client or httpx.AsyncClient(**client_kwargs)
+        self.max_workers = max_workers
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.rate_limiter = rate_limiter
+        self.response_cache = response_cache
+        self.metrics = ClientMetrics()
+        self.headers = {}
+
+        if api_key or cookies:
+            self.authorize(api_key=api_key, cookies=cookies)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        """Closes the connection pool if it was created by this client."""
+        if self._owns_client:
+            await self.session.aclose()
+
+    def authorize(self, cookies: Union[str, List[Dict]] = None, api_key: str = None):
+        """
+        Auth can be configured via an api key + cookie string in the headers
+        or just the api key and a list of browser cookies
+
+        Parameters
+        ----------
+        cookie : str
+            _description_
+        api_key : str
+            _description_
+        """
+        if isinstance(cookies, list):
+            self.update_cookies(cookies)
+            cookies = None
+
+        self.headers.update(
+            {
+                k: v
+                for k, v in {"authorization": api_key, "cookie": cookies}.items()
+                if v is not None
+            }
+        )
+
+    def update_cookies(self, cookies: List[Dict]):
+        """
+        Folds a list of browser cookies into the cookie header sent with each request
+
+        Parameters
+        ----------
+        cookies : List[Dict]
+            _description_
+        """
+        jar = {}
+        if "cookie" in self.headers:
+            for pair in self.headers["cookie"].split(";"):
+                name, _, value = pair.strip().partition("=")
+                if name:
+                    jar[name] = value
+        for cookie in cookies:
+            jar[cookie["name"]] = str(cookie["value"])
+        self.headers["cookie"] = "; ".join(f"{k}={v}" for k, v in jar.items())
+
+    """
+    Accessor Methods
+    """
+
+    def request(
+        self,
+        *,
+        method: str,
+        api_url: str,
+        api_section: str,
+        uri_path: str,
+        data_key: str,
+        metadata_key: str,
+        paginate=True,
+        stream=False,
+        **kwargs,
+    ):
+        """
+        Returns an awaitable resolving to the (paginated) result, or an async
+        iterator of records when `stream` is set
+
+        Parameters
+        ----------
+        method : str
+            _description_
+        api_url : str
+            _description_
+        api_section : str
+            _description_
+        uri_path : str
+            _description_
+        data_key : str
+            _description_
+        paginate : bool, optional
+            _description_, by default True
+        stream : bool, optional
+            yield paginated records lazily instead of returning a list, by default False
+        """
+        request_kwargs = dict(
+            method=method,
+            api_url=api_url,
+            api_section=api_section,
+            uri_path=uri_path,
+            data_key=data_key,
+            metadata_key=metadata_key,
+            **kwargs,
+        )
+        if paginate and stream:
+            return self._stream_request(**request_kwargs)
+        return self._request(paginate=paginate, **request_kwargs)
+
+    def _cached_request(self, bypass_cache: bool = False, **kwargs):
+        entry = self._cache_entry(**kwargs)
+        if entry is None:
+            return self.request(**kwargs)
+        return self._acached_request(entry, bypass_cache, **kwargs)
+
+    async def _acached_request(self, entry, bypass_cache: bool, **kwargs):
+        key, ttl = entry
+        if not bypass_cache:
+            data = self.response_cache.get(key)
+            if data is not MISS:
+                LOGGER.debug(f"Serving {kwargs['uri_path']} from the response cache")
+                return data
+
+        data = await self.request(**kwargs)
+        self.response_cache.set(key, data, ttl)
+        return data
+
+    async def _send(self, method: str, url: str, headers=None, **kwargs):
+        """
+        Send a single request, retrying transient failures per `retry_policy`
+        """
+        request_headers = dict(self.headers)
+        if headers:
+            request_headers.update(headers)
+
+        policy = self.retry_policy
+        attempt = 0
+        while True:
+            attempt += 1
+            await self._athrottle(url)
+            self.metrics.increment("requests")
+            start = time.perf_counter()
+            try:
+                response = await self.session.request(
+                    method=method, url=url, headers=request_headers, **kwargs
+                )
+            except httpx.TransportError as e:
+                self.metrics.record_request(
+                    method, url, None, time.perf_counter() - start
+                )
+                if not policy.should_retry(attempt):
+                    self.metrics.increment("failures")
+                    raise
+                delay = policy.backoff(attempt)
+                LOGGER.info(f"{method} {url} failed ({e}), retrying in {delay:.1f}s")
+            else:
+                self.metrics.record_request(
+                    method,
+                    url,
+                    response.status_code,
+                    time.perf_counter() - start,
+                    len(response.content),
+                )
+                if response.is_success or not policy.should_retry(
+                    attempt, response.status_code
+                ):
+                    if not response.is_success:
+                        self.metrics.increment("failures")
+                    response.raise_for_status()
+                    return response
+                delay = policy.backoff(attempt, response.headers.get("Retry-After"))
+                LOGGER.info(
+                    f"{method} {url} returned {response.status_code}, retrying in {delay:.1f}s"
+                )
+
+            self.metrics.increment("retries")
+            await asyncio.sleep(delay)
+
+    async def _athrottle(self, url: str):
+        # reserving a token never blocks, so only the wait needs to be async
+        if self.rate_limiter is not None:
+            delay = self.rate_limiter.reserve(url)
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+    async def _request(
+        self,
+        *,
+        method: str,
+        api_url: str,
+        api_section: str,
+        uri_path: str,
+        data_key: str,
+        metadata_key: str,
+        paginate=True,
+        **kwargs,
+    ):
+        url = f"{api_url}{api_section}{uri_path}"
+        response = await self._send(method, url, **kwargs)
+
+        if paginate:
+            return await self._paginate(
+                api_url=api_url,
+                api_section=api_section,
+                method=method,
+                data_key=data_key,
+                metadata_key=metadata_key,
+                response=response,
+                **kwargs,
+            )
+        else:
+            return response
+
+    async def _stream_request(
+        self,
+        *,
+        method: str,
+        api_url: str,
+        api_section: str,
+        uri_path: str,
+        data_key: str,
+        metadata_key: str,
+        **kwargs,
+    ):
+        url = f"{api_url}{api_section}{uri_path}"
+        response = await self._send(method, url, **kwargs)
+
+        async for record in self._iter_paginate(
+            api_url=api_url,
+            api_section=api_section,
+            method=method,
+            data_key=data_key,
+            metadata_key=metadata_key,
+            response=response,
+            **kwargs,
+        ):
+            yield record
+
+    """
+    Pagination - async mirror of `MintEndpoints._paginate`
+    """
+
+    async def _paginate(self, data_key: str, metadata_key: str, response, **kwargs):
+        data = []
+        async for page in self._iter_pages(data_key, metadata_key, response, **kwargs):
+            data.extend(page)
+        return data
+
+    async def _iter_paginate(
+        self, data_key: str, metadata_key: str, response, **kwargs
+    ):
+        async for page in self._iter_pages(data_key, metadata_key, response, **kwargs):
+            for record in page:
+                yield record
+
+    async def _iter_pages(self, data_key: str, metadata_key: str, response, **kwargs):
+        json_data = self._decode_page(response, data_key, metadata_key)
+
+        # early abort if no data extraction theme
+        if data_key is None or data_key not in json_data:
+            LOGGER.warning("Data key not in response data, returning empty list")
+            LOGGER.debug(response.text)
+            return
+
+        yield json_data[data_key]
+
+        # early abort if no pagination mechanism defined
+        if metadata_key is None or metadata_key not in json_data:
+            if metadata_key is not None:
+                LOGGER.warning("Metadata key not in response data, not iterating")
+            return
+
+        metadata = _ResponseMetadata(json_data[metadata_key], **kwargs)
+
+        if self.max_workers > 1 and metadata.has_next and metadata.has_offsets:
+            async for page in self._fetch_offset_pages(
+                data_key, metadata_key, metadata
+            ):
+                yield page
+            return
+
+        while metadata.has_next:
+            response = await self.request(
+                uri_path=metadata.next_uri_path,
+                data_key=data_key,
+                metadata_key=metadata_key,
+                paginate=False,
+                **metadata.next_kwargs,
+            )
+            json_data = self._decode_page(response, data_key, metadata_key)
+            yield json_data[data_key]
+            metadata = _ResponseMetadata(
+                json_data[metadata_key], **metadata.next_kwargs
+            )
+
+    async def _fetch_offset_pages(
+        self, data_key: str, metadata_key: str, metadata: _ResponseMetadata
+    ):
+        async def fetch(offset):
+            uri_path, page_kwargs = metadata.page_request(offset)
+            response = await self.request(
+                uri_path=uri_path,
+                data_key=data_key,
+                metadata_key=metadata_key,
+                paginate=False,
+                **page_kwargs,
+            )
+            return self._decode_page(response, data_key).get(data_key, [])
+
+        offsets = iter(metadata.remaining_offsets)
+        pending = deque(
+            asyncio.ensure_future(fetch(offset))
+            for offset in islice(offsets, self.max_workers)
+        )
+        try:
+            while pending:
+                page = await pending.popleft()
+                next_offset = next(offsets, None)
+                if next_offset is not None:
+                    pending.append(asyncio.ensure_future(fetch(next_offset)))
+                yield page
+        finally:
+            for task in pending:
+                task.cancel()
+
+    """
+    User Methods - async variants of the methods that postprocess results
+    """
+
+    async def initiate_account_refresh(self):
+        await self._initiate_account_refresh()
+
+    async def get_credit_utilization(self, **kwargs):
+        data = await self._get_credit_utilization(**kwargs)
+        return _process_utilization(data)
+
+    def get_transaction_data(
+        self,
+        *args,
+        include_investment: bool = False,
+        remove_pending: bool = True,
+        stream: bool = False,
+        **kwargs,
+    ):
+        """
+        See `MintEndpoints.get_transaction_data`. Returns an awaitable list,
+        or an async iterator when `stream` is set
+        """
+        data = super().get_transaction_data(
+            *args,
+            include_investment=True,
+            remove_pending=False,
+            stream=stream,
+            **kwargs,
+        )
+        if stream:
+            return _afilter_transactions(data, remove_pending, include_investment)
+        return _gather_transactions(data, remove_pending, include_investment)
+
+    """
+    Convenience wrappers
+    """
+
+    async def get_net_worth_data(self):
+        data = await self.get_trend_data(
+            report_type=ReportView.Options.NET_WORTH,
+            date_filter=DateFilter.Options.ALL_TIME,
+        )
+        return _merge_net_worth(data)
+
+    async def get_credit_report_data(
+        self,
+        limit=2,
+        details=True,
+        exclude_inquiries=False,
+        exclude_accounts=False,
+        exclude_utilization=False,
+    ):
+        # the detailed sub-reports are independent, so request them concurrently
+        sections = {"reports": self.get_credit_reports(limit=limit)}
+        if details:
+            if not exclude_inquiries:
+                sections["inquiries"] = self.get_credit_inquiries()
+            if not exclude_accounts:
+                sections["accounts"] = self.get_credit_accounts()
+            if not exclude_utilization:
+                sections["utilization"] = self.get_credit_utilization()
+
+        results = await asyncio.gather(*sections.values())
+        return dict(zip(sections.keys(), results))
+
+    async def get_credit_score_data(self):
+        report = await self.get_credit_report_data(
+            limit=1,
+            details=False,
+            exclude_inquiries=False,
+            exclude_accounts=False,
+            exclude_utilization=False,
+        )
+        return _extract_credit_score(report)
+
+    async def get_account_balance_history(self):
+        accounts = await self.get_account_data()
+
+        if self.batched_balance_history is not False:
+            reports = await asyncio.gather(
+                *(
+                    self.get_trend_data(
+                        report_type=report,
+                        date_filter=DateFilter.Options.ALL_TIME,
+                        account_ids=[account["id"] for account in accounts],
+                        match_all_filters=False,
+                    )
+                    for report in BATCHED_BALANCE_HISTORY_REPORTS
+                )
+            )
+            data = [record for report in reports for record in report]
+            balances = _split_balance_history(data, accounts)
+            if balances is not None:
+                self.batched_balance_history = True
+                return balances
+            if data:
+                self.batched_balance_history = False
+
+        LOGGER.debug("Batched balance history unavailable, requesting per account")
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def account_history(account, report):
+            async with semaphore:
+                data = await self.get_trend_data(
+                    report_type=report,
+                    date_filter=DateFilter.Options.ALL_TIME,
+                    account_ids=[account["id"]],
+                )
+            return _annotate_balance_history(data, account)
+
+        results = await asyncio.gather(
+            *(
+                account_history(account, report)
+                for account in accounts
+                for report in BALANCE_HISTORY_REPORTS
+            )
+        )
+        return [record for result in results for record in result]
+
+
+async def _gather_transactions(data, remove_pending: bool, include_investment: bool):
+    return [
+        transaction
+        for transaction in await data
+        if _keep_transaction(transaction, remove_pending, include_investment)
+    ]
+
+
+async def _afilter_transactions(data, remove_pending: bool, include_investment: bool):
+    async for transaction in data:
+        if _keep_transaction(transaction, remove_pending, include_investment):
+            yield transaction
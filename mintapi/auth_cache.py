@@ -0,0 +1,149 @@
+"""
+Encrypted on-disk cache of REST auth (api key + cookies) so warm runs can
+skip the browser sign in entirely
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Dict, List, Optional, Union
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_AUTH_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".mintapi", "auth")
+# Intuit sessions outlive this comfortably; a failed probe still evicts early
+DEFAULT_MAX_AGE = 60 * 60
+KEYRING_SERVICE = "mintapi_auth_cache"
+
+
+class AuthCache(object):
+    """
+    Stores one encrypted entry per identity under `path`
+
+    Entries are encrypted with Fernet using either the supplied `secret` or
+    a random key kept in the OS keyring, and carry their own expiry so stale
+    auth is never handed to the REST client
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_AUTH_CACHE_PATH,
+        secret: Optional[Union[str, bytes]] = None,
+        max_age: int = DEFAULT_MAX_AGE,
+    ):
+        try:
+            from cryptography.fernet import Fernet
+        except ImportError:
+            raise ImportError(
+                "AuthCache requires cryptography. Install it with `pip install mintapi[auth-cache]`"
+            )
+
+        self.path = path
+        self.max_age = max_age
+        self.fernet = Fernet(_fernet_key(secret) if secret else _keyring_key())
+
+    def _entry_path(self, email: str) -> str:
+        digest = hashlib.sha256(email.lower().encode()).hexdigest()
+        return os.path.join(self.path, digest)
+
+    def load(self, email: str) -> Optional[Dict]:
+        """
+        Returns {"api_key": ..., "cookies": [...]} for `email`, or None if
+        nothing usable is cached
+        """
+        from cryptography.fernet import InvalidToken
+
+        try:
+            with open(self._entry_path(email), "rb") as f:
+                entry = json.loads(self.fernet.decrypt(f.read()))
+        except FileNotFoundError:
+            return None
+        except (InvalidToken, ValueError):
+            LOGGER.warning("Discarding unreadable auth cache entry")
+            self.invalidate(email)
+            return None
+
+        if entry["expires_at"] <= time.time():
+            LOGGER.info("Cached auth expired")
+            self.invalidate(email)
+            return None
+
+        return {"api_key": entry["api_key"], "cookies": entry["cookies"]}
+
+    def save(self, email: str, api_key: str, cookies: Union[str, List[Dict]]):
+        now = time.time()
+        expires_at = now + self.max_age
+        if isinstance(cookies, list):
+            # never outlive the cookies themselves
+            expiries = [c["expiry"] for c in cookies if c.get("expiry")]
+            if expiries:
+                expires_at = min(expires_at, min(expiries))
+
+        token = self.fernet.encrypt(
+            json.dumps(
+                {
+                    "api_key": api_key,
+                    "cookies": cookies,
+                    "created_at": now,
+                    "expires_at": expires_at,
+                }
+            ).encode()
+        )
+
+        os.makedirs(self.path, mode=0o700, exist_ok=True)
+        # write then rename so concurrent processes never read a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.path)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(token)
+            os.replace(tmp_path, self._entry_path(email))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def invalidate(self, email: str):
+        try:
+            os.remove(self._entry_path(email))
+        except FileNotFoundError:
+            pass
+
+
+def authorize_from_cache(auth_cache: AuthCache, email: str, client) -> bool:
+    """
+    Authorize the rest `client` with the auth cached for `email`, if there is
+    any and it still passes the client's probe request. Stale auth is evicted
+    from the cache and cleared from the client. Returns whether the client
+    was authorized
+    """
+    cached = auth_cache.load(email)
+    if cached is None:
+        return False
+
+    client.authorize(**cached)
+    if client.is_authorized():
+        return True
+
+    auth_cache.invalidate(email)
+    client.clear_auth()
+    return False
+
+
+def _fernet_key(secret: Union[str, bytes]) -> bytes:
+    if isinstance(secret, str):
+        secret = secret.encode()
+    return base64.urlsafe_b64encode(hashlib.sha256(secret).digest())
+
+
+def _keyring_key() -> bytes:
+    import keyring
+    from cryptography.fernet import Fernet
+
+    key = keyring.get_password(KEYRING_SERVICE, "key")
+    if key is None:
+        key = Fernet.generate_key().decode()
+        keyring.set_password(KEYRING_SERVICE, "key", key)
+    return key.encode()
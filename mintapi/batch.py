@@ -0,0 +1,452 @@
+"""
+Data pulls for many Mint identities at once
+
+Each identity is signed in with a headless browser taken from a bounded
+`BrowserPool`, its auth is handed to a `RESTClient`, and the browser goes
+back to the pool for the next sign in while that identity's pulls run over
+REST. Sign ins and pulls of different identities overlap, and every
+identity's timing and failures are reported separately
+
+    python -m mintapi.batch manifest.json --output-dir out
+
+The manifest lists the identities and the pulls (REST client methods and
+their arguments) to run for each of them:
+
+    {
+        "pulls": {"get_account_data": {}, "get_transaction_data": {"limit": 500}},
+        "identities": [
+            {"email": "one@example.com", "password": "...", "mfa_method": "soft-token",
+             "mfa_token": "..."},
+            {"email": "two@example.com", "pulls": {"get_net_worth_data": {}}}
+        ]
+    }
+
+Identities without a password use the one stored in the keyring (as by
+`mintapi --keyring`). Any other identity keys are sign in parameters of
+`SeleniumBrowser.login_and_get_token` (mfa_method, intuit_account, imap_*,
+wait_for_sync, ...)
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from mintapi import constants
+from mintapi.auth_cache import AuthCache, authorize_from_cache
+from mintapi.cache import DiskCache
+from mintapi.endpoints import MintEndpoints
+from mintapi.ratelimit import RateLimiter
+from mintapi.rest import RESTClient
+from mintapi.retry import RetryPolicy
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_MAX_BROWSERS = 2
+DEFAULT_MAX_IDENTITIES = 4
+DEFAULT_PULLS = {"get_account_data": {}}
+# cleared from a pooled browser before it signs in the next identity
+RESET_ORIGINS = (
+    constants.MINT_ROOT_URL,
+    constants.MINT_BETA_ROOT_URL,
+    constants.MINT_CREDIT_URL,
+    "https://accounts.intuit.com",
+)
+SIGN_IN = "sign_in"
+
+
+@dataclass
+class Identity:
+    """
+    One Mint login of a batch. pulls overrides the batch's pulls, and
+    sign_in holds extra `login_and_get_token` parameters
+    """
+
+    email: str
+    password: Optional[str] = None
+    pulls: Optional[Dict[str, Dict[str, Any]]] = None
+    sign_in: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class IdentityResult:
+    """
+    Outcome of one identity's sign in and pulls
+
+    errors maps "sign_in" or a pull to its error message. browser_wait_seconds
+    is the time spent waiting for a pooled browser, and cached_auth is set
+    when the sign in was skipped thanks to the auth cache
+    """
+
+    email: str
+    data: Dict[str, Any] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+    cached_auth: bool = False
+    browser_wait_seconds: float = 0.0
+    sign_in_seconds: float = 0.0
+    pull_seconds: Dict[str, float] = field(default_factory=dict)
+    total_seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+class BrowserPool(object):
+    """
+    At most `size` headless Chrome drivers, lent out for one sign in at a
+    time. Drivers are reused by later sign ins once Intuit's cookies and
+    storage are cleared from them, and quit if that fails or the sign in
+    raised
+    """
+
+    def __init__(
+        self,
+        size: int = DEFAULT_MAX_BROWSERS,
+        use_chromedriver_on_path: bool = False,
+        chromedriver_download_path: str = os.getcwd(),
+        create_driver: Optional[Callable] = None,
+    ):
+        self.size = size
+        self.create_driver = create_driver or (
+            lambda: _create_headless_driver(
+                use_chromedriver_on_path, chromedriver_download_path
+            )
+        )
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def driver(self):
+        with self._slots:
+            with self._lock:
+                driver = self._idle.pop() if self._idle else None
+            if driver is None:
+                driver = self.create_driver()
+
+            try:
+                yield driver
+            except BaseException:
+                _quit(driver)
+                raise
+
+            if _reset(driver):
+                with self._lock:
+                    self._idle.append(driver)
+            else:
+                _quit(driver)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for driver in idle:
+            _quit(driver)
+
+
+class BatchRunner(object):
+    """
+    Runs the pulls of many identities, `max_identities` at a time
+
+    Sign ins share `browser_pool` (or a pool of `max_browsers` drivers) and,
+    if given, an `imap_watcher` reading every identity's MFA email over one
+    connection. The rest client options (max_workers, retry_policy,
+    rate_limiter, timeout) apply to every identity; auth_cache and
+    response_cache (a directory, kept apart per identity) skip repeated sign
+    ins and requests across runs
+    """
+
+    def __init__(
+        self,
+        pulls: Optional[Dict[str, Dict[str, Any]]] = None,
+        max_identities: int = DEFAULT_MAX_IDENTITIES,
+        max_browsers: int = DEFAULT_MAX_BROWSERS,
+        browser_pool: Optional[BrowserPool] = None,
+        imap_watcher=None,
+        auth_cache: Optional[Union[str, AuthCache]] = None,
+        response_cache: Optional[str] = None,
+        max_workers: int = 1,
+        retry_policy: Optional[RetryPolicy] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        **rest_params,
+    ):
+        self.pulls = pulls or DEFAULT_PULLS
+        self.max_identities = max_identities
+        self.browser_pool = browser_pool or BrowserPool(max_browsers)
+        self.imap_watcher = imap_watcher
+        if isinstance(auth_cache, str):
+            auth_cache = AuthCache(auth_cache)
+        self.auth_cache = auth_cache
+        self.response_cache = response_cache
+        self.rest_params = dict(
+            max_workers=max_workers,
+            retry_policy=retry_policy,
+            rate_limiter=rate_limiter,
+            **rest_params,
+        )
+
+    def run(self, identities: List[Identity]) -> List[IdentityResult]:
+        """Returns the result of every identity, in the order given."""
+        with ThreadPoolExecutor(max_workers=self.max_identities) as executor:
+            return list(executor.map(self.run_identity, identities))
+
+    def close(self):
+        self.browser_pool.close()
+
+    def run_identity(self, identity: Identity) -> IdentityResult:
+        result = IdentityResult(identity.email)
+        start = time.perf_counter()
+        client = RESTClient(
+            response_cache=(
+                DiskCache(self.response_cache, namespace=identity.email)
+                if self.response_cache
+                else None
+            ),
+            **self.rest_params,
+        )
+        try:
+            try:
+                self._authorize(identity, client, result)
+            except Exception as e:
+                LOGGER.warning(f"Sign in failed for {identity.email}: {e}")
+                result.errors[SIGN_IN] = _describe(e)
+                return result
+
+            pulls = identity.pulls or self.pulls
+            # an identity's pulls are independent requests, like the CLI's
+            with ThreadPoolExecutor(max_workers=len(pulls)) as executor:
+                futures = {
+                    name: executor.submit(_timed, client, name, kwargs)
+                    for name, kwargs in pulls.items()
+                }
+            for name, future in futures.items():
+                data, seconds, error = future.result()
+                result.pull_seconds[name] = seconds
+                if error is None:
+                    result.data[name] = data
+                else:
+                    LOGGER.warning(f"{name} failed for {identity.email}: {error}")
+                    result.errors[name] = error
+            return result
+        finally:
+            client.close()
+            result.total_seconds = time.perf_counter() - start
+
+    def _authorize(
+        self, identity: Identity, client: RESTClient, result: IdentityResult
+    ):
+        if self.auth_cache is not None and authorize_from_cache(
+            self.auth_cache, identity.email, client
+        ):
+            result.cached_auth = True
+            return
+
+        from mintapi.browser import SeleniumBrowser
+
+        password = identity.password or _keyring_password(identity.email)
+        sign_in = {"imap_folder": "INBOX", **identity.sign_in}
+        if self.imap_watcher is not None:
+            sign_in.setdefault("imap_watcher", self.imap_watcher)
+
+        waiting = time.perf_counter()
+        with self.browser_pool.driver() as driver:
+            start = time.perf_counter()
+            result.browser_wait_seconds = start - waiting
+            try:
+                # the driver belongs to the pool, which quits it on failure
+                browser = SeleniumBrowser(quit_driver_on_fail=False)
+                browser.login_and_get_token(
+                    identity.email, password, driver=driver, headless=True, **sign_in
+                )
+                api_key = browser._get_api_key_header()["authorization"]
+                cookies = browser._get_cookies()
+            finally:
+                result.sign_in_seconds = time.perf_counter() - start
+
+        client.authorize(cookies=cookies, api_key=api_key)
+        if self.auth_cache is not None:
+            self.auth_cache.save(identity.email, api_key=api_key, cookies=cookies)
+
+
+def load_manifest(path: str):
+    """Returns the (identities, pulls) of the manifest at `path`."""
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    pulls = _pull_arguments(manifest.get("pulls") or DEFAULT_PULLS)
+    identities = []
+    for entry in manifest["identities"]:
+        entry = dict(entry)
+        email = entry.pop("email")
+        password = entry.pop("password", None)
+        identity_pulls = entry.pop("pulls", None)
+        identities.append(
+            Identity(
+                email,
+                password,
+                _pull_arguments(identity_pulls) if identity_pulls else None,
+                sign_in=entry,
+            )
+        )
+
+    for identity in identities:
+        for name in identity.pulls or pulls:
+            if not name.startswith("get_") or not hasattr(MintEndpoints, name):
+                raise ValueError(f"Unknown pull {name!r} for {identity.email}")
+    return identities, pulls
+
+
+def report(results: List[IdentityResult]) -> str:
+    """Per-identity timing and failures, as printed by `python -m mintapi.batch`."""
+    width = max([len("identity"), *(len(result.email) for result in results)])
+    lines = [
+        f"{'identity':<{width}}  status  browser wait  sign in  pulls    total",
+    ]
+    for result in results:
+        status = "ok" if result.ok else "failed"
+        sign_in = "cached" if result.cached_auth else f"{result.sign_in_seconds:.2f}"
+        lines.append(
+            f"{result.email:<{width}}  {status:<6}"
+            f"  {result.browser_wait_seconds:>12.2f}  {sign_in:>7}"
+            f"  {max(result.pull_seconds.values(), default=0):>5.2f}"
+            f"  {result.total_seconds:>7.2f}"
+        )
+        for name, error in result.errors.items():
+            lines.append(f"{'':<{width}}  {name}: {error}")
+    failed = sum(not result.ok for result in results)
+    lines.append(f"{len(results)} identities, {failed} failed")
+    return "\n".join(lines)
+
+
+def _pull_arguments(pulls) -> Dict[str, Dict[str, Any]]:
+    # a list of pull names is shorthand for pulls without arguments
+    if isinstance(pulls, list):
+        return {name: {} for name in pulls}
+    return pulls
+
+
+def _timed(client, name, kwargs):
+    start = time.perf_counter()
+    try:
+        data = getattr(client, name)(**kwargs)
+        if not isinstance(data, (list, dict)):
+            # generators pull their pages as they are consumed
+            data = list(data)
+        error = None
+    except Exception as e:
+        data, error = None, _describe(e)
+    return data, time.perf_counter() - start, error
+
+
+def _describe(e: Exception) -> str:
+    return f"{type(e).__name__}: {e}"
+
+
+def _keyring_password(email: str) -> str:
+    import keyring
+
+    password = keyring.get_password("mintapi", email)
+    if password is None:
+        raise ValueError(f"No password given or in the keyring for {email}")
+    return password
+
+
+def _create_headless_driver(use_chromedriver_on_path, chromedriver_download_path):
+    from mintapi.signIn import _create_web_driver_at_mint_com
+
+    return _create_web_driver_at_mint_com(
+        True, None, use_chromedriver_on_path, chromedriver_download_path
+    )
+
+
+def _reset(driver) -> bool:
+    try:
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        for origin in RESET_ORIGINS:
+            driver.execute_cdp_cmd(
+                "Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"}
+            )
+        driver.get("about:blank")
+        return True
+    except Exception as e:
+        LOGGER.info(f"Discarding browser that could not be reset: {e}")
+        return False
+
+
+def _quit(driver):
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m mintapi.batch",
+        description="Run the pulls of a manifest of Mint identities concurrently.",
+    )
+    parser.add_argument("manifest", help="JSON manifest of identities and pulls")
+    parser.add_argument(
+        "--output-dir",
+        help="Write each identity's pulls to DIR/<email>/<pull>.json",
+    )
+    parser.add_argument(
+        "--max-browsers",
+        type=int,
+        default=DEFAULT_MAX_BROWSERS,
+        help="Headless browsers signing in at once",
+    )
+    parser.add_argument(
+        "--max-identities",
+        type=int,
+        default=DEFAULT_MAX_IDENTITIES,
+        help="Identities signed in or pulled at once",
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=1,
+        help="Pages each pull fetches concurrently",
+    )
+    parser.add_argument("--auth-cache", help="Directory caching REST auth")
+    parser.add_argument("--response-cache", help="Directory caching responses")
+    options = parser.parse_args(argv)
+
+    identities, pulls = load_manifest(options.manifest)
+    runner = BatchRunner(
+        pulls,
+        max_identities=options.max_identities,
+        max_browsers=options.max_browsers,
+        auth_cache=options.auth_cache,
+        response_cache=options.response_cache,
+        max_workers=options.max_workers,
+    )
+    try:
+        results = runner.run(identities)
+    finally:
+        runner.close()
+
+    if options.output_dir:
+        from mintapi.serialization import dump
+
+        for result in results:
+            directory = os.path.join(options.output_dir, result.email)
+            os.makedirs(directory, exist_ok=True)
+            for name, data in result.data.items():
+                path = os.path.join(directory, f"{name}.json")
+                with open(path, "w", encoding="utf-8") as f:
+                    dump(data, f, indent=2)
+
+    print(report(results), file=sys.stderr)
+    return 0 if all(result.ok for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,14 @@
 """
 Selenium Browser
 """
+
 import logging
 import os
+import time
 
 from mintapi.constants import JSON_HEADER, MINT_CREDIT_URL
 from mintapi.endpoints import MintEndpoints
+from mintapi.metrics import ClientMetrics
 from mintapi.signIn import _create_web_driver_at_mint_com, sign_in
 
 logger = logging.getLogger("mintapi")
@@ -40,6 +43,7 @@ class SeleniumBrowser(MintEndpoints):
         imap_password=None,
         imap_server=None,
         imap_folder="INBOX",
+        imap_watcher=None,
         wait_for_sync=True,
         wait_for_sync_timeout=5 * 60,
         fail_if_stale=False,
@@ -48,10 +52,15 @@ class SeleniumBrowser(MintEndpoints):
         driver=None,
         beta=False,
         quit_driver_on_fail=True,
+        sign_in_profile=None,
     ):
         self.driver = None
         self.status_message = None
+        self._api_key_header = None
         self.quit_driver_on_fail = quit_driver_on_fail
+        self.metrics = ClientMetrics()
+        # optional mintapi.profiling.SignInProfile timing each sign in phase
+        self.sign_in_profile = sign_in_profile
 
         if email and password:
             self.login_and_get_token(
@@ -67,6 +76,7 @@ class SeleniumBrowser(MintEndpoints):
                 imap_password=imap_password,
                 imap_server=imap_server,
                 imap_folder=imap_folder,
+                imap_watcher=imap_watcher,
                 wait_for_sync=wait_for_sync,
                 wait_for_sync_timeout=wait_for_sync_timeout,
                 fail_if_stale=fail_if_stale,
@@ -74,6 +84,7 @@ class SeleniumBrowser(MintEndpoints):
                 chromedriver_download_path=chromedriver_download_path,
                 driver=driver,
                 beta=beta,
+                profile=sign_in_profile,
             )
 
     """
@@ -87,6 +98,7 @@ class SeleniumBrowser(MintEndpoints):
 
         self.driver.quit()
         self.driver = None
+        self._api_key_header = None
 
     def login_and_get_token(
         self,
@@ -102,6 +114,7 @@ class SeleniumBrowser(MintEndpoints):
         imap_password=None,
         imap_server=None,
         imap_folder=None,
+        imap_watcher=None,
         wait_for_sync=True,
         wait_for_sync_timeout=5 * 60,
         fail_if_stale=False,
@@ -109,6 +122,7 @@ class SeleniumBrowser(MintEndpoints):
         chromedriver_download_path=os.getcwd(),
         driver=None,
         beta=False,
+        profile=None,
     ):
         self.driver = driver or _create_web_driver_at_mint_com(
             headless,
@@ -117,6 +131,9 @@ class SeleniumBrowser(MintEndpoints):
             chromedriver_download_path,
         )
 
+        # a new session may come with a new api key
+        self._api_key_header = None
+
         try:
             self.status_message = sign_in(
                 email,
@@ -134,6 +151,8 @@ class SeleniumBrowser(MintEndpoints):
                 imap_server,
                 imap_folder,
                 beta,
+                profile=profile,
+                imap_watcher=imap_watcher,
             )
         except Exception as e:
             msg = f"Could not sign in to Mint. Current page: {self.driver.current_url}"
@@ -175,6 +194,7 @@ class SeleniumBrowser(MintEndpoints):
         data_key: str,
         metadata_key: str,
         paginate=True,
+        stream=False,
         headers=None,
         **kwargs,
     ):
@@ -186,13 +206,17 @@ class SeleniumBrowser(MintEndpoints):
         auth_headers = self._get_api_key_header()
         auth_headers.update(headers)
 
-        response = self.driver.request(
-            method=method, url=url, headers=auth_headers, **kwargs
-        )
+        response = self._send(method, url, auth_headers, **kwargs)
+        if response.status_code == 401:
+            # the cached api key may have been rotated; re-read it once and retry
+            auth_headers = self._get_api_key_header(refresh=True)
+            auth_headers.update(headers)
+            response = self._send(method, url, auth_headers, **kwargs)
         response.raise_for_status()
 
         if paginate:
-            return self._paginate(
+            paginator = self._iter_paginate if stream else self._paginate
+            return paginator(
                 api_url=api_url,
                 api_section=api_section,
                 method=method,
@@ -205,18 +229,38 @@ class SeleniumBrowser(MintEndpoints):
         else:
             return response
 
+    def _send(self, method: str, url: str, headers, **kwargs):
+        self._throttle(url)
+        self.metrics.increment("requests")
+        start = time.perf_counter()
+        response = self.driver.request(
+            method=method, url=url, headers=headers, **kwargs
+        )
+        self.metrics.record_request(
+            method,
+            url,
+            response.status_code,
+            time.perf_counter() - start,
+            len(response.content),
+        )
+        return response
+
     """
     Session Extraction
     """
 
-    def _get_api_key_header(self):
-        key_var = "window.__shellInternal.appExperience.appApiKey"
-        api_key = self.driver.execute_script("return " + key_var)
-        auth = "Intuit_APIKey intuit_apikey=" + api_key
-        auth += ", intuit_apikey_version=1.0"
-        header = {"authorization": auth}
-        header.update(JSON_HEADER)
-        return header
+    def _get_api_key_header(self, refresh=False):
+        # reading the key is a WebDriver round trip, so only do it once per
+        # session (or when a request is rejected) and hand out copies
+        if self._api_key_header is None or refresh:
+            key_var = "window.__shellInternal.appExperience.appApiKey"
+            api_key = self.driver.execute_script("return " + key_var)
+            auth = "Intuit_APIKey intuit_apikey=" + api_key
+            auth += ", intuit_apikey_version=1.0"
+            header = {"authorization": auth}
+            header.update(JSON_HEADER)
+            self._api_key_header = header
+        return dict(self._api_key_header)
 
     def _get_cookies(self):
         return self.driver.get_cookies()
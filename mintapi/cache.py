@@ -0,0 +1,180 @@
+"""
+Response caches for slow changing reference data
+
+Categories, tags and transaction rules rarely change, so their
+(paginated) results can be reused between calls and between runs for
+a per-endpoint time to live
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from abc import ABCMeta, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Optional
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_RESPONSE_CACHE_PATH = os.path.join(
+    os.path.expanduser("~"), ".mintapi", "responses"
+)
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+
+# seconds each endpoint (by uri path) is cached for. endpoints not listed
+# here are never cached. the credit endpoints are left out: they have no data
+# key, so their paginated results always come back empty
+DEFAULT_TTLS = {
+    "/v1/categories": DAY,
+    "/v1/tags": DAY,
+    "/v1/transaction-rules": HOUR,
+}
+
+# sentinel for cache misses, so falsy results (e.g. []) can be cached
+MISS = object()
+
+
+class ResponseCache(object, metaclass=ABCMeta):
+    """
+    Base class for response caches
+
+    Parameters
+    ----------
+    ttls : Optional[Dict[str, float]], optional
+        per uri path overrides of `DEFAULT_TTLS`. a ttl of 0 or None
+        disables caching for that path
+    namespace : Optional[str], optional
+        mixed into every key, so one cache can be shared by several Mint
+        identities without mixing their data
+    """
+
+    def __init__(
+        self, ttls: Optional[Dict[str, float]] = None, namespace: Optional[str] = None
+    ):
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.namespace = namespace
+
+    def ttl_for(self, uri_path: str) -> Optional[float]:
+        return self.ttls.get(uri_path.split("?")[0]) or None
+
+    def key(self, method: str, url: str, params=None, payload=None) -> str:
+        raw = json.dumps(
+            [self.namespace, method.upper(), url, params, payload],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    @abstractmethod
+    def get(self, key: str):
+        """Returns the cached value for `key`, or `MISS`."""
+
+    @abstractmethod
+    def set(self, key: str, value, ttl: float):
+        pass
+
+    @abstractmethod
+    def clear(self):
+        pass
+
+
+class MemoryCache(ResponseCache):
+    """
+    Thread safe in-process LRU cache holding at most `maxsize` responses
+
+    Values are copied in and out so callers that modify results can't
+    corrupt the cache
+    """
+
+    def __init__(self, maxsize: int = 128, **kwargs):
+        super().__init__(**kwargs)
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISS
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return MISS
+            self._entries.move_to_end(key)
+        return copy.deepcopy(value)
+
+    def set(self, key: str, value, ttl: float):
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class DiskCache(ResponseCache):
+    """
+    On-disk cache with one JSON file per response under `path`, so cached
+    responses survive between runs and can be shared between processes
+    """
+
+    def __init__(self, path: str = DEFAULT_RESPONSE_CACHE_PATH, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.path, f"{key}.json")
+
+    def get(self, key: str):
+        try:
+            with open(self._entry_path(key)) as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return MISS
+        except ValueError:
+            LOGGER.warning("Discarding unreadable response cache entry")
+            self._remove(key)
+            return MISS
+
+        if entry["expires_at"] <= time.time():
+            self._remove(key)
+            return MISS
+        return entry["value"]
+
+    def set(self, key: str, value, ttl: float):
+        os.makedirs(self.path, mode=0o700, exist_ok=True)
+        # write then rename so concurrent processes never read a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.path)
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"expires_at": time.time() + ttl, "value": value}, f)
+            os.replace(tmp_path, self._entry_path(key))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def clear(self):
+        try:
+            names = os.listdir(self.path)
+        except FileNotFoundError:
+            return
+        for name in names:
+            if name.endswith(".json"):
+                self._remove(name[: -len(".json")])
+
+    def _remove(self, key: str):
+        try:
+            os.remove(self._entry_path(key))
+        except FileNotFoundError:
+            pass
@@ -1,13 +1,15 @@
 import atexit
 import getpass
-import json
 import logging
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
 
 import configargparse
-import keyring
 from mintapi.api import Mint
+from mintapi.auth_cache import DEFAULT_AUTH_CACHE_PATH, AuthCache
+from mintapi.cache import DEFAULT_RESPONSE_CACHE_PATH, DiskCache
 from mintapi.constants import (
     ACCOUNT_KEY,
     BILL_KEY,
@@ -16,8 +18,12 @@ from mintapi.constants import (
     CREDIT_REPORT_KEY,
     CREDIT_SCORE_KEY,
     CSV_FORMAT,
+    MINT_CREDIT_URL,
+    MINT_ROOT_URL,
     INVESTMENT_KEY,
     JSON_FORMAT,
+    JSONL_FORMAT,
+    PARQUET_FORMAT,
     MFA_VIA_EMAIL,
     MFA_VIA_SMS,
     MFA_VIA_SOFT_TOKEN,
@@ -27,9 +33,19 @@ from mintapi.constants import (
     ACCOUNT_BALANCE_HISTORY_KEY,
 )
 from mintapi.filters import DateFilter
-from mintapi.signIn import get_email_code
+from mintapi.mfa_email import get_email_code
+from mintapi.profiling import SignInProfile
+from mintapi.ratelimit import RateLimiter
+from mintapi.retry import RetryPolicy
+from mintapi.serialization import dump, dumps
+from mintapi.sync import TransactionStore, sync_transactions
 from mintapi.trends import ReportView
-from pandas import json_normalize
+from mintapi.writers import (
+    STREAMING_FORMATS,
+    TEXT_FORMATS,
+    write_parquet,
+    write_records,
+)
 
 logger = logging.getLogger("mintapi")
 
@@ -77,6 +93,23 @@ def parse_arguments(args):
                 "help": "Display accounts that need attention (None if none).",
             },
         ),
+        (
+            ("--auth-cache",),
+            {
+                "nargs": "?",
+                "const": DEFAULT_AUTH_CACHE_PATH,
+                "default": None,
+                "help": "Directory of an encrypted cache of the REST client auth, so later runs can skip the browser sign in.  Defaults to $HOME/.mintapi/auth when given without a value.  Used with --use-rest-client.",
+            },
+        ),
+        (
+            ("--auth-cache-key",),
+            {
+                "default": None,
+                "env_var": "MINTAPI_AUTH_CACHE_KEY",
+                "help": "Secret used to encrypt the auth cache.  Defaults to a random key stored in the OS keyring.",
+            },
+        ),
         (
             ("--beta",),
             {
@@ -127,6 +160,14 @@ def parse_arguments(args):
                 "help": "The directory to download chromedrive to.",
             },
         ),
+        (
+            ("--concurrent-pulls",),
+            {
+                "type": int,
+                "default": 4,
+                "help": "Number of requested data types (accounts, transactions, ...) to pull at once.  Used with --use-rest-client.  Default is 4.",
+            },
+        ),
         (
             ("--config-file", "-c"),
             {
@@ -196,15 +237,15 @@ def parse_arguments(args):
         (
             ("--filename", "-f"),
             {
-                "help": "write results to file. can be {csv,json} format. default is to write to stdout."
+                "help": "write results to file. can be {csv,json,jsonl,parquet} format. default is to write to stdout."
             },
         ),
         (
             ("--format",),
             {
-                "choices": [JSON_FORMAT, CSV_FORMAT],
+                "choices": [JSON_FORMAT, JSONL_FORMAT, CSV_FORMAT, PARQUET_FORMAT],
                 "default": JSON_FORMAT,
-                "help": "The format used to return data.",
+                "help": "The format used to return data.  jsonl and csv are written record by record as data arrives.  parquet is written in row groups with a typed schema per data type and requires --filename.",
             },
         ),
         (
@@ -260,6 +301,22 @@ def parse_arguments(args):
                 "help": "Number of records to include from the API.  Default is 5000.",
             },
         ),
+        (
+            ("--max-attempts",),
+            {
+                "type": int,
+                "default": RetryPolicy.max_attempts,
+                "help": "Attempts per request before giving up on throttling or gateway errors, with exponential backoff in between.  Used with --use-rest-client.  Default is 5.",
+            },
+        ),
+        (
+            ("--max-workers",),
+            {
+                "type": int,
+                "default": 1,
+                "help": "Number of result pages to fetch concurrently.  Used with --use-rest-client.  Default is 1.",
+            },
+        ),
         (
             ("--mfa-method",),
             {
@@ -293,6 +350,38 @@ def parse_arguments(args):
                 "help": "By default, mint api will wait for accounts to sync with the backing financial institutions. If this flag is present, do not wait for them to sync.",
             },
         ),
+        (
+            ("--rate-limit",),
+            {
+                "type": float,
+                "default": None,
+                "help": "Maximum requests per second sent to each Mint host.  Default is unlimited.",
+            },
+        ),
+        (
+            ("--rate-limit-dir",),
+            {
+                "default": None,
+                "help": "Directory holding the --rate-limit budget, so every mintapi process pointed at it shares one budget.  Default is a budget per process.",
+            },
+        ),
+        (
+            ("--refresh-cache",),
+            {
+                "action": "store_true",
+                "default": False,
+                "help": "Discard the --response-cache before pulling, so every endpoint is requested fresh.",
+            },
+        ),
+        (
+            ("--response-cache",),
+            {
+                "nargs": "?",
+                "const": DEFAULT_RESPONSE_CACHE_PATH,
+                "default": None,
+                "help": "Directory caching slow changing data (categories, tags, rules) between runs.  Defaults to $HOME/.mintapi/responses when given without a value.",
+            },
+        ),
         (
             ("--session-path",),
             {
@@ -318,6 +407,14 @@ def parse_arguments(args):
                 "help": "Earliest date for transactions to be retrieved from. Used with --transactions. Format: mm/dd/yy",
             },
         ),
+        (
+            ("--stats",),
+            {
+                "action": "store_true",
+                "default": False,
+                "help": "Print a summary of the sign in (time per phase) and of the requests sent (latency per endpoint, bytes, retries, pages and decode time) to stderr when done.",
+            },
+        ),
         (
             ("--transaction-date-filter",),
             {
@@ -327,6 +424,13 @@ def parse_arguments(args):
                 "help": "The date window for which to generate your transaction search.  Default is All Time.",
             },
         ),
+        (
+            ("--transaction-store",),
+            {
+                "default": None,
+                "help": "Path to a SQLite database used to incrementally sync transactions.  Only transactions since the last sync are downloaded, and the full stored history is returned, so date filters can't be used with it.  Used with --transactions.",
+            },
+        ),
         (
             ("--transactions", "-t"),
             {"action": "store_true", "default": False, "help": "Retrieve transactions"},
@@ -388,10 +492,26 @@ def parse_arguments(args):
     for argument_commands, argument_options in ARGUMENTS:
         cmdline.add_argument(*argument_commands, **argument_options)
 
-    return cmdline.parse_args(args)
+    options = cmdline.parse_args(args)
+    if options.format == PARQUET_FORMAT and options.filename is None:
+        cmdline.error("--format parquet requires --filename")
+    if options.transaction_store and (
+        options.start_date
+        or options.end_date
+        or DateFilter.Options(options.transaction_date_filter)
+        != DateFilter.Options.ALL_TIME
+    ):
+        cmdline.error(
+            "--transaction-store returns the full stored history and can't be "
+            "combined with --start-date, --end-date or --transaction-date-filter"
+        )
+    return options
 
 
 def handle_password(name, prompt, email, password, use_keyring=False):
+    if use_keyring:
+        import keyring
+
     if use_keyring and not password:
         # If we don't yet have a password, try prompting for it
         password = keyring.get_password(name, email)
@@ -415,33 +535,85 @@ def format_filename(options, name):
     return filename
 
 
-def output_data(options, data, name, attention_msg=None):
+def output_data(options, data, name):
     filename = format_filename(options, name)
-    if filename is None:
-        if options.format == CSV_FORMAT:
-            print(json_normalize(data).to_csv(index=False))
+    if options.format == PARQUET_FORMAT:
+        write_parquet(data, filename, kind=name)
+    elif options.format in TEXT_FORMATS:
+        # data may be a generator, which is written as it is consumed
+        if filename is None:
+            write_records(data, sys.stdout, options.format)
         else:
-            print(json.dumps(data, indent=2))
-        # NOTE: While this logic is here, unless validate_file_extensions
-        #       allows for other data types to export to CSV, this will
-        #       only include investment data.
-    elif options.format == CSV_FORMAT:
-        # NOTE: Currently, investment_data, which is a flat JSON, is the only
-        #       type of data that uses this section.  So, if we open this up to
-        #       other non-flat JSON data, we will need to revisit this.
-        json_normalize(data).to_csv(filename, index=False)
-    elif options.format == JSON_FORMAT:
-        with open(filename, "w+") as f:
-            json.dump(data, f, indent=2)
+            with open(filename, "w", newline="", encoding="utf-8") as f:
+                write_records(data, f, options.format)
+    elif filename is None:
+        print(dumps(data, indent=2))
+    else:
+        with open(filename, "w+", encoding="utf-8") as f:
+            dump(data, f, indent=2)
 
-    if options.attention:
-        if attention_msg is None or attention_msg == "":
-            attention_msg = "no messages"
-        if options.filename is None:
-            print(attention_msg)
-        else:
-            with open(options.filename, "w+") as f:
-                f.write(attention_msg)
+
+def output_attention(options, attention_msg):
+    if attention_msg is None or attention_msg == "":
+        attention_msg = "no messages"
+    if options.filename is None:
+        print(attention_msg)
+    else:
+        with open(options.filename, "w+") as f:
+            f.write(attention_msg)
+
+
+def stored_transactions(options, mint, stream=False):
+    """
+    Sync the transaction store, then read the requested transactions back
+    out of it. sqlite connections can't cross threads, so the records are
+    read through a connection opened by whichever thread consumes them
+    """
+    with TransactionStore(options.transaction_store) as store:
+        sync_transactions(mint, store, limit=options.limit)
+
+    def records():
+        with TransactionStore(options.transaction_store) as store:
+            yield from store.transactions(
+                remove_pending=options.show_pending,
+                include_investment=options.include_investment,
+            )
+
+    return records() if stream else list(records())
+
+
+def run_pulls(options, pulls, max_workers=1):
+    """
+    Run each (name, pull) on a bounded executor and write its output as soon
+    as it completes, so a run is bounded by the slowest pull rather than the
+    sum of all of them
+
+    Output files are written by the worker that pulled the data. stdout is
+    shared, so there each result is written from the calling thread, and
+    concurrent pulls collect their records before handing them over
+    """
+    to_stdout = options.filename is None
+    collect = to_stdout and max_workers > 1
+
+    def run(name, pull):
+        data = pull()
+        if not to_stdout:
+            output_data(options, data, name)
+        elif collect and not isinstance(data, (list, dict)):
+            data = list(data)
+        return data
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(run, name, pull): name for name, pull in pulls}
+        try:
+            for future in as_completed(futures):
+                data = future.result()
+                if to_stdout:
+                    output_data(options, data, futures[future])
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
 
 
 def main():
@@ -496,6 +668,25 @@ def main():
     else:
         session_path = options.session_path
 
+    auth_cache = None
+    if options.auth_cache and options.use_rest_client:
+        auth_cache = AuthCache(options.auth_cache, secret=options.auth_cache_key)
+
+    rate_limiter = None
+    if options.rate_limit:
+        rate_limiter = RateLimiter(
+            {MINT_ROOT_URL: options.rate_limit, MINT_CREDIT_URL: options.rate_limit},
+            shared_dir=options.rate_limit_dir,
+        )
+
+    response_cache = None
+    if options.response_cache:
+        response_cache = DiskCache(options.response_cache, namespace=email)
+        if options.refresh_cache:
+            response_cache.clear()
+
+    sign_in_profile = SignInProfile() if options.stats else None
+
     mint = Mint(
         email=email,
         password=password,
@@ -513,8 +704,14 @@ def main():
         fail_if_stale=options.fail_if_stale,
         use_chromedriver_on_path=options.use_chromedriver_on_path,
         use_rest_client=options.use_rest_client,
+        max_workers=options.max_workers,
+        auth_cache=auth_cache,
+        retry_policy=RetryPolicy(max_attempts=options.max_attempts),
+        rate_limiter=rate_limiter,
+        response_cache=response_cache,
         chromedriver_download_path=options.chromedriver_download_path,
         beta=options.beta,
+        sign_in_profile=sign_in_profile,
     )
     atexit.register(mint.close)  # Ensure everything is torn down.
 
@@ -533,85 +730,142 @@ def main():
     if options.attention:
         attention_msg = mint.get_attention()
 
+    # streaming formats consume paginated results as generators, so records
+    # are written as each page arrives instead of after the full pull
+    stream = options.format in STREAMING_FORMATS
+
+    # each requested data type is an independent pull, run by run_pulls
+    pulls = []
+
     if options.trends:
-        data = mint.get_trend_data(
-            report_type=report_type,
-            date_filter=trend_date_filter,
-            start_date=options.start_date,
-            end_date=options.end_date,
-            category_ids=None,
-            tag_ids=None,
-            descriptions=None,
-            account_ids=None,
-            match_all_filters=True,
-            limit=options.limit,
-            offset=0,
+        pulls.append(
+            (
+                TRENDS_KEY,
+                partial(
+                    mint.get_trend_data,
+                    report_type=report_type,
+                    date_filter=trend_date_filter,
+                    start_date=options.start_date,
+                    end_date=options.end_date,
+                    category_ids=None,
+                    tag_ids=None,
+                    descriptions=None,
+                    account_ids=None,
+                    match_all_filters=True,
+                    limit=options.limit,
+                    offset=0,
+                    stream=stream,
+                ),
+            )
         )
-        output_data(options, data, TRENDS_KEY, attention_msg)
 
     if options.account_balance_history:
-        data = mint.get_account_balance_history()
-        output_data(options, data, ACCOUNT_BALANCE_HISTORY_KEY, attention_msg)
+        pulls.append((ACCOUNT_BALANCE_HISTORY_KEY, mint.get_account_balance_history))
 
     if options.accounts:
-        data = mint.get_account_data(limit=options.limit)
-        output_data(options, data, ACCOUNT_KEY, attention_msg)
+        pulls.append(
+            (
+                ACCOUNT_KEY,
+                partial(mint.get_account_data, limit=options.limit, stream=stream),
+            )
+        )
 
     if options.bills:
-        data = mint.get_bills_data()
-        output_data(options, data, BILL_KEY, attention_msg)
+        pulls.append((BILL_KEY, partial(mint.get_bills_data, stream=stream)))
 
     if options.budgets:
-        data = mint.get_budget_data(limit=options.limit)
-        output_data(options, data, BUDGET_KEY, attention_msg)
+        pulls.append(
+            (
+                BUDGET_KEY,
+                partial(mint.get_budget_data, limit=options.limit, stream=stream),
+            )
+        )
     elif options.budget_hist:
-        data = mint.get_budget_data(limit=options.limit, hist=12)
-        output_data(options, data, BUDGET_KEY, attention_msg)
-
-    if options.transactions:
-        data = mint.get_transaction_data(
-            date_filter=transaction_date_filter,
-            start_date=options.start_date,
-            end_date=options.end_date,
-            category_ids=None,
-            tag_ids=None,
-            descriptions=None,
-            account_ids=None,
-            match_all_filters=True,
-            include_investment=options.include_investment,
-            remove_pending=options.show_pending,
-            limit=options.limit,
-            offset=0,
+        pulls.append(
+            (
+                BUDGET_KEY,
+                partial(
+                    mint.get_budget_data, limit=options.limit, hist=12, stream=stream
+                ),
+            )
+        )
+
+    if options.transactions and options.transaction_store:
+        pulls.append(
+            (
+                TRANSACTION_KEY,
+                partial(stored_transactions, options, mint, stream=stream),
+            )
+        )
+    elif options.transactions:
+        pulls.append(
+            (
+                TRANSACTION_KEY,
+                partial(
+                    mint.get_transaction_data,
+                    date_filter=transaction_date_filter,
+                    start_date=options.start_date,
+                    end_date=options.end_date,
+                    category_ids=None,
+                    tag_ids=None,
+                    descriptions=None,
+                    account_ids=None,
+                    match_all_filters=True,
+                    include_investment=options.include_investment,
+                    remove_pending=options.show_pending,
+                    limit=options.limit,
+                    offset=0,
+                    stream=stream,
+                ),
+            )
         )
-        output_data(options, data, TRANSACTION_KEY, attention_msg)
 
     if options.categories:
-        data = mint.get_category_data(
-            limit=options.limit,
+        pulls.append(
+            (
+                CATEGORY_KEY,
+                partial(mint.get_category_data, limit=options.limit, stream=stream),
+            )
         )
-        output_data(options, data, CATEGORY_KEY, attention_msg)
 
     if options.investments:
-        data = mint.get_investment_data(
-            limit=options.limit,
+        pulls.append(
+            (
+                INVESTMENT_KEY,
+                partial(mint.get_investment_data, limit=options.limit, stream=stream),
+            )
         )
-        output_data(options, data, INVESTMENT_KEY, attention_msg)
 
     if options.net_worth:
-        data = mint.get_net_worth_data()
-        formatted_data = {"net_worth": data}
-        output_data(options, formatted_data, NET_WORTH_KEY, attention_msg)
+        pulls.append((NET_WORTH_KEY, lambda: {"net_worth": mint.get_net_worth_data()}))
 
     if options.credit_score:
-        data = mint.get_credit_score_data()
-        formatted_data = {"credit_score": data}
-        output_data(options, formatted_data, CREDIT_SCORE_KEY, attention_msg)
+        pulls.append(
+            (CREDIT_SCORE_KEY, lambda: {"credit_score": mint.get_credit_score_data()})
+        )
 
     if options.credit_report:
-        data = mint.get_credit_report_data(
-            details=True,
-            exclude_inquiries=options.exclude_inquiries,
-            exclude_accounts=options.exclude_accounts,
-            exclude_utilization=options.exclude_utilization,
+        pulls.append(
+            (
+                CREDIT_REPORT_KEY,
+                partial(
+                    mint.get_credit_report_data,
+                    details=True,
+                    exclude_inquiries=options.exclude_inquiries,
+                    exclude_accounts=options.exclude_accounts,
+                    exclude_utilization=options.exclude_utilization,
+                ),
+            )
         )
-        output_data(options, data, CREDIT_REPORT_KEY, attention_msg)
+
+    # the selenium driver can only serve one request at a time
+    concurrent_pulls = options.concurrent_pulls if options.use_rest_client else 1
+    run_pulls(options, pulls, max_workers=concurrent_pulls)
+
+    if options.attention:
+        output_attention(options, attention_msg)
+
+    if options.stats:
+        if sign_in_profile.phases:
+            print(sign_in_profile.report(), file=sys.stderr)
+        print(mint.metrics.summary(), file=sys.stderr)
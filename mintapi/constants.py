@@ -1,5 +1,7 @@
 JSON_FORMAT = "json"
 CSV_FORMAT = "csv"
+JSONL_FORMAT = "jsonl"
+PARQUET_FORMAT = "parquet"
 
 ACCOUNT_KEY = "Account"
 ACCOUNT_BALANCE_HISTORY_KEY = "Account_Balance_History"
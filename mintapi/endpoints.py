@@ -4,21 +4,38 @@ Shared Endpoint module to keep definitions independent of implementation
 """
 
 
+import copy
 import logging
+import time
 from abc import ABCMeta, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from itertools import islice
 from typing import List, Optional
-from urllib.parse import parse_qs, urlparse
+from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
 
-import pandas as pd
+from mintapi.cache import MISS
 from mintapi.constants import MINT_CREDIT_URL, MINT_ROOT_URL
 from mintapi.filters import DateFilter, SearchFilterBuilder
 from mintapi.transactions import TransactionRequest
+from mintapi.serialization import decode_response
 from mintapi.trends import ReportView, TrendRequest
 from requests import Response
 
 LOGGER = logging.getLogger(__name__)
 
+# per-account history, one trend request per account and report
+BALANCE_HISTORY_REPORTS = (
+    ReportView.Options.ASSETS_TIME,
+    ReportView.Options.DEBTS_TIME,
+)
+# every account in a single trend request per report
+BATCHED_BALANCE_HISTORY_REPORTS = (
+    ReportView.Options.ASSETS_ACCOUNT,
+    ReportView.Options.DEBTS_ACCOUNT,
+)
+
 
 class MintEndpoints(object, metaclass=ABCMeta):
     """
@@ -26,15 +43,107 @@ class MintEndpoints(object, metaclass=ABCMeta):
     Expects implementing class to define the request method
     """
 
+    # number of pages fetched concurrently by `_paginate`. implementations
+    # that are not safe to share across threads should leave this at 1
+    max_workers = 1
+
+    # optional mintapi.ratelimit.RateLimiter pacing every request sent
+    rate_limiter = None
+
+    # optional mintapi.cache.ResponseCache reused for slow changing endpoints
+    response_cache = None
+
+    # optional mintapi.metrics.ClientMetrics recording requests and pages
+    metrics = None
+
+    # whether the per-account trend reports key their records by account.
+    # None until `get_account_balance_history` has found out
+    batched_balance_history = None
+
     @abstractmethod
     def request(self):
         pass
 
+    def _throttle(self, url: str):
+        """
+        Block until the rate limiter (if any) allows a request to `url`
+        """
+        if self.rate_limiter is not None:
+            self.rate_limiter.wait(url)
+
     def get(self, **kwargs):
-        return self.request(method="GET", **kwargs)
+        return self._cached_request(method="GET", **kwargs)
 
     def post(self, **kwargs):
-        return self.request(method="POST", **kwargs)
+        return self._cached_request(method="POST", **kwargs)
+
+    def _cached_request(self, bypass_cache: bool = False, **kwargs):
+        """
+        Serve `request` from the response cache when the endpoint has a ttl.
+        `bypass_cache` forces a fresh request, which then refreshes the cache
+        """
+        entry = self._cache_entry(**kwargs)
+        if entry is None:
+            return self.request(**kwargs)
+
+        key, ttl = entry
+        if not bypass_cache:
+            data = self.response_cache.get(key)
+            if data is not MISS:
+                LOGGER.debug(f"Serving {kwargs['uri_path']} from the response cache")
+                return data
+
+        data = self.request(**kwargs)
+        self.response_cache.set(key, data, ttl)
+        return data
+
+    def _cache_entry(
+        self,
+        *,
+        method: str,
+        api_url: str,
+        api_section: str,
+        uri_path: str,
+        data_key: str = None,
+        paginate=True,
+        stream=False,
+        **kwargs,
+    ):
+        """
+        Returns the (key, ttl) a request is cached under, or None if it
+        shouldn't be. Only complete, paginated results are cached, and never
+        those of requests without a data key, which are always empty
+        """
+        if self.response_cache is None or not paginate or stream:
+            return None
+        if data_key is None:
+            return None
+        ttl = self.response_cache.ttl_for(uri_path)
+        if not ttl:
+            return None
+        key = self.response_cache.key(
+            method,
+            f"{api_url}{api_section}{uri_path}",
+            params=kwargs.get("params"),
+            payload=kwargs.get("json", kwargs.get("data")),
+        )
+        return key, ttl
+
+    def _decode_page(self, response, data_key: str, metadata_key: str = None):
+        """
+        Decode the data and metadata of one page, recording its decode time
+        and record count
+        """
+        start = time.perf_counter()
+        json_data = decode_response(response, keys=(data_key, metadata_key))
+        if self.metrics is not None and data_key is not None:
+            records = json_data.get(data_key) if isinstance(json_data, dict) else None
+            self.metrics.record_page(
+                data_key,
+                len(records) if isinstance(records, list) else 0,
+                time.perf_counter() - start,
+            )
+        return json_data
 
     def _paginate(self, data_key: str, metadata_key: str, response: Response, **kwargs):
         """
@@ -42,6 +151,11 @@ class MintEndpoints(object, metaclass=ABCMeta):
         href links embedded in responses. Can iterate through sequentially
         and append results together
 
+        When `max_workers` is greater than 1 and the first response reports
+        `totalSize`, `limit` and `offset`, every remaining offset is computed
+        up front and the pages are fetched concurrently, then reassembled in
+        offset order
+
         Data schema:
         {DataType: [], metaData: {}} where DataType is a dynamic key mapping to the endpoint
         metaData follows a consistent format:
@@ -72,25 +186,45 @@ class MintEndpoints(object, metaclass=ABCMeta):
             _description_
         """
         data = []
+        for page in self._iter_pages(data_key, metadata_key, response, **kwargs):
+            data.extend(page)
+        return data
 
-        json_data = response.json()
+    def _iter_paginate(
+        self, data_key: str, metadata_key: str, response: Response, **kwargs
+    ):
+        """
+        Generator variant of `_paginate` that yields records as each page
+        arrives instead of accumulating every page first
+        """
+        for page in self._iter_pages(data_key, metadata_key, response, **kwargs):
+            yield from page
+
+    def _iter_pages(
+        self, data_key: str, metadata_key: str, response: Response, **kwargs
+    ):
+        json_data = self._decode_page(response, data_key, metadata_key)
 
         # early abort if no data extraction theme
         if data_key is None or data_key not in json_data:
             LOGGER.warning("Data key not in response data, returning empty list")
-            LOGGER.debug(json_data)
-            return data
+            LOGGER.debug(response.text)
+            return
 
-        data.extend(json_data[data_key])
+        yield json_data[data_key]
 
         # early abort if no pagination mechanism defined
         if metadata_key is None or metadata_key not in json_data:
             if metadata_key is not None:
                 LOGGER.warning("Metadata key not in response data, not iterating")
-            return data
+            return
 
         metadata = _ResponseMetadata(json_data[metadata_key], **kwargs)
 
+        if self.max_workers > 1 and metadata.has_next and metadata.has_offsets:
+            yield from self._fetch_offset_pages(data_key, metadata_key, metadata)
+            return
+
         while metadata.has_next:
             response = self.request(
                 uri_path=metadata.next_uri_path,
@@ -99,13 +233,44 @@ class MintEndpoints(object, metaclass=ABCMeta):
                 paginate=False,
                 **metadata.next_kwargs,
             )
-            json_data = response.json()
-            data.extend(json_data[data_key])
+            json_data = self._decode_page(response, data_key, metadata_key)
+            yield json_data[data_key]
             metadata = _ResponseMetadata(
                 json_data[metadata_key], **metadata.next_kwargs
             )
 
-        return data
+    def _fetch_offset_pages(
+        self, data_key: str, metadata_key: str, metadata: "_ResponseMetadata"
+    ):
+        """
+        Fetch every remaining page on a bounded worker pool. Pages are yielded
+        in offset order regardless of completion order, and at most
+        `max_workers` pages are in flight or buffered at any time
+        """
+
+        def fetch(offset):
+            uri_path, page_kwargs = metadata.page_request(offset)
+            response = self.request(
+                uri_path=uri_path,
+                data_key=data_key,
+                metadata_key=metadata_key,
+                paginate=False,
+                **page_kwargs,
+            )
+            return self._decode_page(response, data_key).get(data_key, [])
+
+        offsets = iter(metadata.remaining_offsets)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = deque(
+                executor.submit(fetch, offset)
+                for offset in islice(offsets, self.max_workers)
+            )
+            while pending:
+                page = pending.popleft().result()
+                next_offset = next(offsets, None)
+                if next_offset is not None:
+                    pending.append(executor.submit(fetch, next_offset))
+                yield page
 
     """
     Endpoints - Acts as the api descriptor (equivalent to an openapi generated client)
@@ -518,35 +683,6 @@ class MintEndpoints(object, metaclass=ABCMeta):
         _type_
             _description_
         """
-
-        def _process_utilization(data):
-            # Function to clean up the credit utilization history data
-            utilization = []
-            utilization.extend(_flatten_utilization(data["cumulative"]))
-            for trade in data["tradelines"]:
-                utilization.extend(_flatten_utilization(trade))
-            return utilization
-
-        def _flatten_utilization(data):
-            # The utilization history data has a nested format, grouped by year
-            # and then by month. Let's flatten that into a list of dates.
-            utilization = []
-            name = data.get("creditorName", "Total")
-            for cu in data["creditUtilization"]:
-                year = cu["year"]
-                for cu_month in cu["months"]:
-                    date = datetime.strptime(cu_month["name"], "%B").replace(
-                        day=1, year=int(year)
-                    )
-                    utilization.append(
-                        {
-                            "name": name,
-                            "date": date.strftime("%Y-%m-%d"),
-                            "utilization": cu_month["creditUtilization"],
-                        }
-                    )
-            return utilization
-
         data = self._get_credit_utilization(**kwargs)
         return _process_utilization(data)
 
@@ -646,19 +782,10 @@ class MintEndpoints(object, metaclass=ABCMeta):
 
         data = self._get_transaction_data(json=payload.to_dict(), **kwargs)
 
-        if remove_pending:
-            filtered = filter(
-                lambda transaction: transaction["isPending"] is False,
-                data,
-            )
-            data = list(filtered)
-
-        if not include_investment:
-            filtered = filter(
-                lambda transaction: transaction["type"] != "InvestmentTransaction",
-                data,
-            )
-            data = list(filtered)
+        if remove_pending or not include_investment:
+            data = _filter_transactions(data, remove_pending, include_investment)
+            if not kwargs.get("stream"):
+                data = list(data)
 
         return data
 
@@ -731,6 +858,66 @@ class MintEndpoints(object, metaclass=ABCMeta):
 
         return self._get_trend_data(json=payload.to_dict(), **kwargs)
 
+    """
+    Streaming variants - yield records page by page as they arrive so memory
+    stays bounded by a single page regardless of result size
+    """
+
+    def iter_account_data(self, **kwargs):
+        """
+        Generator variant of `get_account_data`
+        """
+        return self.get_account_data(stream=True, **kwargs)
+
+    def iter_bills_data(self, **kwargs):
+        """
+        Generator variant of `get_bills_data`
+        """
+        return self.get_bills_data(stream=True, **kwargs)
+
+    def iter_budget_data(self, **kwargs):
+        """
+        Generator variant of `get_budget_data`
+        """
+        return self.get_budget_data(stream=True, **kwargs)
+
+    def iter_category_data(self, **kwargs):
+        """
+        Generator variant of `get_category_data`
+        """
+        return self.get_category_data(stream=True, **kwargs)
+
+    def iter_tag_data(self, **kwargs):
+        """
+        Generator variant of `get_tag_data`
+        """
+        return self.get_tag_data(stream=True, **kwargs)
+
+    def iter_rule_data(self, **kwargs):
+        """
+        Generator variant of `get_rule_data`
+        """
+        return self.get_rule_data(stream=True, **kwargs)
+
+    def iter_investment_data(self, **kwargs):
+        """
+        Generator variant of `get_investment_data`
+        """
+        return self.get_investment_data(stream=True, **kwargs)
+
+    def iter_transaction_data(self, **kwargs):
+        """
+        Generator variant of `get_transaction_data`. The pending and
+        investment filters are applied lazily as records arrive
+        """
+        return self.get_transaction_data(stream=True, **kwargs)
+
+    def iter_trend_data(self, **kwargs):
+        """
+        Generator variant of `get_trend_data`
+        """
+        return self.get_trend_data(stream=True, **kwargs)
+
     """
     Convenience wrappers
     """
@@ -743,24 +930,7 @@ class MintEndpoints(object, metaclass=ABCMeta):
             report_type=ReportView.Options.NET_WORTH,
             date_filter=DateFilter.Options.ALL_TIME,
         )
-
-        # returns record for ASSET and DEBT for each time period. Merge and diff for actual net
-        assets = [i for i in data if i["type"] == "ASSET"]
-        debts = [i for i in data if i["type"] == "DEBT"]
-
-        asset_df = pd.DataFrame(assets)[["date", "amount"]].rename(
-            columns={"amount": "assets"}
-        )
-        debts_df = pd.DataFrame(debts)[["date", "amount"]].rename(
-            columns={"amount": "debts"}
-        )
-        # invert debts
-        debts_df["debts"] = -1 * debts_df["debts"]
-
-        merged = asset_df.merge(debts_df, how="outer", on=["date"])
-        merged["net"] = merged["assets"] + merged["debts"]
-
-        return merged.to_dict("records")
+        return _merge_net_worth(data)
 
     def get_credit_report_data(
         self,
@@ -802,55 +972,194 @@ class MintEndpoints(object, metaclass=ABCMeta):
             exclude_accounts=False,
             exclude_utilization=False,
         )
-        try:
-            vendor = report["reports"]["vendorReports"][0]
-            return vendor["creditReportList"][0]["creditScore"]
-        except (KeyError, IndexError):
-            raise Exception("No Credit Score Found")
+        return _extract_credit_score(report)
 
     def get_account_balance_history(self):
         """
-        Convenience wrapper to iterate through all accounts and get trend data
-        by account
+        Convenience wrapper to get trend data by account
+
+        Tries the per-account report views first, which return every account
+        in one call per report, and splits the results client-side. When the
+        records are not keyed by account, this client remembers it and falls
+        back to one report per account, fetched on up to `max_workers` threads
 
         Returns
         -------
         _type_
             _description_
         """
-        # Account Balance history by account
-        balances = []
         accounts = self.get_account_data()
-        for account in accounts:
-            account_id = account["id"]
-            # Try extracting as asset and debt
-            for report in (
-                ReportView.Options.ASSETS_TIME,
-                ReportView.Options.DEBTS_TIME,
-            ):
-                data = self.get_trend_data(
-                    report_type=report,
-                    date_filter=DateFilter.Options.ALL_TIME,
-                    account_ids=[account_id],
+
+        if self.batched_balance_history is not False:
+            data = []
+            for report in BATCHED_BALANCE_HISTORY_REPORTS:
+                data.extend(
+                    self.get_trend_data(
+                        report_type=report,
+                        date_filter=DateFilter.Options.ALL_TIME,
+                        account_ids=[account["id"] for account in accounts],
+                        match_all_filters=False,
+                    )
                 )
-                for d in data:
-                    d["account_id"] = account_id
-                    d["account_name"] = account["name"]
-                    account_name = account["name"]
-                    d["account_type"] = account["type"]
-                    isZillow = False
-                    if (
-                        "realEstateType" in account
-                        and account["realEstateType"] == "PRIMARY_RESIDENCE"
-                    ) and (
-                        "realEstateValueProviderType" in account
-                        and account["realEstateValueProviderType"] == "ZILLOW"
-                    ):  # Correction for Balance API's inaccurate data
-                        isZillow = True
-                    d["isZillow"] = isZillow
-
-                balances.extend(data)
-        return balances
+            balances = _split_balance_history(data, accounts)
+            if balances is not None:
+                self.batched_balance_history = True
+                return balances
+            if data:
+                self.batched_balance_history = False
+
+        LOGGER.debug("Batched balance history unavailable, requesting per account")
+
+        def account_history(task):
+            account, report = task
+            data = self.get_trend_data(
+                report_type=report,
+                date_filter=DateFilter.Options.ALL_TIME,
+                account_ids=[account["id"]],
+            )
+            return _annotate_balance_history(data, account)
+
+        tasks = [
+            (account, report)
+            for account in accounts
+            for report in BALANCE_HISTORY_REPORTS
+        ]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return [
+                record
+                for records in executor.map(account_history, tasks)
+                for record in records
+            ]
+
+
+def _keep_transaction(transaction, remove_pending: bool, include_investment: bool):
+    if remove_pending and transaction["isPending"] is not False:
+        return False
+    if not include_investment and transaction["type"] == "InvestmentTransaction":
+        return False
+    return True
+
+
+def _filter_transactions(data, remove_pending: bool, include_investment: bool):
+    """
+    Lazily drop pending and/or investment transactions from an iterable of records
+    """
+    return filter(
+        lambda transaction: _keep_transaction(
+            transaction, remove_pending, include_investment
+        ),
+        data,
+    )
+
+
+def _process_utilization(data):
+    """
+    Clean up the credit utilization history data
+    """
+    utilization = []
+    utilization.extend(_flatten_utilization(data["cumulative"]))
+    for trade in data["tradelines"]:
+        utilization.extend(_flatten_utilization(trade))
+    return utilization
+
+
+def _flatten_utilization(data):
+    """
+    The utilization history data has a nested format, grouped by year
+    and then by month. Let's flatten that into a list of dates.
+    """
+    utilization = []
+    name = data.get("creditorName", "Total")
+    for cu in data["creditUtilization"]:
+        year = cu["year"]
+        for cu_month in cu["months"]:
+            date = datetime.strptime(cu_month["name"], "%B").replace(
+                day=1, year=int(year)
+            )
+            utilization.append(
+                {
+                    "name": name,
+                    "date": date.strftime("%Y-%m-%d"),
+                    "utilization": cu_month["creditUtilization"],
+                }
+            )
+    return utilization
+
+
+def _merge_net_worth(data):
+    """
+    Net worth trend returns a record for ASSET and DEBT for each time period.
+    Merge and diff for actual net
+    """
+    # pandas is slow to import and only needed here
+    import pandas as pd
+
+    assets = [i for i in data if i["type"] == "ASSET"]
+    debts = [i for i in data if i["type"] == "DEBT"]
+
+    asset_df = pd.DataFrame(assets)[["date", "amount"]].rename(
+        columns={"amount": "assets"}
+    )
+    debts_df = pd.DataFrame(debts)[["date", "amount"]].rename(
+        columns={"amount": "debts"}
+    )
+    # invert debts
+    debts_df["debts"] = -1 * debts_df["debts"]
+
+    merged = asset_df.merge(debts_df, how="outer", on=["date"])
+    merged["net"] = merged["assets"] + merged["debts"]
+
+    return merged.to_dict("records")
+
+
+def _split_balance_history(data, accounts):
+    """
+    Split multi-account trend records into per-account balance history,
+    ordered like `accounts`. Returns None when the records are not keyed by
+    account and date, so callers can fall back to per-account requests
+    """
+    balances = {account["id"]: [] for account in accounts}
+    if not data:
+        return None
+    for record in data:
+        if "date" not in record or record.get("accountId") not in balances:
+            return None
+        balances[record["accountId"]].append(record)
+
+    return [
+        record
+        for account in accounts
+        for record in _annotate_balance_history(balances[account["id"]], account)
+    ]
+
+
+def _extract_credit_score(report):
+    try:
+        vendor = report["reports"]["vendorReports"][0]
+        return vendor["creditReportList"][0]["creditScore"]
+    except (KeyError, IndexError):
+        raise Exception("No Credit Score Found")
+
+
+def _annotate_balance_history(data, account):
+    """
+    Tag account balance trend records with the account they belong to
+    """
+    for d in data:
+        d["account_id"] = account["id"]
+        d["account_name"] = account["name"]
+        d["account_type"] = account["type"]
+        isZillow = False
+        if (
+            "realEstateType" in account
+            and account["realEstateType"] == "PRIMARY_RESIDENCE"
+        ) and (
+            "realEstateValueProviderType" in account
+            and account["realEstateValueProviderType"] == "ZILLOW"
+        ):  # Correction for Balance API's inaccurate data
+            isZillow = True
+        d["isZillow"] = isZillow
+    return data
 
 
 class _ResponseMetadata(object):
@@ -868,6 +1177,23 @@ class _ResponseMetadata(object):
             [i["rel"] == "next" for i in self.metadata["link"]]
         )
 
+    @property
+    def has_offsets(self):
+        """
+        whether the metadata carries enough information to compute the
+        remaining pages without following next links
+        """
+        try:
+            return int(self.metadata["limit"]) > 0 and "totalSize" in self.metadata
+        except (KeyError, TypeError, ValueError):
+            return False
+
+    @property
+    def remaining_offsets(self):
+        limit = int(self.metadata["limit"])
+        offset = int(self.metadata.get("offset", 0))
+        return range(offset + limit, int(self.metadata["totalSize"]), limit)
+
     @property
     def next_uri_path(self):
         link = [i for i in self.metadata["link"] if i["rel"] == "next"][0]
@@ -892,3 +1218,25 @@ class _ResponseMetadata(object):
                 new_kwargs["json"]["limit"] = params["limit"][0]
 
         return new_kwargs
+
+    def page_request(self, offset: int):
+        """
+        build the uri path and request kwargs for an arbitrary page offset,
+        following the same conventions as `next_kwargs`
+        """
+        limit = int(self.metadata["limit"])
+        next_uri = urlparse(self.next_uri_path)
+        query = parse_qs(next_uri.query)
+        query["offset"] = [str(offset)]
+        query["limit"] = [str(limit)]
+        uri_path = urlunparse(next_uri._replace(query=urlencode(query, doseq=True)))
+
+        # drop url params from propagating (href includes the full uri path already)
+        new_kwargs = {k: v for k, v in self.kwargs.items() if k != "params"}
+        if new_kwargs.get("method") == "POST" and "json" in new_kwargs:
+            # each page gets its own payload so concurrent requests don't share state
+            new_kwargs["json"] = copy.deepcopy(new_kwargs["json"])
+            new_kwargs["json"]["offset"] = offset
+            new_kwargs["json"]["limit"] = limit
+
+        return uri_path, new_kwargs
@@ -0,0 +1,168 @@
+"""
+Request and pagination metrics kept by the clients
+
+Besides the aggregate counters read at the end of a pull (`summary`, used by
+the CLI's --stats), every observation is passed to any registered hooks as a
+`(name, value, tags)` triple, which maps directly onto StatsD timers/counters
+or Prometheus histograms/counters:
+
+    def statsd_hook(name, value, tags):
+        if name.endswith("seconds"):
+            statsd.timing(f"mintapi.{name}", value * 1000, tags=tags)
+        else:
+            statsd.increment(f"mintapi.{name}", value, tags=tags)
+
+    client.metrics.add_hook(statsd_hook)
+"""
+
+import logging
+import math
+import threading
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+LOGGER = logging.getLogger(__name__)
+
+# hook(name, value, tags)
+MetricsHook = Callable[[str, float, Dict[str, str]], None]
+
+
+@dataclass
+class ClientMetrics:
+    """
+    Thread safe metrics describing the requests a client has sent
+
+    requests counts every attempt sent, retries the attempts that were
+    re-sent after a transient failure, and failures the requests that were
+    given up on. Latencies are kept per endpoint path, and pages, records
+    and decode time per data key (e.g. Transaction)
+    """
+
+    requests: int = 0
+    retries: int = 0
+    failures: int = 0
+    bytes_received: int = 0
+    request_seconds: float = 0.0
+    decode_seconds: float = 0.0
+    status_codes: Counter = field(default_factory=Counter)
+    latencies: Dict[str, List[float]] = field(default_factory=lambda: defaultdict(list))
+    pages: Counter = field(default_factory=Counter)
+    records: Counter = field(default_factory=Counter)
+    hooks: List[MetricsHook] = field(default_factory=list, repr=False, compare=False)
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, repr=False, compare=False
+    )
+
+    def add_hook(self, hook: MetricsHook):
+        """Send every later observation to `hook(name, value, tags)`."""
+        self.hooks.append(hook)
+
+    def increment(self, name: str, value: int = 1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + value)
+        self._emit(name, value, {})
+
+    def record_request(
+        self,
+        method: str,
+        url: str,
+        status: Optional[int],
+        seconds: float,
+        size: int = 0,
+    ):
+        """
+        Record one attempt. `status` is None when no response was received
+        (connection errors and timeouts)
+        """
+        endpoint = urlsplit(url).path
+        with self._lock:
+            self.bytes_received += size
+            self.request_seconds += seconds
+            self.status_codes[status] += 1
+            self.latencies[endpoint].append(seconds)
+
+        tags = {"method": method, "endpoint": endpoint, "status": str(status)}
+        self._emit("request.seconds", seconds, tags)
+        self._emit("request.bytes", size, tags)
+
+    def record_page(self, data_key: str, records: int, decode_seconds: float):
+        with self._lock:
+            self.pages[data_key] += 1
+            self.records[data_key] += records
+            self.decode_seconds += decode_seconds
+
+        tags = {"data_key": data_key}
+        self._emit("page.records", records, tags)
+        self._emit("page.decode_seconds", decode_seconds, tags)
+
+    def _emit(self, name: str, value: float, tags: Dict[str, str]):
+        for hook in self.hooks:
+            try:
+                hook(name, value, tags)
+            except Exception:
+                # metrics must never break a pull
+                LOGGER.exception(f"Metrics hook {hook!r} failed")
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "failures": self.failures,
+                "bytes_received": self.bytes_received,
+                "request_seconds": self.request_seconds,
+                "decode_seconds": self.decode_seconds,
+                "status_codes": {str(k): v for k, v in self.status_codes.items()},
+                "latencies": {k: list(v) for k, v in self.latencies.items()},
+                "pages": dict(self.pages),
+                "records": dict(self.records),
+            }
+
+    def summary(self) -> str:
+        """
+        Human readable summary of the requests sent, their latency per
+        endpoint and the pages decoded per data key
+        """
+        data = self.as_dict()
+        lines = [
+            "{requests} requests ({retries} retries, {failures} failed), "
+            "{mb:.2f} MB in {request_seconds:.2f}s, "
+            "{decode_seconds:.2f}s decoding".format(
+                mb=data["bytes_received"] / 1e6, **data
+            )
+        ]
+        if data["status_codes"]:
+            lines.append(
+                "status codes: "
+                + ", ".join(
+                    f"{k} x{v}" for k, v in sorted(data["status_codes"].items())
+                )
+            )
+
+        if data["latencies"]:
+            width = max(len("endpoint"), *(len(key) for key in data["latencies"]))
+            lines.append(f"{'endpoint':<{width}}  requests  p50 ms  p95 ms  max ms")
+            for endpoint, latencies in sorted(data["latencies"].items()):
+                lines.append(
+                    f"{endpoint:<{width}}  {len(latencies):>8}"
+                    f"  {_percentile(latencies, 50) * 1000:>6.0f}"
+                    f"  {_percentile(latencies, 95) * 1000:>6.0f}"
+                    f"  {max(latencies) * 1000:>6.0f}"
+                )
+
+        if data["pages"]:
+            width = max(len("data key"), *(len(key) for key in data["pages"]))
+            lines.append(f"{'data key':<{width}}  pages  records")
+            for data_key, pages in sorted(data["pages"].items()):
+                lines.append(
+                    f"{data_key:<{width}}  {pages:>5}  {data['records'][data_key]:>7}"
+                )
+        return "\n".join(lines)
+
+
+def _percentile(values: List[float], percent: int) -> float:
+    # nearest rank
+    ordered = sorted(values)
+    return ordered[max(math.ceil(percent / 100 * len(ordered)) - 1, 0)]
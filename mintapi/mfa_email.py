@@ -0,0 +1,595 @@
+"""
+Retrieval of the MFA code Intuit emails during the Mint sign in
+
+The mailbox is watched with IMAP IDLE, so the code is read as soon as the
+email lands; servers that don't support IDLE are polled every couple of
+seconds instead
+
+    with MFAMailbox(imap_account, imap_password, imap_server) as mailbox:
+        code = mailbox.wait_for_code()
+"""
+
+import email
+import email.header
+import email.utils
+import imaplib
+import logging
+import re
+import select
+import socket
+import ssl
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
+
+LOGGER = logging.getLogger(__name__)
+
+INTUIT_SENDER = "do_not_reply@intuit.com"
+# how long to wait for the email, as long as the old 20 polls 10 seconds apart
+DEFAULT_CODE_TIMEOUT = 200
+# emails older than this are left over from earlier sign ins
+MAX_CODE_AGE = 180
+# newest Intuit emails checked for the code
+RECENT_MESSAGES = 3
+# only what's needed to recognise the MFA email, a few hundred bytes each
+HEADER_FIELDS = "(BODY.PEEK[HEADER.FIELDS (FROM TO SUBJECT DATE MESSAGE-ID)])"
+IMAP_MONTHS = (
+    "Jan",
+    "Feb",
+    "Mar",
+    "Apr",
+    "May",
+    "Jun",
+    "Jul",
+    "Aug",
+    "Sep",
+    "Oct",
+    "Nov",
+    "Dec",
+)
+# interval between checks on servers without IDLE
+POLL_INTERVAL = 2
+# servers drop clients idling for 30 minutes, so IDLE is re-issued well before
+IDLE_TIMEOUT = 5 * 60
+# time allowed for the server to answer an IDLE or DONE
+IDLE_RESPONSE_TIMEOUT = 30
+# Intuit emails checked per pass by MFAMailboxWatcher, which can have many
+# sign ins waiting
+WATCHER_RECENT_MESSAGES = 50
+# allowed difference between our clock and the Date on Intuit's emails
+MAX_CLOCK_SKEW = 30
+# seconds between attempts to reconnect a dropped watcher connection
+RECONNECT_DELAY = 5
+
+SUBJECT_CODE_PATTERN = re.compile(r"(\d\d\d\d\d\d) Mint code")
+SUBJECT_PATTERN = re.compile("Your Mint (code|Account)", re.IGNORECASE)
+BODY_CODE_PATTERN = re.compile(r"Verification code:<.*?(\d\d\d\d\d\d)\b", re.S | re.M)
+IDLE_CHANGE_PATTERN = re.compile(rb"\* \d+ (EXISTS|RECENT)", re.IGNORECASE)
+
+
+class MFAMailbox(object):
+    """
+    IMAP connection to the mailbox receiving the Mint MFA emails
+
+    `wait_for_code` checks the newest messages for a fresh code, then waits
+    for the mailbox to change (IDLE, or a short poll without it) and checks
+    again until the code arrives or the timeout expires
+    """
+
+    def __init__(
+        self,
+        imap_account: str,
+        imap_password: str,
+        imap_server: str,
+        imap_folder: str = "INBOX",
+        poll_interval: float = POLL_INTERVAL,
+    ):
+        self.imap_account = imap_account
+        self.imap_password = imap_password
+        self.imap_server = imap_server
+        self.imap_folder = imap_folder
+        self.poll_interval = poll_interval
+        self.imap_client = None
+        self.idle_supported = False
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def open(self):
+        try:
+            self.imap_client = imaplib.IMAP4_SSL(self.imap_server)
+        except (imaplib.IMAP4.error, OSError):
+            raise RuntimeError("Unable to establish IMAP Client")
+
+        try:
+            self.imap_client.login(self.imap_account, self.imap_password)
+        except imaplib.IMAP4.error:
+            raise RuntimeError("Unable to login to IMAP Email")
+
+        # servers commonly only advertise IDLE once logged in
+        rv, data = self.imap_client.capability()
+        capabilities = data[0].upper().split() if rv == "OK" and data[0] else []
+        self.idle_supported = b"IDLE" in capabilities
+
+        rv, data = self.imap_client.select(self.imap_folder)
+        if rv != "OK":
+            raise RuntimeError("Unable to open mailbox: " + rv)
+
+    def close(self):
+        if self.imap_client is None:
+            return
+        try:
+            self.imap_client.logout()
+        except (imaplib.IMAP4.error, OSError):
+            pass
+        self.imap_client = None
+
+    def wait_for_code(
+        self, timeout: float = DEFAULT_CODE_TIMEOUT, delete: bool = True
+    ) -> Optional[str]:
+        """
+        Returns the code from the Mint MFA email, or None if none arrived
+        within `timeout` seconds. The email is deleted once read if `delete`
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            code = self.find_code(delete=delete)
+            if code is not None:
+                return code
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                LOGGER.info("No Mint MFA email received")
+                return None
+            self.wait_for_changes(min(remaining, IDLE_TIMEOUT))
+
+    def find_code(self, delete: bool = True) -> Optional[str]:
+        """
+        Checks the newest emails from Intuit for a fresh Mint MFA code
+
+        The server filters the mailbox down to recent Intuit emails, whose
+        headers are fetched first; a body is only downloaded for a Mint MFA
+        email without the code in its subject
+        """
+        for num, headers, code in self.mfa_emails():
+            code = code or self.fetch_code(num)
+            if code is None:
+                continue
+            LOGGER.debug("Found Mint MFA code in message {}".format(num))
+            if delete:
+                self.delete([num])
+            return code
+        return None
+
+    def mfa_emails(self, limit: int = RECENT_MESSAGES):
+        """
+        Yields (message number, headers, code from the subject or None) for
+        each fresh Mint MFA email among the newest `limit` emails from
+        Intuit, newest first
+        """
+        rv, data = self.imap_client.search(None, *search_criteria())
+        if rv != "OK":
+            raise RuntimeError("Unable to search the Email folder: " + rv)
+        candidates = data[0].split()[::-1][:limit]
+        if not candidates:
+            return
+
+        rv, data = self.imap_client.fetch(b",".join(candidates), HEADER_FIELDS)
+        if rv != "OK":
+            raise RuntimeError("Unable to complete due to error message: " + rv)
+        headers = {
+            item[0].split()[0]: email.message_from_bytes(item[1])
+            for item in data
+            if isinstance(item, tuple)
+        }
+
+        for num in candidates:
+            if num not in headers:
+                continue
+            matched, code = match_mfa_email(headers[num])
+            if matched:
+                yield num, headers[num], code
+
+    def fetch_code(self, num: bytes) -> Optional[str]:
+        """Downloads MFA email `num` and returns the code in its body."""
+        rv, data = self.imap_client.fetch(num, "(BODY.PEEK[])")
+        if rv != "OK":
+            raise RuntimeError("Unable to complete due to error message: " + rv)
+        return code_from_body(email.message_from_bytes(data[0][1]))
+
+    def delete(self, nums: List[bytes]):
+        self.imap_client.store(b",".join(nums), "+FLAGS", "\\Deleted")
+        self.imap_client.expunge()
+
+    def wait_for_changes(self, timeout: float, interrupt=None) -> bool:
+        """
+        Blocks until new messages may have arrived, `timeout` seconds passed
+        or the `interrupt` socket became readable. Returns False if the
+        mailbox is known not to have changed
+        """
+        if self.idle_supported:
+            try:
+                return self._idle(timeout, interrupt)
+            except imaplib.IMAP4.abort:
+                raise
+            except imaplib.IMAP4.error as e:
+                LOGGER.info("IMAP IDLE failed, polling instead: {}".format(e))
+                self.idle_supported = False
+
+        timeout = min(self.poll_interval, timeout)
+        if interrupt is None:
+            time.sleep(timeout)
+        else:
+            select.select([interrupt], [], [], timeout)
+        # lets the server report new messages before the next search
+        self.imap_client.noop()
+        return True
+
+    def _idle(self, timeout: float, interrupt=None) -> bool:
+        # imaplib has no IDLE before python 3.14, so the command is sent by
+        # hand and its responses are read with a timeout by `_LineReader`
+        imap_client = self.imap_client
+        tag = imap_client._new_tag()
+        imap_client.tagged_commands.pop(tag, None)
+        imap_client.send(tag + b" IDLE\r\n")
+        reader = _LineReader(imap_client)
+
+        changed = False
+        while True:
+            line = reader.readline(IDLE_RESPONSE_TIMEOUT)
+            if line is None:
+                raise imaplib.IMAP4.abort("No response to IDLE")
+            if line.startswith(b"+"):
+                break
+            if not line.startswith(b"*"):
+                raise imaplib.IMAP4.error("IDLE refused: {!r}".format(line))
+            # untagged responses can arrive ahead of the continuation
+            changed = changed or bool(IDLE_CHANGE_PATTERN.match(line))
+        if changed:
+            timeout = 0
+
+        deadline = time.monotonic() + timeout
+        while True:
+            line = reader.readline(deadline - time.monotonic(), interrupt)
+            if line is None:
+                break
+            if line.startswith(b"* BYE"):
+                raise imaplib.IMAP4.abort(line.decode(errors="replace"))
+            if IDLE_CHANGE_PATTERN.match(line):
+                changed = True
+                break
+
+        imap_client.send(b"DONE\r\n")
+        while True:
+            line = reader.readline(IDLE_RESPONSE_TIMEOUT)
+            if line is None:
+                raise imaplib.IMAP4.abort("No response to IDLE DONE")
+            if line.startswith(tag + b" "):
+                break
+            changed = changed or bool(IDLE_CHANGE_PATTERN.match(line))
+        if not line[len(tag) + 1 :].upper().startswith(b"OK"):
+            raise imaplib.IMAP4.error("IDLE failed: {!r}".format(line))
+        return changed
+
+
+@dataclass
+class _PendingLogin:
+    recipient: Optional[str]
+    since: float
+    code: Optional[str] = None
+    event: threading.Event = field(default_factory=threading.Event)
+
+
+class MFAMailboxWatcher(object):
+    """
+    One IMAP connection shared by every sign in waiting on an MFA email in
+    the same mailbox, e.g. a batch of Mint logins whose codes are all sent
+    to one address (or aliases of it)
+
+    Each `wait_for_code` call registers a pending login. A background thread
+    keeps the mailbox open, waits on it with IDLE and hands every fresh Mint
+    MFA email to a pending login, oldest email first:
+
+    - logins waiting on a `recipient` get the emails sent to that address
+    - other logins get the emails not sent to a pending recipient, in the
+      order they started waiting
+
+    Either way, emails sent before the login started waiting are skipped
+
+        with MFAMailboxWatcher(imap_account, imap_password, imap_server) as watcher:
+            mint = Mint(email, password, imap_watcher=watcher, ...)
+    """
+
+    def __init__(
+        self,
+        imap_account: str,
+        imap_password: str,
+        imap_server: str,
+        imap_folder: str = "INBOX",
+        poll_interval: float = POLL_INTERVAL,
+        delete: bool = True,
+    ):
+        self.mailbox = MFAMailbox(
+            imap_account, imap_password, imap_server, imap_folder, poll_interval
+        )
+        self.delete = delete
+        self._pending: List[_PendingLogin] = []
+        # emails already handed out, by Message-ID
+        self._claimed = set()
+        self._lock = threading.Lock()
+        # written to by waiting logins to cut the watcher's IDLE short
+        self._wakeup, self._waker = socket.socketpair()
+        self._wakeup.setblocking(False)
+        self._thread = None
+        self._closed = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def start(self):
+        """Connects and starts watching; `wait_for_code` starts it as needed."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("MFAMailboxWatcher is closed")
+            if self._thread is not None:
+                return
+            self.mailbox.open()
+            self._thread = threading.Thread(
+                target=self._run, name="mintapi-mfa-watcher", daemon=True
+            )
+            self._thread.start()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            thread, self._thread = self._thread, None
+        self._wake()
+        if thread is not None:
+            thread.join()
+        self.mailbox.close()
+        self._wakeup.close()
+        self._waker.close()
+
+    def wait_for_code(
+        self,
+        recipient: Optional[str] = None,
+        since: Optional[float] = None,
+        timeout: float = DEFAULT_CODE_TIMEOUT,
+    ) -> Optional[str]:
+        """
+        Waits for the MFA email of one sign in and returns its code, or None
+        if it didn't arrive within `timeout` seconds
+
+        recipient is the address the email is sent to (the Mint login's
+        email), and since the time the sign in asked for the code, now by
+        default
+        """
+        self.start()
+        login = _PendingLogin(
+            recipient.lower() if recipient else None,
+            time.time() if since is None else since,
+        )
+        with self._lock:
+            self._pending.append(login)
+        self._wake()
+
+        if not login.event.wait(timeout):
+            LOGGER.info("No Mint MFA email received")
+        with self._lock:
+            self._pending.remove(login)
+            return login.code
+
+    def _wake(self):
+        try:
+            self._waker.send(b"\0")
+        except OSError:
+            pass
+
+    def _run(self):
+        while not self._closed:
+            try:
+                self._drain_wakeups()
+                with self._lock:
+                    waiting = bool(self._pending)
+                if waiting:
+                    self._dispatch()
+                self.mailbox.wait_for_changes(IDLE_TIMEOUT, interrupt=self._wakeup)
+            except (imaplib.IMAP4.error, OSError, RuntimeError) as e:
+                if self._closed:
+                    break
+                LOGGER.warning("MFA mailbox connection failed: {}".format(e))
+                self._reconnect()
+
+    def _drain_wakeups(self):
+        try:
+            while self._wakeup.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def _reconnect(self):
+        while not self._closed:
+            self.mailbox.close()
+            select.select([self._wakeup], [], [], RECONNECT_DELAY)
+            if self._closed:
+                return
+            try:
+                self.mailbox.open()
+                return
+            except RuntimeError as e:
+                LOGGER.warning("Unable to reconnect to the MFA mailbox: {}".format(e))
+
+    def _dispatch(self):
+        claimed = []
+        # oldest first, so logins waiting in turn get their emails in turn
+        emails = list(self.mailbox.mfa_emails(limit=WATCHER_RECENT_MESSAGES))
+        for num, headers, code in reversed(emails):
+            key = headers["Message-ID"] or (headers["Date"], headers["Subject"])
+            if key in self._claimed:
+                continue
+            login = self._login_for(headers)
+            if login is None:
+                continue
+
+            code = code or self.mailbox.fetch_code(num)
+            if code is None:
+                self._claimed.add(key)
+                continue
+            with self._lock:
+                # the login may have timed out since it was matched, in which
+                # case the email is left for the next one
+                handed_off = login in self._pending and login.code is None
+                if handed_off:
+                    login.code = code
+                    login.event.set()
+            if handed_off:
+                self._claimed.add(key)
+                claimed.append(num)
+
+        if claimed and self.delete:
+            self.mailbox.delete(claimed)
+
+    def _login_for(self, headers) -> Optional[_PendingLogin]:
+        recipients = {
+            address.lower()
+            for _, address in email.utils.getaddresses(headers.get_all("To", []))
+        }
+        sent = email.utils.mktime_tz(email.utils.parsedate_tz(headers["Date"]))
+        with self._lock:
+            waiting = [
+                login
+                for login in self._pending
+                if login.code is None and login.since - MAX_CLOCK_SKEW <= sent
+            ]
+            pending_recipients = {login.recipient for login in self._pending}
+        for login in waiting:
+            if login.recipient is not None and login.recipient in recipients:
+                return login
+        if recipients & pending_recipients:
+            return None
+        for login in waiting:
+            if login.recipient is None:
+                return login
+        return None
+
+
+class _LineReader(object):
+    """
+    Reads CRLF terminated lines of an imaplib connection with a timeout per
+    line. Lines are read through imaplib's buffered file, which can already
+    hold responses that arrived along with the last one imaplib read, and
+    the socket is only waited on once that buffer is empty
+    """
+
+    def __init__(self, imap_client):
+        self.imap_client = imap_client
+
+    def readline(self, timeout: float, interrupt=None) -> Optional[bytes]:
+        """
+        Returns the next line without its CRLF, or None on timeout or once
+        the `interrupt` socket is readable
+        """
+        sock = self.imap_client.sock
+        # ssl sockets can hold decrypted bytes select doesn't know about
+        pending = getattr(sock, "pending", None)
+        if not (self._buffered() or (pending and pending())):
+            if timeout <= 0:
+                return None
+            sockets = [sock] if interrupt is None else [sock, interrupt]
+            readable, _, _ = select.select(sockets, [], [], timeout)
+            if sock not in readable:
+                return None
+        line = self.imap_client.readline()
+        if not line:
+            raise imaplib.IMAP4.abort("IMAP connection closed")
+        return line.rstrip(b"\r\n")
+
+    def _buffered(self) -> bool:
+        # peeking reads nothing from the socket while bytes are buffered, and
+        # otherwise only what has already arrived, as the socket won't block
+        sock = self.imap_client.sock
+        timeout = sock.gettimeout()
+        sock.setblocking(False)
+        try:
+            return bool(self.imap_client.file.peek(1))
+        except (BlockingIOError, ssl.SSLWantReadError):
+            return False
+        finally:
+            sock.settimeout(timeout)
+
+
+def search_criteria(today: Optional[date] = None) -> List[str]:
+    """
+    IMAP SEARCH criteria matching the Intuit emails of the last day. Servers
+    compare SINCE against dates in their own timezone, so it is set a day
+    back to not miss an email sent around midnight
+    """
+    since = (today or date.today()) - timedelta(days=1)
+    return [
+        "FROM",
+        '"{}"'.format(INTUIT_SENDER),
+        "SINCE",
+        "{}-{}-{}".format(since.day, IMAP_MONTHS[since.month - 1], since.year),
+    ]
+
+
+def match_mfa_email(msg, max_age: float = MAX_CODE_AGE) -> Tuple[bool, Optional[str]]:
+    """
+    Checks the headers of `msg`, returning whether it is a Mint MFA email no
+    older than `max_age` seconds, and the code if it is in the subject
+    """
+    frm = str(email.header.make_header(email.header.decode_header(msg["From"])))
+    if not re.search(INTUIT_SENDER, frm, re.IGNORECASE):
+        return False, None
+
+    subject = str(email.header.make_header(email.header.decode_header(msg["Subject"])))
+    match = SUBJECT_CODE_PATTERN.search(subject)
+    if match is None and not SUBJECT_PATTERN.search(subject):
+        return False, None
+
+    date_tuple = email.utils.parsedate_tz(msg["Date"])
+    if date_tuple is None:
+        LOGGER.error("Mint MFA email has no date")
+        return False, None
+    sent = datetime.fromtimestamp(email.utils.mktime_tz(date_tuple))
+    if (datetime.now() - sent).total_seconds() > max_age:
+        return False, None
+
+    return True, match.group(1) if match else None
+
+
+def code_from_body(msg) -> Optional[str]:
+    for part in msg.walk():
+        if part.is_multipart():
+            continue
+        body = part.get_payload(decode=True).decode(errors="replace")
+        match = BODY_CODE_PATTERN.search(body)
+        if match:
+            return match.group(1)
+    LOGGER.error("No code found in the Mint MFA email")
+    return None
+
+
+def get_email_code(
+    imap_account,
+    imap_password,
+    imap_server,
+    imap_folder="INBOX",
+    delete=True,
+    timeout=DEFAULT_CODE_TIMEOUT,
+):
+    """
+    Waits for the Mint MFA email and returns its code, or None if it didn't
+    arrive within `timeout` seconds
+    """
+    with MFAMailbox(imap_account, imap_password, imap_server, imap_folder) as mailbox:
+        return mailbox.wait_for_code(timeout=timeout, delete=delete)
@@ -0,0 +1,139 @@
+"""
+Per-phase timing of the selenium sign in flow
+
+    profile = SignInProfile()
+    sign_in(email, password, driver, profile=profile)
+    print(profile.report())
+
+Element lookups made through the profiled driver are timed too, so time
+burnt by implicit waits that end without finding anything (the dead waits
+that dominate a slow login) is reported separately from useful work
+"""
+
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+
+@dataclass
+class PhaseTiming:
+    """
+    One run of a sign in phase
+
+    failed_lookups counts the element lookups that raised (usually after
+    waiting out the implicit wait), and failed_lookup_seconds the time they
+    took
+    """
+
+    name: str
+    seconds: float = 0.0
+    lookups: int = 0
+    lookup_seconds: float = 0.0
+    failed_lookups: int = 0
+    failed_lookup_seconds: float = 0.0
+    error: Optional[str] = None
+
+
+class SignInProfile(object):
+    """
+    Collects a `PhaseTiming` for every phase of a sign in, in order. Phases
+    that run more than once (e.g. another round of MFA) are recorded each time
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self.clock = clock
+        self.phases: List[PhaseTiming] = []
+        self._current: Optional[PhaseTiming] = None
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(phase.seconds for phase in self.phases)
+
+    @contextmanager
+    def phase(self, name: str):
+        timing = PhaseTiming(name)
+        # phases don't nest; an inner phase takes over lookups until it ends
+        outer, self._current = self._current, timing
+        start = self.clock()
+        try:
+            yield timing
+        except BaseException as e:
+            timing.error = type(e).__name__
+            raise
+        finally:
+            timing.seconds = self.clock() - start
+            self.phases.append(timing)
+            self._current = outer
+
+    def record_lookup(self, seconds: float, found: bool):
+        timing = self._current
+        if timing is None:
+            return
+        timing.lookups += 1
+        timing.lookup_seconds += seconds
+        if not found:
+            timing.failed_lookups += 1
+            timing.failed_lookup_seconds += seconds
+
+    def wrap(self, driver) -> "TimedDriver":
+        """Returns `driver` with its element lookups timed into this profile."""
+        if isinstance(driver, TimedDriver):
+            return driver
+        return TimedDriver(driver, self)
+
+    def as_dict(self) -> Dict:
+        return {
+            "total_seconds": self.total_seconds,
+            "phases": [vars(phase).copy() for phase in self.phases],
+        }
+
+    def report(self) -> str:
+        width = max([len("phase"), *(len(phase.name) for phase in self.phases)])
+        lines = [
+            f"{'phase':<{width}}  seconds  lookups  failed  failed seconds",
+        ]
+        for phase in self.phases:
+            lines.append(
+                f"{phase.name:<{width}}  {phase.seconds:>7.2f}  {phase.lookups:>7}"
+                f"  {phase.failed_lookups:>6}  {phase.failed_lookup_seconds:>14.2f}"
+                + (f"  ({phase.error})" if phase.error else "")
+            )
+        failed = sum(phase.failed_lookup_seconds for phase in self.phases)
+        lines.append(
+            f"{'total':<{width}}  {self.total_seconds:>7.2f}"
+            f"  ({failed:.2f}s in lookups that found nothing)"
+        )
+        return "\n".join(lines)
+
+
+class TimedDriver(object):
+    """
+    Proxy around a selenium web driver timing `find_element(s)` calls into
+    a `SignInProfile`. Everything else is passed straight through
+    """
+
+    def __init__(self, driver, profile: SignInProfile):
+        self._driver = driver
+        self._profile = profile
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+    def find_element(self, *args, **kwargs):
+        return self._timed(self._driver.find_element, args, kwargs)
+
+    def find_elements(self, *args, **kwargs):
+        return self._timed(self._driver.find_elements, args, kwargs)
+
+    def _timed(self, lookup, args, kwargs):
+        clock = self._profile.clock
+        start = clock()
+        try:
+            result = lookup(*args, **kwargs)
+        except Exception:
+            self._profile.record_lookup(clock() - start, found=False)
+            raise
+        # find_elements waits out the implicit wait when nothing matches
+        self._profile.record_lookup(clock() - start, found=result != [])
+        return result
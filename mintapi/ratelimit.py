@@ -0,0 +1,167 @@
+"""
+Client side request pacing
+
+Token buckets per host keep sustained request rates under Mint's throttling
+thresholds. The file backed bucket keeps its state in a locked file, so any
+number of threads and worker processes on one machine share one budget
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - windows
+    fcntl = None
+
+LOGGER = logging.getLogger(__name__)
+
+
+class TokenBucket(object):
+    """
+    Thread safe token bucket refilling at `rate` tokens per second up to
+    `capacity`
+
+    Tokens are reserved rather than waited for: the balance may go negative,
+    and each caller is told how long to wait for its own token, so
+    concurrent callers are served in arrival order without busy polling
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None, clock=None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1.0)
+        self.clock = clock or time.monotonic
+        self.tokens = self.capacity
+        self.updated = self.clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1) -> float:
+        """
+        Take `tokens` and return the seconds to wait before using them
+        """
+        with self._lock:
+            self.tokens, self.updated, delay = _take(
+                self.tokens,
+                self.updated,
+                self.clock(),
+                self.rate,
+                self.capacity,
+                tokens,
+            )
+        return delay
+
+
+class FileTokenBucket(object):
+    """
+    Token bucket whose state lives in `path`, guarded by an exclusive
+    `flock`, so every process using the same path draws from one budget
+
+    Uses wall clock time, since monotonic clocks aren't comparable across
+    processes
+    """
+
+    def __init__(self, path: str, rate: float, capacity: Optional[float] = None):
+        if fcntl is None:
+            raise RuntimeError("FileTokenBucket requires fcntl (POSIX only)")
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.path = path
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1.0)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def reserve(self, tokens: float = 1) -> float:
+        """
+        Take `tokens` and return the seconds to wait before using them
+        """
+        # each call opens its own file description, so flock also
+        # serializes threads within this process
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            now = time.time()
+            try:
+                state = json.loads(os.read(fd, 1024) or b"null")
+                balance, updated = state["tokens"], state["updated"]
+            except (ValueError, TypeError, KeyError):
+                balance, updated = self.capacity, now
+
+            balance, updated, delay = _take(
+                balance, updated, now, self.rate, self.capacity, tokens
+            )
+
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.ftruncate(fd, 0)
+            os.write(fd, json.dumps({"tokens": balance, "updated": updated}).encode())
+        finally:
+            # closing releases the lock
+            os.close(fd)
+        return delay
+
+
+def _take(balance, updated, now, rate, capacity, tokens):
+    balance = min(capacity, balance + max(now - updated, 0) * rate) - tokens
+    delay = 0.0 if balance >= 0 else -balance / rate
+    return balance, now, delay
+
+
+class RateLimiter(object):
+    """
+    Paces requests with one token bucket per host
+
+    Parameters
+    ----------
+    rates : Dict[str, float]
+        requests per second, keyed by url (e.g. `MINT_ROOT_URL`,
+        `MINT_CREDIT_URL`). requests to other hosts are not limited
+    burst : Optional[float], optional
+        requests allowed back to back after an idle period, by default one
+        second's worth of each host's rate
+    shared_dir : Optional[str], optional
+        directory for file backed buckets shared by every process pointed at
+        it, by default buckets are private to this process
+    """
+
+    def __init__(
+        self,
+        rates: Dict[str, float],
+        burst: Optional[float] = None,
+        shared_dir: Optional[str] = None,
+    ):
+        self.buckets = {}
+        for url, rate in rates.items():
+            host = _host(url)
+            if shared_dir is None:
+                self.buckets[host] = TokenBucket(rate, burst)
+            else:
+                self.buckets[host] = FileTokenBucket(
+                    os.path.join(shared_dir, f"{host}.bucket"), rate, burst
+                )
+
+    def reserve(self, url: str) -> float:
+        """
+        Take a token for the host of `url` and return the seconds to wait
+        before sending the request
+        """
+        bucket = self.buckets.get(_host(url))
+        return bucket.reserve() if bucket is not None else 0.0
+
+    def wait(self, url: str):
+        """
+        Block until a request to `url` may be sent
+        """
+        delay = self.reserve(url)
+        if delay > 0:
+            LOGGER.debug(f"Rate limited, waiting {delay:.2f}s for {url}")
+            time.sleep(delay)
+
+
+def _host(url: str) -> str:
+    return urlparse(url).netloc or url
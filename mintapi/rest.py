@@ -3,14 +3,26 @@ Module for REST based API
 """
 
 import logging
-from typing import Dict, List, Optional, Union
+import time
+from typing import Dict, List, Optional, Tuple, Union
 
-from requests import Session
+from requests import ConnectionError, RequestException, Session, Timeout
+from requests.adapters import HTTPAdapter
 
+from mintapi.cache import ResponseCache
+from mintapi.constants import MINT_CREDIT_URL, MINT_ROOT_URL
 from mintapi.endpoints import MintEndpoints
+from mintapi.metrics import ClientMetrics
+from mintapi.ratelimit import RateLimiter
+from mintapi.retry import RetryPolicy
 
 LOGGER = logging.getLogger(__name__)
 
+# kept-alive connections per host, raised to `max_workers` when that is larger
+DEFAULT_POOL_MAXSIZE = 10
+# (connect, read) seconds; Mint can take a while to build large search pages
+DEFAULT_TIMEOUT = (10.0, 60.0)
+
 
 class RESTClient(MintEndpoints):
     """
@@ -28,9 +40,23 @@ class RESTClient(MintEndpoints):
         self,
         api_key: Optional[str] = None,
         cookies: Optional[Union[str, List[Dict]]] = None,
+        max_workers: int = 1,
+        retry_policy: Optional[RetryPolicy] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        response_cache: Optional[ResponseCache] = None,
+        pool_maxsize: Optional[int] = None,
+        timeout: Optional[Union[float, Tuple[float, float]]] = DEFAULT_TIMEOUT,
         **kwargs,
     ):
         self.session = Session()
+        self.max_workers = max_workers
+        self.pool_maxsize = pool_maxsize or max(DEFAULT_POOL_MAXSIZE, max_workers)
+        self.timeout = timeout
+        self._mount_adapters()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.rate_limiter = rate_limiter
+        self.response_cache = response_cache
+        self.metrics = ClientMetrics()
 
         if api_key or cookies:
             self.authorize(api_key=api_key, cookies=cookies)
@@ -59,6 +85,47 @@ class RESTClient(MintEndpoints):
             }
         )
 
+    def clear_auth(self):
+        """
+        Drop the api key and cookies set by `authorize`, e.g. once they are
+        found to be stale, so the next `authorize` starts from a clean session
+        """
+        self.session.headers.pop("authorization", None)
+        self.session.headers.pop("cookie", None)
+        self.session.cookies.clear()
+
+    def _mount_adapters(self):
+        """
+        One keep-alive pool per Mint host, sized so every pagination worker
+        holds its own connection instead of opening (and discarding) extras
+        """
+        for host in (MINT_ROOT_URL, MINT_CREDIT_URL):
+            self.session.mount(
+                host,
+                HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize),
+            )
+
+    def close(self):
+        """Closes the underlying connection pool."""
+        self.session.close()
+
+    def is_authorized(self) -> bool:
+        """
+        Cheap probe (a single account record) to check the configured auth
+        is still accepted by Mint
+
+        Returns
+        -------
+        bool
+            whether the probe request succeeded
+        """
+        try:
+            self.get_account_data(limit=1, paginate=False)
+        except RequestException as e:
+            LOGGER.info(f"Auth probe failed: {e}")
+            return False
+        return True
+
     def update_cookies(self, cookies: List[Dict]):
         """
         _summary_
@@ -90,6 +157,7 @@ class RESTClient(MintEndpoints):
         data_key: str,
         metadata_key: str,
         paginate=True,
+        stream=False,
         **kwargs,
     ):
         """
@@ -109,6 +177,8 @@ class RESTClient(MintEndpoints):
             _description_
         paginate : bool, optional
             _description_, by default True
+        stream : bool, optional
+            yield paginated records lazily instead of returning a list, by default False
 
         Returns
         -------
@@ -117,11 +187,11 @@ class RESTClient(MintEndpoints):
         """
         url = f"{api_url}{api_section}{uri_path}"
 
-        response = self.session.request(method=method, url=url, **kwargs)
-        response.raise_for_status()
+        response = self._send(method=method, url=url, **kwargs)
 
         if paginate:
-            return self._paginate(
+            paginator = self._iter_paginate if stream else self._paginate
+            return paginator(
                 api_url=api_url,
                 api_section=api_section,
                 method=method,
@@ -132,3 +202,51 @@ class RESTClient(MintEndpoints):
             )
         else:
             return response
+
+    def _send(self, method: str, url: str, **kwargs):
+        """
+        Send a single request, retrying transient failures per `retry_policy`
+        """
+        policy = self.retry_policy
+        attempt = 0
+        while True:
+            attempt += 1
+            self._throttle(url)
+            self.metrics.increment("requests")
+            start = time.perf_counter()
+            try:
+                response = self.session.request(
+                    method=method, url=url, **{"timeout": self.timeout, **kwargs}
+                )
+            except (ConnectionError, Timeout) as e:
+                self.metrics.record_request(
+                    method, url, None, time.perf_counter() - start
+                )
+                if not policy.should_retry(attempt):
+                    self.metrics.increment("failures")
+                    raise
+                delay = policy.backoff(attempt)
+                LOGGER.info(f"{method} {url} failed ({e}), retrying in {delay:.1f}s")
+            else:
+                self.metrics.record_request(
+                    method,
+                    url,
+                    response.status_code,
+                    time.perf_counter() - start,
+                    len(response.content),
+                )
+                if response.ok or not policy.should_retry(
+                    attempt, response.status_code
+                ):
+                    if not response.ok:
+                        self.metrics.increment("failures")
+                    response.raise_for_status()
+                    return response
+                delay = policy.backoff(attempt, response.headers.get("Retry-After"))
+                LOGGER.info(
+                    f"{method} {url} returned {response.status_code}, retrying in {delay:.1f}s"
+                )
+                response.close()
+
+            self.metrics.increment("retries")
+            time.sleep(delay)
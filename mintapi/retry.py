@@ -0,0 +1,86 @@
+"""
+Retry policy for transient REST failures
+"""
+
+import random
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional, Tuple
+
+# throttling plus the gateway errors Intuit returns under load
+DEFAULT_RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+@dataclass
+class RetryPolicy:
+    """
+    When and how long to wait before re-sending a failed request
+
+    Requests are retried individually, so a failure on one page of a
+    paginated pull only re-fetches that page
+
+    Parameters
+    ----------
+    max_attempts : int
+        total attempts per request, including the first. 1 disables retries
+    status_codes : Tuple[int, ...]
+        response statuses that are retried
+    backoff_factor : float
+        seconds before the first retry, doubling on each later attempt
+    max_backoff : float
+        upper bound on any single wait, including server supplied Retry-After
+    jitter : float
+        fraction (0-1) of each backoff that is randomized, so concurrent
+        clients don't retry in lockstep
+    retry_connection_errors : bool
+        also retry requests that failed before a response was received
+    """
+
+    max_attempts: int = 5
+    status_codes: Tuple[int, ...] = DEFAULT_RETRY_STATUS_CODES
+    backoff_factor: float = 0.5
+    max_backoff: float = 60.0
+    jitter: float = 0.5
+    retry_connection_errors: bool = True
+
+    def should_retry(self, attempt: int, status_code: Optional[int] = None) -> bool:
+        """
+        Whether attempt number `attempt` (1-based) should be followed by
+        another. A `status_code` of None means no response was received
+        """
+        if attempt >= self.max_attempts:
+            return False
+        if status_code is None:
+            return self.retry_connection_errors
+        return status_code in self.status_codes
+
+    def backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """
+        Seconds to wait after attempt number `attempt` (1-based). A valid
+        Retry-After header value takes precedence over the computed backoff
+        """
+        delay = parse_retry_after(retry_after)
+        if delay is None:
+            delay = self.backoff_factor * 2 ** (attempt - 1)
+            delay *= 1 - self.jitter * random.random()
+        return min(max(delay, 0.0), self.max_backoff)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header, given either in seconds or as an HTTP date
+    """
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return (retry_at - datetime.now(timezone.utc)).total_seconds()
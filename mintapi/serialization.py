@@ -0,0 +1,71 @@
+"""
+JSON encoding and decoding, using orjson when it is installed
+
+Transaction search pages are multi-megabyte documents, so decoding them (and
+indenting the CLI's json output, which the stdlib does in pure Python) is a
+measurable share of a pull. Everything falls back to the stdlib `json`
+module when orjson is unavailable or can't represent a value
+"""
+
+import json
+import logging
+from typing import Any, Iterable, Optional, TextIO, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+LOGGER = logging.getLogger(__name__)
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def decode_response(response, keys: Optional[Iterable[Optional[str]]] = None):
+    """
+    Decode the JSON body of a requests or httpx response
+
+    Parameters
+    ----------
+    response : requests.Response or httpx.Response
+        response with a JSON body
+    keys : Optional[Iterable[Optional[str]]], optional
+        top level keys to keep (None entries are ignored). the rest of the
+        document is released straight away rather than held for the lifetime
+        of the page, by default everything is kept
+
+    Returns
+    -------
+    Any
+        the decoded document
+    """
+    data = loads(response.content)
+    if keys is None or not isinstance(data, dict):
+        return data
+    return {key: data[key] for key in keys if key is not None and key in data}
+
+
+def dumps(obj: Any, indent: Optional[int] = None) -> str:
+    """
+    Serialize `obj` to a JSON string. orjson only indents by 2 spaces, so
+    other indents use the stdlib
+    """
+    if orjson is not None and indent in (None, 2):
+        option = orjson.OPT_INDENT_2 if indent else 0
+        try:
+            return orjson.dumps(obj, option=option).decode()
+        except TypeError:
+            # e.g. integers beyond 64 bits or non-string keys
+            LOGGER.debug("orjson could not encode value, using json")
+    # match orjson's compact separators and raw utf-8, so output doesn't
+    # depend on the backend
+    separators = (",", ":") if indent is None else None
+    return json.dumps(obj, indent=indent, separators=separators, ensure_ascii=False)
+
+
+def dump(obj: Any, stream: TextIO, indent: Optional[int] = None):
+    stream.write(dumps(obj, indent=indent))
@@ -1,13 +1,8 @@
 import os
-from datetime import datetime
 from mintapi import constants, exceptions
-import email
-import email.header
-import imaplib
 import logging
-import re
 import sys
-import time
+from contextlib import nullcontext
 
 from selenium.common.exceptions import (
     ElementNotInteractableException,
@@ -79,103 +74,11 @@ STANDARD_MISSING_EXCEPTIONS = (
 
 
 def get_email_code(imap_account, imap_password, imap_server, imap_folder, delete=True):
-    code = None
-    try:
-        imap_client = imaplib.IMAP4_SSL(imap_server)
-    except imaplib.IMAP4.error:
-        raise RuntimeError("Unable to establish IMAP Client")
-
-    try:
-        rv, data = imap_client.login(imap_account, imap_password)
-    except imaplib.IMAP4.error:
-        raise RuntimeError("Unable to login to IMAP Email")
-
-    code = ""
-    for c in range(20):
-        time.sleep(10)
-        rv, data = imap_client.select(imap_folder)
-        if rv != "OK":
-            raise RuntimeError("Unable to open mailbox: " + rv)
-
-        rv, data = imap_client.search(None, "ALL")
-        if rv != "OK":
-            raise RuntimeError("Unable to search the Email folder: " + rv)
-
-        count = 0
-        for num in data[0].split()[::-1]:
-            count = count + 1
-            if count > 3:
-                break
-            rv, data = imap_client.fetch(num, "(BODY.PEEK[])")
-            if rv != "OK":
-                raise RuntimeError("Unable to complete due to error message: " + rv)
-
-            msg = email.message_from_bytes(data[0][1])
-
-            x = email.header.make_header(email.header.decode_header(msg["Subject"]))
-            subject = str(x)
-            logger.debug("DEBUG: SUBJECT:", subject)
-
-            x = email.header.make_header(email.header.decode_header(msg["From"]))
-            frm = str(x)
-            logger.debug("DEBUG: FROM:", frm)
-
-            if not re.search("do_not_reply@intuit.com", frm, re.IGNORECASE):
-                continue
-
-            p = re.search(r"(\d\d\d\d\d\d) Mint code", subject)
-            if p:
-                code = p.group(1)
-            elif not re.search("Your Mint (code|Account)", subject, re.IGNORECASE):
-                continue
-            else:
-                code = ""
-
-            date_tuple = email.utils.parsedate_tz(msg["Date"])
-            if date_tuple:
-                local_date = datetime.fromtimestamp(email.utils.mktime_tz(date_tuple))
-            else:
-                logger.error("ERROR: FAIL0")
-
-            diff = datetime.now() - local_date
-
-            logger.debug("DEBUG: AGE:", diff.seconds)
-
-            if diff.seconds > 180:
-                continue
-
-            logger.debug("DEBUG: EMAIL HEADER OK")
-
-            if code == "":
-                body = next(msg.walk()).get_payload(None, True).decode()
-                p = re.search(
-                    r"Verification code:<.*?(\d\d\d\d\d\d)\b", body, re.S | re.M
-                )
-                if p:
-                    code = p.group(1)
-                else:
-                    logger.error("FAIL1")
-
-            logger.debug("DEBUG: CODE FROM EMAIL:", code)
-
-            if code != "":
-                break
-
-        logger.debug("DEBUG: CODE FROM EMAIL 2:", code)
-
-        if code != "":
-            logger.debug("DEBUG: CODE FROM EMAIL 3:", code)
-
-            if delete and count > 0:
-                imap_client.store(num, "+FLAGS", "\\Deleted")
-
-            if delete:
-                imap_client.expunge()
+    from mintapi.mfa_email import get_email_code
 
-            break
-
-    imap_client.logout()
-    return code
+    return get_email_code(
+        imap_account, imap_password, imap_server, imap_folder, delete=delete
+    )
 
 
 def _create_web_driver_at_mint_com(
@@ -203,6 +106,96 @@ def _create_web_driver_at_mint_com(
     return Chrome(options=chrome_options)
 
 
+# pages the sign in flow can land on. after each step `sign_in` waits for
+# whichever of them appears first instead of probing for each in turn
+HOME_PAGE = "home_page"
+OVERVIEW_PAGE = "overview"
+LOGIN_FAILURE_PAGE = "login_failure"
+USER_SELECTION_PAGE = "user_selection_page"
+VERIFIED_USER_PAGE = "verified_user_page"
+PASSWORDLESS_LOGIN_PAGE = "passwordless_login_page"
+ACCOUNT_SELECTION_PAGE = "account_selection_page"
+MFA_PAGE = "mfa_page"
+PASSWORD_PAGE = "password_page"
+SAME_PAGE_CREDENTIALS_PAGE = "same_page_credentials"
+IDENTIFIER_PAGE = "identifier_page"
+
+LOGIN_FAILURE_XPATH = " | ".join(
+    [
+        '//div[contains(text(), "We can\'t find anyone with ")][@id="ius-identifier-first-error"]',
+        "//div[contains(text(), 'The password you entered is incorrect.')]",
+        '//*[@id="RecaptchaHeader"]',
+        '//h2[contains(text(), "The feature you\'ve requested is temporarily unavailable")]',
+    ]
+)
+
+MFA_PAGE_CSS_SELECTOR = ", ".join(
+    dict.fromkeys(
+        [
+            "#ius-mfa-options-form",
+            *(
+                selector.strip()
+                for method in MFA_METHODS
+                for label in (SELECT_CSS_SELECTORS_LABEL, INPUT_CSS_SELECTORS_LABEL)
+                for selector in method[label].split(",")
+            ),
+        ]
+    )
+)
+
+# checked in order, so e.g. an error shown over the credentials form wins
+SIGN_IN_PAGES = (
+    (LOGIN_FAILURE_PAGE, (By.XPATH, LOGIN_FAILURE_XPATH)),
+    (USER_SELECTION_PAGE, (By.ID, "ius-link-use-a-different-id-known-device")),
+    (
+        VERIFIED_USER_PAGE,
+        (
+            By.CSS_SELECTOR,
+            '#ius-verified-user-update-btn-skip, [data-testid="VUUSkipButton"]',
+        ),
+    ),
+    (
+        PASSWORDLESS_LOGIN_PAGE,
+        (
+            By.CSS_SELECTOR,
+            '#skipWebauthnRegistration, #signInDifferentWay, [data-testid="challengePickerOption_PASSWORD"]',
+        ),
+    ),
+    (
+        ACCOUNT_SELECTION_PAGE,
+        (
+            By.CSS_SELECTOR,
+            '[data-testid="SelectAccountForm"], [data-testid="IdFirstKnownContainer"]',
+        ),
+    ),
+    (MFA_PAGE, (By.CSS_SELECTOR, MFA_PAGE_CSS_SELECTOR)),
+    (
+        PASSWORD_PAGE,
+        (
+            By.CSS_SELECTOR,
+            "#iux-password-confirmation-password, #ius-sign-in-mfa-password-collection-current-password",
+        ),
+    ),
+    (SAME_PAGE_CREDENTIALS_PAGE, (By.ID, "ius-userid")),
+    (
+        IDENTIFIER_PAGE,
+        (
+            By.CSS_SELECTOR,
+            '#ius-identifier, [data-testid="IdentifierFirstIdentifierInput"], .ius-option-username',
+        ),
+    ),
+)
+HOME_PAGE_LOCATOR = (By.LINK_TEXT, "Sign in")
+
+# seconds to wait for the next page to appear after each step
+DEFAULT_PAGE_TIMEOUT = 30
+# steps before giving up, e.g. when MFA keeps being asked for
+MAX_SIGN_IN_STEPS = 20
+# implicit wait while a page is handled. pages are detected with none at all
+HANDLER_IMPLICIT_WAIT = 1
+PAGE_POLL_FREQUENCY = 0.25
+
+
 def sign_in(
     email,
     password,
@@ -219,6 +212,9 @@ def sign_in(
     imap_server=None,
     imap_folder="INBOX",
     beta=False,
+    profile=None,
+    page_timeout=DEFAULT_PAGE_TIMEOUT,
+    imap_watcher=None,
 ):
     if beta:
         url = constants.MINT_BETA_ROOT_URL
@@ -226,120 +222,177 @@ def sign_in(
         url = constants.MINT_ROOT_URL
     """
     Takes in a web driver and gets it through the Mint sign in process
+
+    After every step, waits for whichever page comes next (MFA, account
+    selection, password, overview, ...) to appear and handles it, until the
+    overview page is reached
+
+    Pass a mintapi.profiling.SignInProfile as profile to time each phase, and
+    a mintapi.mfa_email.MFAMailboxWatcher as imap_watcher to read the MFA
+    email through a mailbox connection shared with other sign ins
     """
-    driver.implicitly_wait(20)  # seconds
-    driver.get(url)
-    if not beta:
-        # Add 1 second delay otherwise an issue occurs when trying to click the sign in button on home page
-        time.sleep(1)
-        home_page(driver)
-
-    WebDriverWait(driver, 20).until(
-        expected_conditions.presence_of_element_located(
-            (
-                By.CSS_SELECTOR,
-                ".ius-hosted-ui-main-container, "
-                "#ius-link-use-a-different-id-known-device, "
-                "#ius-userid, "
-                "#ius-identifier, "
-                "#ius-option-username, "
-                '[data-testid="IdentifierFirstSubmitButton"], '
-                '[data-testid="AccountChoicesUseDifferentId"]',
+    if profile is not None:
+        driver = profile.wrap(driver)
+        phase = profile.phase
+    else:
+        phase = _untimed_phase
+
+    pages = SIGN_IN_PAGES if beta else ((HOME_PAGE, HOME_PAGE_LOCATOR),) + SIGN_IN_PAGES
+    handlers = {
+        HOME_PAGE: lambda element: _click_home_page(driver, element),
+        LOGIN_FAILURE_PAGE: lambda element: handle_login_failures(driver),
+        USER_SELECTION_PAGE: lambda element: element.click(),
+        VERIFIED_USER_PAGE: lambda element: bypass_verified_user_page(driver),
+        PASSWORDLESS_LOGIN_PAGE: lambda element: bypass_passwordless_login_page(driver),
+        ACCOUNT_SELECTION_PAGE: lambda element: account_selection_page(
+            driver, intuit_account
+        ),
+        MFA_PAGE: lambda element: _handle_mfa(
+            driver,
+            mfa_method,
+            mfa_token,
+            mfa_input_callback,
+            imap_account,
+            imap_password,
+            imap_server,
+            imap_folder,
+            imap_watcher=imap_watcher,
+            recipient=email,
+        ),
+        PASSWORD_PAGE: lambda element: password_page(driver, password),
+        SAME_PAGE_CREDENTIALS_PAGE: lambda element: handle_same_page_username_password(
+            driver, email, password
+        ),
+        IDENTIFIER_PAGE: lambda element: handle_different_page_username_password(
+            driver, email
+        ),
+    }
+
+    with phase("load"):
+        driver.get(url)
+
+    # elements already acted on, so a page that hasn't been replaced yet
+    # isn't handled twice
+    handled = set()
+    page = None
+    for _ in range(MAX_SIGN_IN_STEPS):
+        driver.implicitly_wait(0)  # seconds
+        try:
+            with phase("wait"):
+                page, elements = WebDriverWait(
+                    driver, page_timeout, poll_frequency=PAGE_POLL_FREQUENCY
+                ).until(_next_sign_in_page(pages, url, handled))
+        except TimeoutException:
+            raise RuntimeError(
+                "Login to Mint failed: timed out waiting for the next sign in page "
+                "after {}".format(page or "loading Mint")
             )
-        )
-    )
+        if page == OVERVIEW_PAGE:
+            break
 
-    driver.implicitly_wait(0)  # seconds
-
-    user_selection_page(driver)
-
-    driver.implicitly_wait(1)  # seconds
-    count = 0
-    while not driver.current_url.startswith("{}/".format(url)):
-        try:  # try to enter in credentials if username and password are on same page
-            handle_same_page_username_password(driver, email, password)
-        except (
-            ElementNotInteractableException,
-            ElementNotVisibleException,
-            NoSuchElementException,
-        ):
-            try:  # try to enter in credentials if username and password are on different pages
-                handle_different_page_username_password(driver, email)
-                driver.implicitly_wait(5)  # seconds
-                password_page(driver, password)
-            except (
-                ElementNotInteractableException,
-                ElementNotVisibleException,
-                NoSuchElementException,
-            ):
-                # no need to enter credentials, likely alreadly logged in
-                pass
-            driver.implicitly_wait(1)  # seconds
-
-        # Wait until logged in, just in case we need to deal with MFA.
-
-        handle_login_failures(driver)
-        if not bypass_verified_user_page(driver):
-            # if bypass_verified_user_page was present, then MFA already done
-            bypass_passwordless_login_page(driver)
-            if mfa_method is not None:
-                mfa_selection_page(driver, mfa_method)
-            mfa_page(
-                driver,
-                mfa_method,
-                mfa_token,
-                mfa_input_callback,
-                imap_account,
-                imap_password,
-                imap_server,
-                imap_folder,
-            )
-        account_selection_page(driver, intuit_account)
-        password_page(driver, password)
-        # Give the overview page a chance to actually load.
-        # If it doesn't, then there may be another round of MFA.
-        try:
-            WebDriverWait(driver, 5).until(
-                expected_conditions.url_contains("{}/".format(url))
+        logger.debug("Sign in reached {}".format(page))
+        driver.implicitly_wait(HANDLER_IMPLICIT_WAIT)  # seconds
+        with phase(page):
+            try:
+                handlers[page](elements[0])
+            except (ElementNotInteractableException, *STANDARD_MISSING_EXCEPTIONS):
+                # the page moved on underneath us; whatever replaced it is
+                # picked up on the next step
+                logger.debug("Sign in page {} changed while handling it".format(page))
+        if page != HOME_PAGE:
+            handled.update(elements)
+    else:
+        raise RuntimeError(
+            "Login to Mint failed: overview not reached after {} sign in steps".format(
+                MAX_SIGN_IN_STEPS
             )
-        except Exception:
-            count += 1
-            if count > 4:
-                raise RuntimeError(
-                    "Login to Mint failed due to timeout in the Multifactor Method Loop"
-                )
+        )
 
     driver.implicitly_wait(20)  # seconds
     # Wait until the overview page has actually loaded, and if wait_for_sync==True, sync has completed.
     status_message = None
     if wait_for_sync:
-        status_message = handle_wait_for_sync(
-            driver, wait_for_sync_timeout, fail_if_stale
-        )
+        with phase("wait_for_sync"):
+            status_message = handle_wait_for_sync(
+                driver, wait_for_sync_timeout, fail_if_stale
+            )
+    if profile is not None:
+        logger.info("Sign in profile:\n%s", profile.report())
     return status_message
 
 
-def home_page(driver):
+def _next_sign_in_page(pages, url, handled):
+    """
+    Expected condition returning (page, elements) for the first of `pages`
+    showing elements that haven't been handled yet, or (OVERVIEW_PAGE, [])
+    once signed in
+    """
+
+    def condition(driver):
+        if driver.current_url.startswith("{}/".format(url)):
+            return OVERVIEW_PAGE, []
+        for page, locator in pages:
+            elements = [
+                element
+                for element in driver.find_elements(*locator)
+                if element not in handled and _is_displayed(element)
+            ]
+            if elements:
+                return page, elements
+        return False
+
+    return condition
+
+
+def _is_displayed(element):
+    try:
+        return element.is_displayed()
+    except StaleElementReferenceException:
+        return False
+
+
+def _untimed_phase(name):
+    return nullcontext()
+
+
+def _click_home_page(driver, element):
+    # the sign in link can render before it responds to clicks, so wait for
+    # it to be replaced, and click again (on the next step) if it isn't
     try:
-        element = driver.find_element(By.LINK_TEXT, "Sign in").click()
+        element.click()
+        WebDriverWait(driver, 1).until(expected_conditions.staleness_of(element))
+    except TimeoutException:
+        logger.debug("Sign in link did not respond, retrying")
     except WebDriverException:
         logger.info("WebDriverException when clicking Sign In")
 
 
-def user_selection_page(driver):
-    # click "Use a different user ID" if needed
-    try:
-        driver.find_element(By.ID, "ius-link-use-a-different-id-known-device").click()
-        WebDriverWait(driver, 20).until(
-            expected_conditions.presence_of_element_located(
-                (
-                    By.CSS_SELECTOR,
-                    '#ius-userid, #ius-identifier, #ius-option-username, [data-testid="IdentifierFirstSubmitButton"]',
-                )
-            )
-        )
-    except NoSuchElementException:
-        pass
+def _handle_mfa(
+    driver,
+    mfa_method,
+    mfa_token,
+    mfa_input_callback,
+    imap_account,
+    imap_password,
+    imap_server,
+    imap_folder,
+    imap_watcher=None,
+    recipient=None,
+):
+    if mfa_method is not None:
+        mfa_selection_page(driver, mfa_method)
+    mfa_page(
+        driver,
+        mfa_method,
+        mfa_token,
+        mfa_input_callback,
+        imap_account,
+        imap_password,
+        imap_server,
+        imap_folder,
+        imap_watcher=imap_watcher,
+        recipient=recipient,
+    )
 
 
 def handle_same_page_username_password(driver, email, password):
@@ -371,8 +424,12 @@ def handle_different_page_username_password(driver, email):
         ).click()
 
     # click on username if on the saved usernames page
-    except (ElementNotInteractableException, ElementNotVisibleException):
-        username_elements = driver.find_element(By.CLASS_NAME, "ius-option-username")
+    except (
+        ElementNotInteractableException,
+        ElementNotVisibleException,
+        NoSuchElementException,
+    ):
+        username_elements = driver.find_elements(By.CLASS_NAME, "ius-option-username")
         for username_element in username_elements:
             if username_element.text == email:
                 username_element.click()
@@ -505,6 +562,8 @@ def mfa_page(
     imap_password,
     imap_server,
     imap_folder,
+    imap_watcher=None,
+    recipient=None,
 ):
     if mfa_method is None:
         mfa_result = search_mfa_method(driver)
@@ -528,7 +587,7 @@ def mfa_page(
         handle_soft_token(
             mfa_token_input, mfa_token_button, mfa_input_callback, mfa_token
         )
-    elif mfa_method == constants.MFA_VIA_EMAIL and imap_account:
+    elif mfa_method == constants.MFA_VIA_EMAIL and (imap_account or imap_watcher):
         handle_email_by_imap(
             mfa_token_input,
             mfa_token_button,
@@ -537,6 +596,8 @@ def mfa_page(
             imap_password,
             imap_server,
             imap_folder,
+            imap_watcher=imap_watcher,
+            recipient=recipient,
         )
     else:
         handle_other_mfa(mfa_token_input, mfa_token_button, mfa_input_callback)
@@ -610,14 +671,19 @@ def handle_email_by_imap(
     imap_password,
     imap_server,
     imap_folder,
+    imap_watcher=None,
+    recipient=None,
 ):
     try:
-        mfa_code = get_email_code(
-            imap_account,
-            imap_password,
-            imap_server,
-            imap_folder,
-        )
+        if imap_watcher is not None:
+            mfa_code = imap_watcher.wait_for_code(recipient=recipient)
+        else:
+            mfa_code = get_email_code(
+                imap_account,
+                imap_password,
+                imap_server,
+                imap_folder,
+            )
         if mfa_code is None:
             mfa_code = (mfa_input_callback or input)(DEFAULT_MFA_INPUT_PROMPT)
         submit_mfa_code(mfa_token_input, mfa_token_button, mfa_code)
@@ -0,0 +1,222 @@
+"""
+Incremental transaction sync backed by a local SQLite store
+"""
+
+import json
+import logging
+import sqlite3
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Iterator, Optional
+
+from mintapi.endpoints import _filter_transactions
+from mintapi.filters import DateFilter
+
+LOGGER = logging.getLogger(__name__)
+
+# pending transactions can post (and change date/amount) a few days later
+DEFAULT_OVERLAP_DAYS = 7
+
+DATE_FORMAT = "%Y-%m-%d"
+
+
+@dataclass
+class SyncResult:
+    """
+    Summary of a single sync run
+
+    start_date is None when the full history was requested
+    """
+
+    start_date: Optional[str]
+    end_date: str
+    fetched: int
+
+
+class TransactionStore(object):
+    """
+    SQLite store of transactions keyed by transaction id
+
+    Full transaction payloads are kept as JSON alongside the columns needed
+    for windowed replacement and filtering
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        with self.connection:
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS transactions (
+                    id TEXT PRIMARY KEY,
+                    date TEXT NOT NULL,
+                    last_updated TEXT,
+                    is_pending INTEGER NOT NULL,
+                    type TEXT,
+                    data TEXT NOT NULL
+                )
+                """)
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS transactions_date ON transactions (date)"
+            )
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value TEXT)"
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def __len__(self):
+        (count,) = self.connection.execute(
+            "SELECT COUNT(*) FROM transactions"
+        ).fetchone()
+        return count
+
+    @property
+    def high_water_mark(self) -> Optional[str]:
+        """Latest transaction date seen by a completed sync."""
+        return self._get_state("high_water_mark")
+
+    @property
+    def last_updated(self) -> Optional[str]:
+        """Latest `metaData.lastUpdatedDate` seen by a completed sync."""
+        return self._get_state("last_updated")
+
+    def _get_state(self, key: str) -> Optional[str]:
+        row = self.connection.execute(
+            "SELECT value FROM sync_state WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def replace_window(
+        self, transactions: Iterable[Dict], start_date: Optional[str] = None
+    ) -> int:
+        """
+        Replace every stored transaction dated on or after `start_date` (or all
+        of them if None) with `transactions`, atomically. Returns the number
+        of transactions written.
+
+        Replacing rather than only upserting drops pending transactions that
+        disappeared once they posted under a new id.
+        """
+        stored = 0
+        with self.connection:
+            if start_date is None:
+                self.connection.execute("DELETE FROM transactions")
+            else:
+                self.connection.execute(
+                    "DELETE FROM transactions WHERE date >= ?", (start_date,)
+                )
+
+            high_water_mark = self.high_water_mark
+            last_updated = self.last_updated
+            for transaction in transactions:
+                updated = transaction.get("metaData", {}).get("lastUpdatedDate")
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO transactions VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        str(transaction["id"]),
+                        transaction["date"],
+                        updated,
+                        int(bool(transaction.get("isPending"))),
+                        transaction.get("type"),
+                        json.dumps(transaction),
+                    ),
+                )
+                stored += 1
+                high_water_mark = max(high_water_mark or "", transaction["date"])
+                if updated:
+                    last_updated = max(last_updated or "", updated)
+
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO sync_state VALUES (?, ?)",
+                [
+                    (k, v)
+                    for k, v in (
+                        ("high_water_mark", high_water_mark),
+                        ("last_updated", last_updated),
+                    )
+                    if v
+                ],
+            )
+        return stored
+
+    def transactions(
+        self, remove_pending: bool = True, include_investment: bool = False
+    ) -> Iterator[Dict]:
+        """
+        Iterate over stored transactions, newest first, applying the same
+        filters as `get_transaction_data`
+        """
+        cursor = self.connection.execute(
+            "SELECT data FROM transactions ORDER BY date DESC, id"
+        )
+        records = (json.loads(row[0]) for row in cursor)
+        return _filter_transactions(records, remove_pending, include_investment)
+
+
+def sync_transactions(
+    mint,
+    store: TransactionStore,
+    overlap_days: int = DEFAULT_OVERLAP_DAYS,
+    limit: int = 1000,
+    today: Optional[date] = None,
+) -> SyncResult:
+    """
+    Bring `store` up to date with Mint.
+
+    The first run pulls the full history. Later runs only request a custom
+    date window starting `overlap_days` before the stored high-water mark, so
+    pending -> posted changes are picked up, and replace that window locally.
+
+    Parameters
+    ----------
+    mint : Mint or MintEndpoints
+        any client exposing `iter_transaction_data`
+    store : TransactionStore
+        local store to update
+    overlap_days : int, optional
+        days before the high-water mark to re-fetch, by default 7
+    limit : int, optional
+        page size, by default 1000
+    today : date, optional
+        end of the sync window, by default today
+
+    Returns
+    -------
+    SyncResult
+    """
+    end_date = (today or date.today()).strftime(DATE_FORMAT)
+    high_water_mark = store.high_water_mark
+
+    if high_water_mark is None:
+        start_date = None
+        date_filter = DateFilter.Options.ALL_TIME
+    else:
+        start_date = (
+            datetime.strptime(high_water_mark, DATE_FORMAT)
+            - timedelta(days=overlap_days)
+        ).strftime(DATE_FORMAT)
+        date_filter = DateFilter.Options.CUSTOM
+
+    LOGGER.info(
+        "Syncing transactions from %s to %s", start_date or "the beginning", end_date
+    )
+
+    # pending and investment transactions are kept in the store and filtered on read
+    transactions = mint.iter_transaction_data(
+        date_filter=date_filter,
+        start_date=start_date,
+        end_date=end_date if start_date else None,
+        include_investment=True,
+        remove_pending=False,
+        limit=limit,
+    )
+    fetched = store.replace_window(transactions, start_date)
+
+    return SyncResult(start_date=start_date, end_date=end_date, fetched=fetched)
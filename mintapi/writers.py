@@ -0,0 +1,336 @@
+"""
+Streaming record writers used for CLI output
+
+Records are written one at a time (or one parquet row group at a time) as
+they come off a (possibly paginated) generator, so exports use bounded
+memory regardless of their size
+"""
+
+import csv
+import logging
+from datetime import date, datetime, timezone
+from itertools import chain, islice
+from typing import Dict, Iterable, List, Optional, TextIO, Tuple, Union
+
+from mintapi.constants import (
+    ACCOUNT_BALANCE_HISTORY_KEY,
+    CSV_FORMAT,
+    INVESTMENT_KEY,
+    JSONL_FORMAT,
+    PARQUET_FORMAT,
+    TRANSACTION_KEY,
+    TRENDS_KEY,
+)
+from mintapi.serialization import dumps
+
+LOGGER = logging.getLogger(__name__)
+
+# formats written record by record to a text stream by `write_records`
+TEXT_FORMATS = (CSV_FORMAT, JSONL_FORMAT)
+
+# formats that can be written without holding the full dataset
+STREAMING_FORMATS = TEXT_FORMATS + (PARQUET_FORMAT,)
+
+# records buffered to settle the csv columns before the header is written
+DEFAULT_SAMPLE_SIZE = 100
+
+# records per parquet row group (a handful of default sized pages)
+DEFAULT_ROW_GROUP_SIZE = 10000
+
+_TREND_COLUMNS = (
+    ("date", "date"),
+    ("type", "string"),
+    ("amount", "float"),
+    ("accountId", "string"),
+)
+
+# stable typed columns (flattened, dotted names) per data kind. fields outside
+# the schema are dropped and missing fields are written as nulls, so files
+# from different pulls always line up. other kinds infer a schema from their
+# first row group
+PARQUET_SCHEMAS = {
+    TRANSACTION_KEY: (
+        ("id", "string"),
+        ("date", "date"),
+        ("description", "string"),
+        ("amount", "float"),
+        ("type", "string"),
+        ("accountId", "string"),
+        ("accountRef.name", "string"),
+        ("accountRef.type", "string"),
+        ("category.id", "string"),
+        ("category.name", "string"),
+        ("category.categoryType", "string"),
+        ("category.parentName", "string"),
+        ("status", "string"),
+        ("matchState", "string"),
+        ("isExpense", "bool"),
+        ("isPending", "bool"),
+        ("isLinkedToRule", "bool"),
+        ("discretionaryType", "string"),
+        ("fiData.description", "string"),
+        ("fiData.inferredDescription", "string"),
+        ("metaData.lastUpdatedDate", "timestamp"),
+    ),
+    TRENDS_KEY: _TREND_COLUMNS,
+    ACCOUNT_BALANCE_HISTORY_KEY: _TREND_COLUMNS
+    + (
+        ("account_id", "string"),
+        ("account_name", "string"),
+        ("account_type", "string"),
+        ("isZillow", "bool"),
+    ),
+    INVESTMENT_KEY: (
+        ("id", "string"),
+        ("accountId", "string"),
+        ("description", "string"),
+        ("cpAssetClass", "string"),
+        ("holdingType", "string"),
+        ("inceptionDate", "timestamp"),
+        ("initialTotalCost", "float"),
+        ("initialQuantity", "float"),
+        ("currentQuantity", "float"),
+        ("currentPrice", "float"),
+        ("currentValue", "float"),
+        ("averagePricePaid", "float"),
+        ("metaData.lastUpdatedDate", "timestamp"),
+    ),
+}
+
+
+def write_records(
+    records: Union[Dict, Iterable[Dict]], stream: TextIO, format: str, **kwargs
+) -> int:
+    """
+    Write `records` to `stream` in a streaming format
+
+    Parameters
+    ----------
+    records : Union[Dict, Iterable[Dict]]
+        a single record or any iterable of records (lists or generators)
+    stream : TextIO
+        open text stream to write to
+    format : str
+        one of `TEXT_FORMATS`
+
+    Returns
+    -------
+    int
+        number of records written
+    """
+    if isinstance(records, dict):
+        records = [records]
+
+    if format not in TEXT_FORMATS:
+        raise ValueError(f"{format} is not a text streaming format")
+    if format == JSONL_FORMAT:
+        return write_jsonl(records, stream)
+    return write_csv(records, stream, **kwargs)
+
+
+def write_jsonl(records: Iterable[Dict], stream: TextIO) -> int:
+    """
+    Write one compact JSON document per line
+    """
+    count = 0
+    for record in records:
+        stream.write(dumps(record))
+        stream.write("\n")
+        count += 1
+    return count
+
+
+def write_csv(
+    records: Iterable[Dict],
+    stream: TextIO,
+    columns: Optional[List[str]] = None,
+    sample_size: int = DEFAULT_SAMPLE_SIZE,
+) -> int:
+    """
+    Write records as CSV with a fixed column set
+
+    Nested objects are flattened into dotted column names (as
+    `pandas.json_normalize` does) and lists are written as JSON. Unless
+    `columns` is given, the columns are the union of the keys of the first
+    `sample_size` records; keys first seen after that are dropped.
+    """
+    rows = (_flatten(record) for record in records)
+
+    if columns is None:
+        sample = list(islice(rows, sample_size))
+        columns = list(dict.fromkeys(key for row in sample for key in row))
+        rows = chain(sample, rows)
+
+    columns_set = set(columns)
+    writer = csv.DictWriter(
+        stream, fieldnames=columns, extrasaction="ignore", lineterminator="\n"
+    )
+    writer.writeheader()
+
+    count = 0
+    dropped = set()
+    for row in rows:
+        dropped.update(row.keys() - columns_set)
+        writer.writerow({key: _cell(value) for key, value in row.items()})
+        count += 1
+
+    if dropped:
+        LOGGER.debug(f"Columns outside the fixed column set: {sorted(dropped)}")
+    return count
+
+
+def write_parquet(
+    records: Union[Dict, Iterable[Dict]],
+    path: str,
+    kind: Optional[str] = None,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+) -> int:
+    """
+    Write records to a parquet file, one row group at a time
+
+    Parameters
+    ----------
+    records : Union[Dict, Iterable[Dict]]
+        a single record or any iterable of records (lists or generators)
+    path : str
+        output file
+    kind : Optional[str], optional
+        data key (e.g. `TRANSACTION_KEY`) selecting one of `PARQUET_SCHEMAS`.
+        unknown kinds infer their columns from the first row group, with
+        every number as a float since later row groups may not be integral
+    row_group_size : int, optional
+        records buffered per row group, by default 10000
+
+    Returns
+    -------
+    int
+        number of records written
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError(
+            "Parquet output requires pyarrow. Install it with `pip install mintapi[parquet]`"
+        )
+
+    if isinstance(records, dict):
+        records = [records]
+    records = iter(records)
+    columns = PARQUET_SCHEMAS.get(kind)
+
+    arrow_types = {
+        "string": pa.string(),
+        "json": pa.string(),
+        "float": pa.float64(),
+        "int": pa.int64(),
+        "bool": pa.bool_(),
+        "date": pa.date32(),
+        "timestamp": pa.timestamp("s", tz="UTC"),
+    }
+
+    writer = None
+    count = 0
+    try:
+        while True:
+            batch = list(islice(records, row_group_size))
+            if writer is None:
+                if columns is None:
+                    columns = _infer_columns(_flatten(record) for record in batch)
+                schema = pa.schema([(name, arrow_types[t]) for name, t in columns])
+                writer = pq.ParquetWriter(path, schema, compression="zstd")
+                # look columns up in place rather than flattening every record
+                paths = [(name, name.split("."), _CONVERTERS[t]) for name, t in columns]
+            if not batch:
+                break
+
+            table = pa.Table.from_pydict(
+                {
+                    name: [
+                        None if value is None else convert(value)
+                        for value in (_lookup(record, parts) for record in batch)
+                    ]
+                    for name, parts, convert in paths
+                },
+                schema=schema,
+            )
+            writer.write_table(table)
+            count += len(batch)
+    finally:
+        if writer is not None:
+            writer.close()
+    return count
+
+
+def _infer_columns(rows: Iterable[Dict]) -> Tuple[Tuple[str, str], ...]:
+    types = {}
+    for row in rows:
+        for name, value in row.items():
+            seen, current = types.get(name), _infer_type(value)
+            if seen is None or current is None or seen == current:
+                types[name] = seen or current
+            else:
+                types[name] = "json"
+    return tuple((name, t or "string") for name, t in types.items())
+
+
+def _infer_type(value) -> Optional[str]:
+    if value is None:
+        return None
+    elif isinstance(value, bool):
+        return "bool"
+    elif isinstance(value, (int, float)):
+        # the schema is settled by the first row group, so an integral
+        # column there can still hold fractions later on
+        return "float"
+    elif isinstance(value, (list, dict)):
+        return "json"
+    return "string"
+
+
+def _parse_date(value: str) -> date:
+    return date.fromisoformat(value[:10])
+
+
+def _parse_timestamp(value: str) -> datetime:
+    # python < 3.11 doesn't parse the Z suffix
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+_CONVERTERS = {
+    "string": str,
+    "json": dumps,
+    "float": float,
+    "int": int,
+    "bool": bool,
+    "date": _parse_date,
+    "timestamp": _parse_timestamp,
+}
+
+
+def _lookup(record: Dict, parts: List[str]):
+    for part in parts:
+        if not isinstance(record, dict):
+            return None
+        record = record.get(part)
+    return record
+
+
+def _flatten(record: Dict, prefix: str = "") -> Dict:
+    flat = {}
+    for key, value in record.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict) and value:
+            flat.update(_flatten(value, f"{name}."))
+        else:
+            flat[name] = value
+    return flat
+
+
+def _cell(value):
+    if isinstance(value, (list, dict)):
+        return dumps(value)
+    return value
@@ -28,6 +28,12 @@ setuptools.setup(
         "xmltodict",
         "keyring",
     ],
+    extras_require={
+        "async": ["httpx"],
+        "auth-cache": ["cryptography"],
+        "fast-json": ["orjson"],
+        "parquet": ["pyarrow"],
+    },
     python_requires=">=3.6",
     entry_points=dict(
         console_scripts=[
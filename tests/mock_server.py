@@ -0,0 +1,478 @@
+"""
+Local stand-in for the Mint REST API
+
+Serves generated accounts, transactions, categories, trends, bills and credit data with
+Mint style limit/offset `metaData` pagination links, so clients can be
+exercised (and benchmarked) end to end over real HTTP without an account.
+
+Records are generated from their index on demand, so very large result sets
+cost nothing until a page is requested.
+
+    with MockMintServer(transactions=100000, latency=0.05) as server:
+        client = RESTClient(api_key="key", cookies="cookie")
+        server.route(client.session)
+        client.get_transaction_data()
+        server.request_count
+"""
+
+import json
+import multiprocessing
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from requests.adapters import HTTPAdapter
+
+from mintapi.constants import MINT_CREDIT_URL, MINT_ROOT_URL
+
+DEFAULT_LIMIT = 20
+EPOCH = date(2023, 1, 1)
+
+
+def account(i):
+    return {
+        "type": "BankAccount" if i % 2 else "CreditAccount",
+        "metaData": {
+            "createdDate": "2017-01-05T17:12:15Z",
+            "lastUpdatedDate": "2022-03-27T16:46:41Z",
+            "link": [
+                {"otherAttributes": {}, "href": f"/v1/accounts/{i}", "rel": "self"}
+            ],
+        },
+        "id": str(i),
+        "name": f"Account {i}",
+        "value": round(1000.0 + i * 12.5, 2),
+        "isVisible": True,
+        "accountStatus": "ACTIVE",
+        "currency": "USD",
+        "fiName": "Mock Bank",
+        "currentBalance": round(1000.0 + i * 12.5, 2),
+    }
+
+
+def transaction(i, accounts):
+    day = (EPOCH - timedelta(days=i // 20)).isoformat()
+    return {
+        "type": "InvestmentTransaction" if i % 50 == 0 else "CashAndCreditTransaction",
+        "metaData": {
+            "lastUpdatedDate": f"{day}T00:11:08Z",
+            "link": [
+                {"otherAttributes": {}, "href": f"/v1/transactions/{i}", "rel": "self"}
+            ],
+        },
+        "id": f"txn-{i}",
+        "accountId": str(i % accounts),
+        "accountRef": {
+            "id": str(i % accounts),
+            "name": f"Account {i % accounts}",
+            "type": "BankAccount",
+            "hiddenFromPlanningAndTrends": False,
+        },
+        "date": day,
+        "description": f"Merchant {i % 97}",
+        "category": {
+            "id": str(i % 13),
+            "name": f"Category {i % 13}",
+            "categoryType": "EXPENSE",
+            "parentId": "0",
+            "parentName": "Root",
+        },
+        "amount": -round((i % 500) + 0.99, 2),
+        "status": "MANUAL",
+        "matchState": "NOT_MATCHED",
+        "fiData": {
+            "id": f"fi-{i}",
+            "date": day,
+            "amount": -round((i % 500) + 0.99, 2),
+            "description": f"MERCHANT {i % 97}",
+            "inferredDescription": f"Merchant {i % 97}",
+            "inferredCategory": {"id": str(i % 13), "name": f"Category {i % 13}"},
+        },
+        "etag": f"etag-{i}",
+        "isExpense": True,
+        "isPending": i % 40 == 0,
+        "discretionaryType": "NONE",
+        "isLinkedToRule": False,
+        "transactionReviewState": "NOT_APPLICABLE",
+    }
+
+
+def category(i):
+    return {
+        "type": "Category",
+        "id": str(i),
+        "name": f"Category {i}",
+        "depth": 1,
+        "categoryType": "EXPENSE",
+        "isBusiness": False,
+        "isCustom": False,
+        "isUnassignable": False,
+        "isUnbudgetable": False,
+        "isUntrendable": False,
+        "isIgnored": False,
+        "isEditable": False,
+        "isDeleted": False,
+        "discretionaryType": "DISCRETIONARY",
+    }
+
+
+def trend(i, accounts=None):
+    """
+    The per-account report views (ASSETS_ACCOUNT, DEBTS_ACCOUNT) key their
+    records by account, spread here over `accounts` accounts
+    """
+    month = EPOCH - timedelta(days=30 * (i // 2))
+    record = {
+        "date": month.replace(day=1).isoformat(),
+        "type": "ASSET" if i % 2 == 0 else "DEBT",
+        "amount": round(5000.0 + i * 3.25, 2),
+        "inflows": [],
+        "outflows": [],
+    }
+    if accounts:
+        record["accountId"] = str(i % accounts)
+    return record
+
+
+def bill(i):
+    return {
+        "id": str(i),
+        "billerName": f"Biller {i}",
+        "amountDue": round(50.0 + i, 2),
+        "dueDate": (EPOCH + timedelta(days=i)).isoformat(),
+        "status": "UNPAID",
+    }
+
+
+CREDIT_REPORTS = {
+    "vendorReports": [
+        {
+            "creditReportList": [
+                {"creditScore": 750, "reportDate": "2022-11-30T00:00:00Z"}
+            ]
+        }
+    ]
+}
+CREDIT_UTILIZATION = {
+    "cumulative": {
+        "creditUtilization": [
+            {"year": "2022", "months": [{"name": "November", "creditUtilization": 7}]}
+        ]
+    },
+    "tradelines": [],
+}
+
+
+class MockMintServer(object):
+    """
+    Threaded HTTP server answering for both the Mint and Mint credit hosts
+
+    Parameters
+    ----------
+    transactions : int
+        number of transactions served by /pfm/v1/transactions/search
+    accounts : int
+        number of accounts served by /pfm/v1/accounts
+    trends : int
+        number of records served by /pfm/v1/trends
+    bills : int
+        number of bills served by /bps/v2/payer/bills
+    latency : float
+        seconds to sleep before answering each request
+    """
+
+    def __init__(self, transactions=1000, accounts=10, trends=24, bills=5, latency=0.0):
+        self.sizes = {
+            "transactions": transactions,
+            "accounts": accounts,
+            "trends": trends,
+            "bills": bills,
+        }
+        self.latency = latency
+        self.failures = {}
+        self.requests = Counter()
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _handler(self))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def request_count(self):
+        return sum(self.requests.values())
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def route(self, session, pool_maxsize=None):
+        return route(session, self.url, pool_maxsize=pool_maxsize)
+
+    def fail(self, path, *statuses, retry_after=None, offset=None):
+        """
+        Answer the next requests to `path` (only those for page `offset`, if
+        given) with `statuses`, in order, before serving it normally again
+        """
+        with self._lock:
+            self.failures.setdefault((path, offset), []).extend(
+                (status, retry_after) for status in statuses
+            )
+
+    def _next_failure(self, path, offset):
+        with self._lock:
+            for key in ((path, offset), (path, None)):
+                if self.failures.get(key):
+                    return self.failures[key].pop(0)
+        return None
+
+    def _record(self, path, size):
+        with self._lock:
+            self.requests[path] += 1
+            self.bytes_sent += size
+
+
+def _page(data_key, path, records, total, offset, limit, metadata_key="metaData"):
+    links = [
+        {
+            "otherAttributes": {},
+            "href": f"{path}?offset={offset}&limit={limit}",
+            "rel": "self",
+        }
+    ]
+    if offset > 0:
+        previous = max(offset - limit, 0)
+        links.append(
+            {
+                "otherAttributes": {},
+                "href": f"{path}?offset={previous}&limit={limit}",
+                "rel": "prev",
+            }
+        )
+    if offset + limit < total:
+        links.append(
+            {
+                "otherAttributes": {},
+                "href": f"{path}?offset={offset + limit}&limit={limit}",
+                "rel": "next",
+            }
+        )
+    return {
+        data_key: records,
+        metadata_key: {
+            "asOf": "2022-12-05T00:15:08Z",
+            "totalSize": total,
+            "pageSize": len(records),
+            "currentPage": offset // limit + 1,
+            "offset": offset,
+            "limit": limit,
+            "link": links,
+        },
+    }
+
+
+def _handler(server):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            self._dispatch({})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            self._dispatch(body)
+
+        def _dispatch(self, body):
+            url = urlsplit(self.path)
+            if server.latency and not url.path.startswith("/_mock"):
+                time.sleep(server.latency)
+
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            offset = int(body.get("offset", query.get("offset", 0)))
+            limit = int(body.get("limit", query.get("limit", DEFAULT_LIMIT)))
+            path = url.path
+
+            failure = server._next_failure(path, offset)
+            if failure is not None:
+                status, retry_after = failure
+                headers = {"Retry-After": str(retry_after)} if retry_after else {}
+                return self._respond(status, {"error": "injected"}, headers=headers)
+
+            if path == "/_mock/stats":
+                # not recorded, so polling doesn't skew the counts
+                return self._respond(
+                    200,
+                    {"requests": server.request_count, "bytes": server.bytes_sent},
+                    record=False,
+                )
+            elif path == "/pfm/v1/accounts":
+                total = server.sizes["accounts"]
+                records = [
+                    account(i) for i in range(offset, min(offset + limit, total))
+                ]
+                payload = _page(
+                    "Account", "/v1/accounts", records, total, offset, limit
+                )
+            elif path == "/pfm/v1/transactions/search":
+                total = server.sizes["transactions"]
+                accounts = max(server.sizes["accounts"], 1)
+                records = [
+                    transaction(i, accounts)
+                    for i in range(offset, min(offset + limit, total))
+                ]
+                payload = _page(
+                    "Transaction",
+                    "/v1/transactions/search",
+                    records,
+                    total,
+                    offset,
+                    limit,
+                )
+            elif path == "/pfm/v1/categories":
+                # the same categories the transactions are filed under
+                total = 13
+                records = [
+                    category(i) for i in range(offset, min(offset + limit, total))
+                ]
+                payload = _page(
+                    "Category", "/v1/categories", records, total, offset, limit
+                )
+            elif path == "/pfm/v1/trends":
+                total = server.sizes["trends"]
+                report = body.get("reportView", {}).get("type", "")
+                accounts = (
+                    max(server.sizes["accounts"], 1)
+                    if report.endswith("_ACCOUNT")
+                    else None
+                )
+                records = [
+                    trend(i, accounts)
+                    for i in range(offset, min(offset + limit, total))
+                ]
+                payload = _page("Trend", "/v1/trends", records, total, offset, limit)
+            elif path == "/bps/v2/payer/bills":
+                total = server.sizes["bills"]
+                records = [bill(i) for i in range(offset, min(offset + limit, total))]
+                payload = _page(
+                    "bills",
+                    "/v2/payer/bills",
+                    records,
+                    total,
+                    offset,
+                    limit,
+                    metadata_key="collectionMetaData",
+                )
+            elif path == "/v1/creditreports":
+                payload = CREDIT_REPORTS
+            elif path in (
+                "/v1/creditreports/0/inquiries",
+                "/v1/creditreports/0/tradelines",
+            ):
+                payload = {"items": []}
+            elif path == "/v1/creditreports/creditutilizationhistory":
+                payload = CREDIT_UTILIZATION
+            else:
+                return self._respond(404, {"error": f"unknown path {path}"})
+
+            self._respond(200, payload)
+
+        def _respond(self, status, payload, record=True, headers=None):
+            content = json.dumps(payload).encode()
+            if record:
+                server._record(urlsplit(self.path).path, len(content))
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(content)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            try:
+                self.wfile.write(content)
+            except (BrokenPipeError, ConnectionResetError):
+                # the client gave up waiting, e.g. a read timeout
+                self.close_connection = True
+
+    return Handler
+
+
+def route(session, url, pool_maxsize=None):
+    """
+    Mount adapters on a requests session so calls to the Mint hosts are
+    answered by the mock server at `url` instead. The pools keep the size
+    of the adapters they replace unless `pool_maxsize` is given
+    """
+    for host in (MINT_ROOT_URL, MINT_CREDIT_URL):
+        size = pool_maxsize or session.get_adapter(host)._pool_maxsize
+        session.mount(
+            host,
+            _RedirectAdapter(url, pool_connections=1, pool_maxsize=size),
+        )
+    return session
+
+
+def _serve(urls, stop, kwargs):
+    with MockMintServer(**kwargs) as server:
+        urls.put(server.url)
+        stop.wait()
+
+
+@contextmanager
+def serve_in_process(**kwargs):
+    """
+    Run a `MockMintServer` in a child process and yield its url, so the
+    server's own work does not compete with the client being measured.
+    Counters are available from the `/_mock/stats` endpoint.
+    """
+    urls = multiprocessing.Queue()
+    stop = multiprocessing.Event()
+    process = multiprocessing.Process(
+        target=_serve, args=(urls, stop, kwargs), daemon=True
+    )
+    process.start()
+    try:
+        yield urls.get(timeout=30)
+    finally:
+        stop.set()
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+
+
+class _RedirectAdapter(HTTPAdapter):
+    """
+    Rewrites the scheme and host of each request to point at the mock server
+    """
+
+    def __init__(self, target, **kwargs):
+        self.target = target
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        url = urlsplit(request.url)
+        request.url = f"{self.target}{url.path}" + (
+            f"?{url.query}" if url.query else ""
+        )
+        return super().send(request, **kwargs)
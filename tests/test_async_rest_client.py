@@ -0,0 +1,195 @@
+"""
+Async rest client tests
+
+Drives the client against an in-process transport so requests, pagination
+and postprocessing are exercised without network access
+"""
+
+import asyncio
+import json
+import unittest
+from urllib.parse import parse_qs
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+from mintapi.async_rest import AsyncRESTClient  # noqa: E402
+from mintapi.cache import MemoryCache  # noqa: E402
+
+
+def paged_handler(records, data_key, seen):
+    """
+    Serves `records` with Mint style limit/offset metadata
+    """
+
+    def handler(request):
+        seen.append(request)
+        if request.method == "POST":
+            body = json.loads(request.content)
+            offset, limit = int(body["offset"]), int(body["limit"])
+        else:
+            query = parse_qs(request.url.query.decode())
+            offset = int(query.get("offset", [0])[0])
+            limit = int(query.get("limit", [1000])[0])
+        path = request.url.path.split("/pfm")[-1]
+        links = []
+        if offset + limit < len(records):
+            links.append(
+                {
+                    "otherAttributes": {},
+                    "href": f"{path}?offset={offset + limit}&limit={limit}",
+                    "rel": "next",
+                }
+            )
+        return httpx.Response(
+            200,
+            json={
+                data_key: records[offset : offset + limit],
+                "metaData": {
+                    "totalSize": len(records),
+                    "offset": offset,
+                    "limit": limit,
+                    "link": links,
+                },
+            },
+        )
+
+    return handler
+
+
+def make_client(handler, **kwargs):
+    return AsyncRESTClient(
+        api_key="abc123",
+        cookies=[{"name": "session", "value": "fudge"}],
+        transport=httpx.MockTransport(handler),
+        **kwargs,
+    )
+
+
+class AsyncRestClientTests(unittest.TestCase):
+    accounts = [{"id": str(i), "name": f"account {i}"} for i in range(5)]
+    transactions = [
+        {"id": i, "isPending": i == 1, "type": "CashAndCreditTransaction"}
+        for i in range(7)
+    ]
+
+    def test_auth_headers(self):
+        seen = []
+        client = make_client(paged_handler(self.accounts, "Account", seen))
+        asyncio.run(client.get_account_data(limit=10))
+        self.assertEqual(seen[0].headers["authorization"], "abc123")
+        self.assertEqual(seen[0].headers["cookie"], "session=fudge")
+
+    def test_paginated_get(self):
+        seen = []
+        client = make_client(paged_handler(self.accounts, "Account", seen))
+        data = asyncio.run(client.get_account_data(limit=2))
+        self.assertEqual(data, self.accounts)
+        self.assertEqual(len(seen), 3)
+
+    def test_concurrent_paginated_post(self):
+        seen = []
+        client = make_client(
+            paged_handler(self.transactions, "Transaction", seen), max_workers=3
+        )
+        data = asyncio.run(client.get_transaction_data(limit=2))
+        self.assertEqual([t["id"] for t in data], [0, 2, 3, 4, 5, 6])
+        self.assertEqual(len(seen), 4)
+
+    def test_streaming_transactions(self):
+        seen = []
+        client = make_client(paged_handler(self.transactions, "Transaction", seen))
+
+        async def collect():
+            return [t["id"] async for t in client.iter_transaction_data(limit=3)]
+
+        self.assertEqual(asyncio.run(collect()), [0, 2, 3, 4, 5, 6])
+
+    def test_retry(self):
+        seen = []
+        paged = paged_handler(self.accounts, "Account", seen)
+
+        def handler(request):
+            if len(seen) == 1:
+                # second page is throttled once
+                seen.append(request)
+                return httpx.Response(429, headers={"Retry-After": "0"})
+            return paged(request)
+
+        client = make_client(handler)
+        data = asyncio.run(client.get_account_data(limit=3))
+        self.assertEqual(data, self.accounts)
+        self.assertEqual(client.metrics.as_dict()["retries"], 1)
+
+    def test_response_cache(self):
+        seen = []
+        client = make_client(paged_handler(self.accounts, "Category", seen))
+        client.response_cache = MemoryCache()
+
+        async def pull():
+            first = await client.get_category_data(limit=3)
+            second = await client.get_category_data(limit=3)
+            return first, second
+
+        first, second = asyncio.run(pull())
+        self.assertEqual(first, self.accounts)
+        self.assertEqual(second, first)
+        self.assertEqual(len(seen), 2)
+
+    def test_per_account_balance_history_fallback(self):
+        client = make_client(paged_handler([], "Trend", []))
+        calls = []
+
+        async def get_account_data():
+            return [{"id": str(i), "name": "", "type": "BankAccount"} for i in range(2)]
+
+        async def get_trend_data(report_type, account_ids, **kwargs):
+            calls.append(account_ids)
+            if len(account_ids) > 1:
+                return [{"type": "ASSET", "amount": 10}]
+            return [{"date": "2022-01-01", "report": report_type.name}]
+
+        client.get_account_data = get_account_data
+        client.get_trend_data = get_trend_data
+
+        data = asyncio.run(client.get_account_balance_history())
+        self.assertEqual(len(calls), 6)
+        self.assertIs(client.batched_balance_history, False)
+        self.assertEqual(
+            [(d["account_id"], d["report"]) for d in data],
+            [
+                ("0", "ASSETS_TIME"),
+                ("0", "DEBTS_TIME"),
+                ("1", "ASSETS_TIME"),
+                ("1", "DEBTS_TIME"),
+            ],
+        )
+
+        # the batched reports are not requested again
+        self.assertEqual(asyncio.run(client.get_account_balance_history()), data)
+        self.assertEqual(len(calls), 10)
+
+    def test_shared_connection_pool(self):
+        seen = []
+        transport = httpx.MockTransport(paged_handler(self.accounts, "Account", seen))
+
+        async def pull():
+            async with httpx.AsyncClient(transport=transport) as pool:
+                first = AsyncRESTClient(api_key="first", client=pool)
+                second = AsyncRESTClient(api_key="second", client=pool)
+                await asyncio.gather(
+                    first.get_account_data(), second.get_account_data()
+                )
+                await first.aclose()
+                self.assertFalse(pool.is_closed)
+
+        asyncio.run(pull())
+        self.assertEqual(
+            sorted(request.headers["authorization"] for request in seen),
+            ["first", "second"],
+        )
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,76 @@
+"""
+Auth cache tests
+
+Round trips entries through a temporary directory with an explicit secret
+(the keyring is never touched)
+"""
+
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+import pytest
+
+pytest.importorskip("cryptography")
+
+from mintapi.auth_cache import AuthCache, authorize_from_cache  # noqa: E402
+from mintapi.rest import RESTClient  # noqa: E402
+
+
+class AuthCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = AuthCache(self.directory.name, secret="hunter2")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        cookies = [{"name": "session", "value": "fudge"}]
+        self.cache.save("you@example.com", api_key="abc123", cookies=cookies)
+        self.assertEqual(
+            self.cache.load("You@Example.com"),
+            {"api_key": "abc123", "cookies": cookies},
+        )
+
+    def test_entries_are_encrypted(self):
+        self.cache.save("you@example.com", api_key="abc123", cookies="fudge")
+        (entry,) = os.listdir(self.directory.name)
+        with open(os.path.join(self.directory.name, entry), "rb") as f:
+            contents = f.read()
+        self.assertNotIn(b"abc123", contents)
+        self.assertNotIn(b"you@example.com", entry.encode())
+
+        other = AuthCache(self.directory.name, secret="not hunter2")
+        self.assertIsNone(other.load("you@example.com"))
+
+    def test_expiry(self):
+        expired = AuthCache(self.directory.name, secret="hunter2", max_age=-1)
+        expired.save("you@example.com", api_key="abc123", cookies="fudge")
+        self.assertIsNone(self.cache.load("you@example.com"))
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    def test_cookie_expiry_bounds_entry(self):
+        cookies = [{"name": "session", "value": "fudge", "expiry": time.time() - 1}]
+        self.cache.save("you@example.com", api_key="abc123", cookies=cookies)
+        self.assertIsNone(self.cache.load("you@example.com"))
+
+    def test_missing_entry(self):
+        self.assertIsNone(self.cache.load("nobody@example.com"))
+        self.cache.invalidate("nobody@example.com")
+
+    @patch.object(RESTClient, "is_authorized", return_value=False)
+    def test_stale_entry_cleared(self, _):
+        self.cache.save("you@example.com", api_key="stale", cookies="fudge")
+        client = RESTClient()
+
+        self.assertFalse(authorize_from_cache(self.cache, "you@example.com", client))
+        self.assertIsNone(self.cache.load("you@example.com"))
+        self.assertNotIn("authorization", client.session.headers)
+        self.assertNotIn("cookie", client.session.headers)
+
+
+if __name__ == "__main__":
+    unittest.main()
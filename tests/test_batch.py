@@ -0,0 +1,141 @@
+"""
+Batch runner tests, pulling from the mock Mint server
+"""
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+import pytest
+from mintapi.batch import (
+    BatchRunner,
+    BrowserPool,
+    Identity,
+    load_manifest,
+    report,
+)
+from mintapi.rest import RESTClient
+from tests.mock_server import MockMintServer
+
+
+class FakeBrowser(object):
+    """Signs in instantly, failing for any email starting with "bad"."""
+
+    sign_ins = []
+
+    def __init__(self, quit_driver_on_fail=True):
+        self.quit_driver_on_fail = quit_driver_on_fail
+
+    def login_and_get_token(self, email, password, driver=None, **kwargs):
+        FakeBrowser.sign_ins.append((email, password, driver, kwargs))
+        if email.startswith("bad"):
+            raise Exception("Could not sign in to Mint")
+
+    def _get_api_key_header(self):
+        return {"authorization": "Intuit_APIKey key"}
+
+    def _get_cookies(self):
+        return "cookie"
+
+
+class BatchRunnerTests(unittest.TestCase):
+    def setUp(self):
+        self.server = MockMintServer(accounts=3).start()
+        self.addCleanup(self.server.stop)
+
+        def routed_client(**kwargs):
+            client = RESTClient(**kwargs)
+            self.server.route(client.session)
+            return client
+
+        for target, replacement in [
+            ("mintapi.batch.RESTClient", routed_client),
+            ("mintapi.browser.SeleniumBrowser", FakeBrowser),
+        ]:
+            patcher = patch(target, replacement)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        FakeBrowser.sign_ins = []
+
+        self.drivers = []
+        self.lock = threading.Lock()
+
+    def create_driver(self):
+        with self.lock:
+            self.drivers.append(MagicMock())
+            return self.drivers[-1]
+
+    def test_run(self):
+        pool = BrowserPool(size=1, create_driver=self.create_driver)
+        runner = BatchRunner(
+            {"get_account_data": {}, "get_bills_data": {}},
+            max_identities=3,
+            browser_pool=pool,
+        )
+        identities = [
+            Identity("one@example.com", "password", sign_in={"mfa_method": "sms"}),
+            Identity("bad@example.com", "password"),
+            Identity("two@example.com", "password", pulls={"get_not_an_endpoint": {}}),
+        ]
+
+        results = runner.run(identities)
+        runner.close()
+
+        self.assertEqual([r.email for r in results], [i.email for i in identities])
+        one, bad, two = results
+        self.assertTrue(one.ok)
+        self.assertEqual(len(one.data["get_account_data"]), 3)
+        self.assertEqual(len(one.data["get_bills_data"]), 5)
+        self.assertEqual(set(one.pull_seconds), {"get_account_data", "get_bills_data"})
+        self.assertIn("Could not sign in", bad.errors["sign_in"])
+        self.assertEqual(bad.data, {})
+        self.assertIn("AttributeError", two.errors["get_not_an_endpoint"])
+
+        # one browser at a time, reused unless its sign in failed
+        sign_in_drivers = {driver for _, _, driver, _ in FakeBrowser.sign_ins}
+        self.assertEqual(len(sign_in_drivers), len(self.drivers))
+        self.assertLessEqual(len(self.drivers), 2)
+        self.assertEqual(sum(d.quit.called for d in self.drivers), len(self.drivers))
+        for email, _, _, kwargs in FakeBrowser.sign_ins:
+            self.assertTrue(kwargs["headless"])
+            self.assertEqual(kwargs["imap_folder"], "INBOX")
+        self.assertEqual(FakeBrowser.sign_ins[0][3]["mfa_method"], "sms")
+
+        text = report(results)
+        self.assertIn("3 identities, 2 failed", text)
+        self.assertIn("sign_in: Exception: Could not sign in to Mint", text)
+
+    def test_load_manifest(self):
+        manifest = {
+            "pulls": ["get_account_data"],
+            "identities": [
+                {"email": "one@example.com", "password": "pw", "mfa_method": "sms"},
+                {"email": "two@example.com", "pulls": {"get_bills_data": {}}},
+            ],
+        }
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "manifest.json")
+            with open(path, "w") as f:
+                json.dump(manifest, f)
+            identities, pulls = load_manifest(path)
+
+            manifest["identities"][1]["pulls"] = ["get_nothing"]
+            with open(path, "w") as f:
+                json.dump(manifest, f)
+            with self.assertRaisesRegex(ValueError, "get_nothing"):
+                load_manifest(path)
+
+        self.assertEqual(pulls, {"get_account_data": {}})
+        self.assertEqual(
+            identities,
+            [
+                Identity("one@example.com", "pw", sign_in={"mfa_method": "sms"}),
+                Identity("two@example.com", pulls={"get_bills_data": {}}),
+            ],
+        )
+
+
+if __name__ == "__main__":
+    pytest.main()
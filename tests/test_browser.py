@@ -1,5 +1,5 @@
 import unittest
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 import mintapi.browser
 from mintapi.browser import SeleniumBrowser
@@ -31,8 +31,45 @@ class BrowserAuthTests(unittest.TestCase):
 
 
 class BrowserRequestHandlingTests(unittest.TestCase):
+    request_kwargs = dict(
+        method="GET",
+        api_url="https://mint.intuit.com",
+        api_section="/pfm",
+        uri_path="/v1/accounts",
+        data_key="Account",
+        metadata_key="metaData",
+        paginate=False,
+    )
+
+    def make_browser(self, *status_codes):
+        browser = SeleniumBrowser()
+        browser.driver = MagicMock()
+        browser.driver.execute_script.side_effect = ["first", "second"]
+        browser.driver.request.side_effect = [
+            MagicMock(status_code=status_code) for status_code in status_codes
+        ]
+        return browser
+
     def test_header_injection(self):
-        pass
+        browser = self.make_browser(200)
+        browser.request(headers={"extra": "header"}, **self.request_kwargs)
+        headers = browser.driver.request.call_args.kwargs["headers"]
+        self.assertIn("intuit_apikey=first", headers["authorization"])
+        self.assertEqual(headers["extra"], "header")
+
+    def test_api_key_header_cached(self):
+        browser = self.make_browser(200, 200, 200)
+        for _ in range(3):
+            browser.request(**self.request_kwargs)
+        browser.driver.execute_script.assert_called_once()
+        self.assertNotIn("extra", browser._get_api_key_header())
+
+    def test_api_key_header_refreshed_on_unauthorized(self):
+        browser = self.make_browser(401, 200)
+        browser.request(**self.request_kwargs)
+        self.assertEqual(browser.driver.execute_script.call_count, 2)
+        headers = browser.driver.request.call_args.kwargs["headers"]
+        self.assertIn("intuit_apikey=second", headers["authorization"])
 
     def test_request_param_passing(self):
         pass
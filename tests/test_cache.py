@@ -0,0 +1,106 @@
+"""
+Response cache tests
+"""
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import pytest
+from mintapi.cache import MISS, DiskCache, MemoryCache
+from mintapi.rest import RESTClient
+
+from tests.mock_server import MockMintServer
+
+
+class BackendTests(unittest.TestCase):
+    def test_memory_cache_expiry_and_lru(self):
+        cache = MemoryCache(maxsize=2)
+        with patch("mintapi.cache.time.time", return_value=0):
+            cache.set("a", [1], ttl=10)
+            cache.set("b", [2], ttl=10)
+            self.assertEqual(cache.get("a"), [1])
+            # "b" is now the least recently used entry
+            cache.set("c", [3], ttl=10)
+            self.assertIs(cache.get("b"), MISS)
+
+        with patch("mintapi.cache.time.time", return_value=10):
+            self.assertIs(cache.get("a"), MISS)
+
+    def test_memory_cache_returns_copies(self):
+        cache = MemoryCache()
+        cache.set("a", [{"id": 1}], ttl=10)
+        cache.get("a")[0]["id"] = 2
+        self.assertEqual(cache.get("a"), [{"id": 1}])
+
+    def test_disk_cache_persists(self):
+        with tempfile.TemporaryDirectory() as directory:
+            DiskCache(directory).set("a", [], ttl=10)
+            self.assertEqual(DiskCache(directory).get("a"), [])
+
+            with patch("mintapi.cache.time.time", return_value=2**40):
+                self.assertIs(DiskCache(directory).get("a"), MISS)
+            self.assertIs(DiskCache(directory).get("a"), MISS)
+
+    def test_keys(self):
+        cache = MemoryCache()
+        key = cache.key("GET", "url", params={"limit": 1})
+        self.assertEqual(key, cache.key("get", "url", params={"limit": 1}))
+        self.assertNotEqual(key, cache.key("GET", "url", params={"limit": 2}))
+        self.assertNotEqual(
+            key, MemoryCache(namespace="other").key("GET", "url", params={"limit": 1})
+        )
+
+        self.assertIsNotNone(cache.ttl_for("/v1/categories"))
+        self.assertIsNone(cache.ttl_for("/v1/transactions/search"))
+        self.assertIsNone(MemoryCache(ttls={"/v1/tags": 0}).ttl_for("/v1/tags"))
+
+
+class ClientCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.server = MockMintServer().start()
+        self.addCleanup(self.server.stop)
+
+    def client(self, cache):
+        client = RESTClient(api_key="key", cookies="cookie", response_cache=cache)
+        self.server.route(client.session)
+        return client
+
+    def test_reference_endpoints_cached(self):
+        client = self.client(MemoryCache())
+
+        categories = client.get_category_data(limit=5)
+        self.assertEqual(len(categories), 13)
+        self.assertEqual(client.get_category_data(limit=5), categories)
+        self.assertEqual(self.server.requests["/pfm/v1/categories"], 3)
+
+        client.get_category_data(limit=5, bypass_cache=True)
+        self.assertEqual(self.server.requests["/pfm/v1/categories"], 6)
+
+        # a different page size is a different request
+        client.get_category_data(limit=20)
+        self.assertEqual(self.server.requests["/pfm/v1/categories"], 7)
+
+    def test_cached_between_clients(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for _ in range(2):
+                self.client(DiskCache(directory)).get_category_data()
+        self.assertEqual(self.server.requests["/pfm/v1/categories"], 1)
+
+    def test_volatile_endpoints_not_cached(self):
+        client = self.client(MemoryCache())
+        for _ in range(2):
+            client.get_account_data()
+            list(client.iter_category_data())
+        self.assertEqual(self.server.requests["/pfm/v1/accounts"], 2)
+        self.assertEqual(self.server.requests["/pfm/v1/categories"], 2)
+
+    def test_requests_without_data_key_not_cached(self):
+        # an empty result must not be kept, even for an endpoint given a ttl
+        client = self.client(MemoryCache(ttls={"/v1/creditreports": 60}))
+        for _ in range(2):
+            client.get_credit_reports()
+        self.assertEqual(self.server.requests["/v1/creditreports"], 2)
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -1,8 +1,20 @@
+import io
+import json
+import os
 import tempfile
+import threading
 import unittest
+from contextlib import redirect_stderr, redirect_stdout
 
-from mintapi.cli import format_filename, parse_arguments
-from mintapi.constants import ACCOUNT_KEY, TRANSACTION_KEY
+from mintapi.cli import (
+    format_filename,
+    output_data,
+    parse_arguments,
+    run_pulls,
+    stored_transactions,
+)
+from mintapi.constants import ACCOUNT_KEY, BILL_KEY, TRANSACTION_KEY
+from tests.test_sync import FakeClient, transaction
 
 
 class CLIOutputTests(unittest.TestCase):
@@ -31,6 +43,91 @@ class CLIOutputTests(unittest.TestCase):
         filename = format_filename(arguments, None)
         self.assertEqual(filename, None)
 
+    def test_streaming_output(self):
+        with tempfile.TemporaryDirectory() as directory:
+            prefix = os.path.join(directory, "current")
+            arguments = parse_arguments(["--format", "jsonl", "--filename", prefix])
+            records = ({"id": str(i)} for i in range(3))
+            output_data(arguments, records, TRANSACTION_KEY)
+
+            with open(f"{prefix}_transaction.jsonl") as f:
+                self.assertEqual(
+                    [json.loads(line)["id"] for line in f], ["0", "1", "2"]
+                )
+
+    def test_concurrent_pulls(self):
+        # both pulls must be in flight at once to get past the barrier
+        barrier = threading.Barrier(2, timeout=5)
+
+        def pull(records):
+            barrier.wait()
+            return iter(records)
+
+        pulls = [
+            (ACCOUNT_KEY, lambda: pull([{"id": "account"}])),
+            (BILL_KEY, lambda: pull([{"id": "bill"}])),
+        ]
+
+        arguments = parse_arguments(["--format", "jsonl"])
+        stdout = io.StringIO()
+        with redirect_stdout(stdout):
+            run_pulls(arguments, pulls, max_workers=2)
+        self.assertEqual(
+            sorted(json.loads(line)["id"] for line in stdout.getvalue().splitlines()),
+            ["account", "bill"],
+        )
+
+        with tempfile.TemporaryDirectory() as directory:
+            prefix = os.path.join(directory, "current")
+            arguments = parse_arguments(["--format", "jsonl", "--filename", prefix])
+            barrier.reset()
+            run_pulls(arguments, pulls, max_workers=2)
+            self.assertEqual(
+                sorted(os.listdir(directory)),
+                ["current_account.jsonl", "current_bill.jsonl"],
+            )
+
+    def test_transaction_store_rejects_date_filters(self):
+        for dates in (["--start-date", "01/01/22"], ["--transaction-date-filter", "1"]):
+            with self.assertRaises(SystemExit), redirect_stderr(io.StringIO()):
+                parse_arguments(
+                    ["--transactions", "--transaction-store", "x.db"] + dates
+                )
+        parse_arguments(
+            ["--transaction-store", "x.db", "--transaction-date-filter", "10"]
+        )
+
+    def test_transaction_store_streamed_to_stdout(self):
+        client = FakeClient(
+            [transaction("a", "2022-01-01"), transaction("b", "2022-03-01")]
+        )
+
+        with tempfile.TemporaryDirectory() as directory:
+            arguments = parse_arguments(
+                [
+                    "--transactions",
+                    "--transaction-store",
+                    os.path.join(directory, "transactions.db"),
+                    "--format",
+                    "jsonl",
+                ]
+            )
+            # the store is synced on a worker thread and read on this one
+            pulls = [
+                (
+                    TRANSACTION_KEY,
+                    lambda: stored_transactions(arguments, client, stream=True),
+                )
+            ]
+            stdout = io.StringIO()
+            with redirect_stdout(stdout):
+                run_pulls(arguments, pulls, max_workers=1)
+
+        self.assertEqual(
+            [json.loads(line)["id"] for line in stdout.getvalue().splitlines()],
+            ["b", "a"],
+        )
+
 
 def write_transactions_file():
     config_file = tempfile.NamedTemporaryFile(mode="wt")
@@ -6,9 +6,10 @@ between browser and rest client - no endpoint testing
 """
 import sys
 import unittest
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 import mintapi.browser
+import mintapi.rest
 import pytest
 from mintapi.api import Mint
 from mintapi.browser import SeleniumBrowser
@@ -111,12 +112,56 @@ class MintApiTests(unittest.TestCase):
         self.assertEqual(api.rest_client.session.headers["authorization"], "abc123")
         self.assertEqual(api.rest_client.session.headers["cookie"], "fudge")
 
+    @patch("mintapi.api.SeleniumBrowser")
+    @patch.object(mintapi.rest.RESTClient, "is_authorized")
+    def test_warm_auth_cache_skips_browser(self, mock_probe, mock_browser_class):
+        """
+        if cached auth passes the probe the browser is never started
+        """
+        mock_probe.return_value = True
+        auth_cache = MagicMock()
+        auth_cache.load.return_value = {"api_key": "abc123", "cookies": "fudge"}
+        api = Mint("your_email@web.com", use_rest_client=True, auth_cache=auth_cache)
+        mock_browser_class.assert_not_called()
+        self.assertIsNone(api.browser)
+        self.assertEqual(api.rest_client.session.headers["authorization"], "abc123")
+
+    @patch("mintapi.api.SeleniumBrowser")
+    @patch.object(mintapi.rest.RESTClient, "is_authorized")
+    def test_stale_auth_cache_signs_in(self, mock_probe, mock_browser_class):
+        """
+        if cached auth fails the probe it is evicted, the browser signs in
+        and the fresh auth is cached
+        """
+        mock_probe.return_value = False
+        mock_browser_class.return_value._get_api_key_header.return_value = {
+            "authorization": "fresh"
+        }
+        mock_browser_class.return_value._get_cookies.return_value = "oatmeal"
+        auth_cache = MagicMock()
+        auth_cache.load.return_value = {"api_key": "stale", "cookies": "fudge"}
+        api = Mint("your_email@web.com", use_rest_client=True, auth_cache=auth_cache)
+        auth_cache.invalidate.assert_called_once_with("your_email@web.com")
+        auth_cache.save.assert_called_once_with(
+            "your_email@web.com", api_key="fresh", cookies="oatmeal"
+        )
+        self.assertEqual(api.rest_client.session.headers["authorization"], "fresh")
+
     def test_method_routing_with_rest_client(self):
         api = Mint(use_rest_client=True)
         for method in [
             i
             for i in dir(RESTClient)
-            if not i.startswith("__") and i not in ("_abc_impl",)
+            if not i.startswith("__")
+            and i
+            not in (
+                "_abc_impl",
+                "batched_balance_history",
+                "max_workers",
+                "metrics",
+                "rate_limiter",
+                "response_cache",
+            )
         ]:
             self.assertEqual(
                 getattr(api, method).__self__.__class__,
@@ -129,7 +174,17 @@ class MintApiTests(unittest.TestCase):
             i
             for i in dir(SeleniumBrowser)
             if not i.startswith("__")
-            and i not in ("_abc_impl", "driver", "status_message")
+            and i
+            not in (
+                "_abc_impl",
+                "batched_balance_history",
+                "driver",
+                "status_message",
+                "max_workers",
+                "metrics",
+                "rate_limiter",
+                "response_cache",
+            )
         ]:
             self.assertEqual(
                 getattr(api, method).__self__.__class__,
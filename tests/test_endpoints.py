@@ -3,6 +3,7 @@ Data extraction endpoint tests
 
 Mocks api with fixed responses and validates requests are correctly structured
 """
+import json
 import sys
 import unittest
 from unittest.mock import patch
@@ -12,8 +13,22 @@ import pytest
 from mintapi.endpoints import MintEndpoints
 
 
+class FakeJSONResponse(object):
+    """
+    Exposes the body returned by `json()` as raw bytes, like requests and httpx
+    """
+
+    @property
+    def content(self):
+        return json.dumps(self.json()).encode()
+
+    @property
+    def text(self):
+        return self.content.decode()
+
+
 class PaginationTests(unittest.TestCase):
-    class FakeNextResponse(object):
+    class FakeNextResponse(FakeJSONResponse):
         def json(self):
             return {
                 "Transaction": [
@@ -48,7 +63,7 @@ class PaginationTests(unittest.TestCase):
                 },
             }
 
-    class FakeResponse(object):
+    class FakeResponse(FakeJSONResponse):
         def json(self):
             return {
                 "Transaction": [
@@ -156,6 +171,97 @@ class PaginationTests(unittest.TestCase):
             ],
         )
 
+    @patch.object(
+        mintapi.endpoints.MintEndpoints, "__abstractmethods__", new_callable=set
+    )
+    @patch.object(mintapi.endpoints.MintEndpoints, "request")
+    def test_concurrent_offset_handling(self, mock_request, _):
+        """
+        Should compute every remaining offset and reassemble in offset order
+        """
+
+        class FakePageResponse(FakeJSONResponse):
+            def __init__(self, offset):
+                self.offset = offset
+
+            def json(self):
+                return {"Transaction": [{"id": self.offset}]}
+
+        class FakeFirstResponse(FakeJSONResponse):
+            def json(self):
+                return {
+                    "Transaction": [{"id": 0}],
+                    "metaData": {
+                        "totalSize": 4,
+                        "offset": 0,
+                        "limit": 1,
+                        "link": [
+                            {
+                                "otherAttributes": {},
+                                "href": "/v1/transactions/search?offset=1&limit=1",
+                                "rel": "next",
+                            },
+                        ],
+                    },
+                }
+
+        mock_request.side_effect = lambda **kwargs: FakePageResponse(
+            kwargs["json"]["offset"]
+        )
+        endpoints = MintEndpoints()
+        endpoints.max_workers = 3
+        payload = {"offset": 0, "limit": 1}
+        data = endpoints._paginate(
+            data_key="Transaction",
+            metadata_key="metaData",
+            response=FakeFirstResponse(),
+            method="POST",
+            json=payload,
+        )
+
+        self.assertEqual(data, [{"id": 0}, {"id": 1}, {"id": 2}, {"id": 3}])
+        self.assertEqual(mock_request.call_count, 3)
+        self.assertEqual(
+            sorted(call.kwargs["uri_path"] for call in mock_request.call_args_list),
+            [
+                "/v1/transactions/search?offset=1&limit=1",
+                "/v1/transactions/search?offset=2&limit=1",
+                "/v1/transactions/search?offset=3&limit=1",
+            ],
+        )
+        # original payload is left untouched
+        self.assertEqual(payload, {"offset": 0, "limit": 1})
+
+    @patch.object(
+        mintapi.endpoints.MintEndpoints, "__abstractmethods__", new_callable=set
+    )
+    @patch.object(mintapi.endpoints.MintEndpoints, "request")
+    def test_streaming_pagination(self, mock_request, _):
+        """
+        Should only request the next page once the current one is consumed
+        """
+        mock_request.return_value = self.FakeResponse()
+        endpoints = MintEndpoints()
+        records = endpoints._iter_paginate(
+            data_key="Transaction",
+            metadata_key="metaData",
+            response=self.FakeNextResponse(),
+            method="POST",
+        )
+
+        self.assertEqual(next(records), {"id": 0, "other": "value"})
+        self.assertEqual(next(records), {"id": 1, "other": "value2"})
+        mock_request.assert_not_called()
+
+        self.assertEqual(
+            list(records),
+            [
+                {"id": 3, "other": "value3"},
+                {"id": 4, "other": "value4"},
+            ],
+        )
+        mock_request.assert_called_once()
+
 
 class EndpointRequestTests(unittest.TestCase):
     """
@@ -481,6 +587,116 @@ class UserMethodEndpointTests(unittest.TestCase):
     Focuses on postprocessing of raw json results (assumes api response verified separately)
     """
 
+    transactions = [
+        {"id": 0, "isPending": False, "type": "CashAndCreditTransaction"},
+        {"id": 1, "isPending": True, "type": "CashAndCreditTransaction"},
+        {"id": 2, "isPending": False, "type": "InvestmentTransaction"},
+    ]
+
+    @patch.object(
+        mintapi.endpoints.MintEndpoints, "__abstractmethods__", new_callable=set
+    )
+    @patch.object(mintapi.endpoints.MintEndpoints, "_get_transaction_data")
+    def test_iter_transaction_data(self, mock_transactions, _):
+        """
+        Filters are applied lazily and streaming is requested from the endpoint
+        """
+        mock_transactions.return_value = iter(self.transactions)
+        endpoints = MintEndpoints()
+        data = endpoints.iter_transaction_data()
+
+        self.assertNotIsInstance(data, list)
+        self.assertEqual(list(data), [self.transactions[0]])
+        self.assertTrue(mock_transactions.call_args.kwargs["stream"])
+
+    @patch.object(
+        mintapi.endpoints.MintEndpoints, "__abstractmethods__", new_callable=set
+    )
+    @patch.object(mintapi.endpoints.MintEndpoints, "_get_transaction_data")
+    def test_get_transaction_data_filters(self, mock_transactions, _):
+        mock_transactions.return_value = self.transactions
+        endpoints = MintEndpoints()
+
+        self.assertEqual(endpoints.get_transaction_data(), [self.transactions[0]])
+        self.assertEqual(
+            endpoints.get_transaction_data(
+                remove_pending=False, include_investment=True
+            ),
+            self.transactions,
+        )
+
+    accounts = [
+        {"id": "1", "name": "checking", "type": "BankAccount"},
+        {"id": "2", "name": "card", "type": "CreditAccount"},
+    ]
+
+    @patch.object(
+        mintapi.endpoints.MintEndpoints, "__abstractmethods__", new_callable=set
+    )
+    @patch.object(mintapi.endpoints.MintEndpoints, "get_trend_data")
+    @patch.object(mintapi.endpoints.MintEndpoints, "get_account_data")
+    def test_batched_account_balance_history(self, mock_accounts, mock_trends, _):
+        """
+        Per-account report views are split client-side in one call per report
+        """
+        mock_accounts.return_value = self.accounts
+        mock_trends.side_effect = [
+            [
+                {"accountId": "2", "date": "2022-01-01", "amount": 1},
+                {"accountId": "1", "date": "2022-01-01", "amount": 2},
+            ],
+            [{"accountId": "2", "date": "2022-02-01", "amount": 3}],
+        ]
+        endpoints = MintEndpoints()
+        data = endpoints.get_account_balance_history()
+
+        self.assertEqual(mock_trends.call_count, 2)
+        self.assertEqual(
+            mock_trends.call_args.kwargs["report_type"],
+            mintapi.endpoints.ReportView.Options.DEBTS_ACCOUNT,
+        )
+        self.assertEqual(mock_trends.call_args.kwargs["account_ids"], ["1", "2"])
+        self.assertEqual(
+            [(d["account_name"], d["amount"]) for d in data],
+            [("checking", 2), ("card", 1), ("card", 3)],
+        )
+
+    @patch.object(
+        mintapi.endpoints.MintEndpoints, "__abstractmethods__", new_callable=set
+    )
+    @patch.object(mintapi.endpoints.MintEndpoints, "get_trend_data")
+    @patch.object(mintapi.endpoints.MintEndpoints, "get_account_data")
+    def test_per_account_balance_history_fallback(self, mock_accounts, mock_trends, _):
+        """
+        Falls back to one request per account and report, in account order
+        """
+        mock_accounts.return_value = self.accounts
+
+        def trends(report_type, account_ids, **kwargs):
+            if len(account_ids) > 1:
+                return [{"type": "ASSET", "amount": 10}]
+            return [{"date": "2022-01-01", "report": report_type.name}]
+
+        mock_trends.side_effect = trends
+        endpoints = MintEndpoints()
+        endpoints.max_workers = 2
+        data = endpoints.get_account_balance_history()
+
+        self.assertEqual(mock_trends.call_count, 6)
+        self.assertIs(endpoints.batched_balance_history, False)
+        # the batched reports are not requested again
+        self.assertEqual(endpoints.get_account_balance_history(), data)
+        self.assertEqual(mock_trends.call_count, 10)
+        self.assertEqual(
+            [(d["account_id"], d["report"]) for d in data],
+            [
+                ("1", "ASSETS_TIME"),
+                ("1", "DEBTS_TIME"),
+                ("2", "ASSETS_TIME"),
+                ("2", "DEBTS_TIME"),
+            ],
+        )
+
 
 if __name__ == "__main__":
     pytest.main(sys.argv)
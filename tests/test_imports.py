@@ -0,0 +1,48 @@
+"""
+Import cost tests
+
+REST-only usage should not pay for selenium, pandas or keyring at import time
+"""
+
+import subprocess
+import sys
+import unittest
+
+import pytest
+
+from benchmarks.import_time import HEAVY_MODULES
+
+
+def loaded_modules(statement):
+    code = f"import sys; {statement}; print(' '.join(sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return set(result.stdout.split())
+
+
+class LazyImportTests(unittest.TestCase):
+    def test_package_import_is_light(self):
+        for statement in ("import mintapi", "import mintapi.cli"):
+            loaded = loaded_modules(statement)
+            self.assertFalse(loaded.intersection(HEAVY_MODULES), statement)
+
+    def test_browser_exports_resolve_on_use(self):
+        loaded = loaded_modules(
+            "import mintapi; mintapi.SeleniumBrowser; mintapi.get_email_code"
+        )
+        self.assertIn("selenium", loaded)
+
+    def test_unknown_attribute(self):
+        import mintapi
+
+        with self.assertRaises(AttributeError):
+            mintapi.not_a_real_attribute
+
+        # looking up an unknown name doesn't import the browser
+        loaded = loaded_modules("import mintapi; hasattr(mintapi, 'typo')")
+        self.assertFalse(loaded.intersection(HEAVY_MODULES))
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,80 @@
+"""
+Client metrics and instrumentation hook tests
+"""
+import unittest
+
+import pytest
+from mintapi.metrics import ClientMetrics
+from mintapi.rest import RESTClient
+
+from tests.mock_server import MockMintServer
+
+
+class ClientMetricsTests(unittest.TestCase):
+    def test_hooks(self):
+        events = []
+        metrics = ClientMetrics()
+        metrics.add_hook(lambda *event: events.append(event))
+
+        def broken(*event):
+            raise RuntimeError("sink down")
+
+        metrics.add_hook(broken)
+
+        metrics.increment("retries")
+        metrics.record_request(
+            "GET", "https://mint/pfm/v1/accounts?limit=1", 200, 0.5, 10
+        )
+        metrics.record_page("Account", 1, 0.25)
+
+        tags = {"method": "GET", "endpoint": "/pfm/v1/accounts", "status": "200"}
+        self.assertEqual(
+            events,
+            [
+                ("retries", 1, {}),
+                ("request.seconds", 0.5, tags),
+                ("request.bytes", 10, tags),
+                ("page.records", 1, {"data_key": "Account"}),
+                ("page.decode_seconds", 0.25, {"data_key": "Account"}),
+            ],
+        )
+
+    def test_summary(self):
+        metrics = ClientMetrics()
+        for seconds in (0.1, 0.2, 0.3, 0.4):
+            metrics.increment("requests")
+            metrics.record_request("POST", "https://mint/pfm/v1/search", 200, seconds)
+        metrics.record_page("Transaction", 1000, 0.05)
+
+        summary = metrics.summary().splitlines()
+        self.assertEqual(
+            summary[0],
+            "4 requests (0 retries, 0 failed), 0.00 MB in 1.00s, 0.05s decoding",
+        )
+        self.assertEqual(summary[1], "status codes: 200 x4")
+        self.assertEqual(
+            summary[3].split(), ["/pfm/v1/search", "4", "200", "400", "400"]
+        )
+        self.assertEqual(summary[5].split(), ["Transaction", "1", "1000"])
+
+
+class ClientInstrumentationTests(unittest.TestCase):
+    def test_rest_client_pull(self):
+        with MockMintServer(transactions=250) as server:
+            client = RESTClient(api_key="key", cookies="cookie")
+            server.route(client.session)
+            client.get_transaction_data(
+                include_investment=True, remove_pending=False, limit=100
+            )
+
+        metrics = client.metrics.as_dict()
+        self.assertEqual(metrics["requests"], 3)
+        self.assertEqual(metrics["bytes_received"], server.bytes_sent)
+        self.assertEqual(len(metrics["latencies"]["/pfm/v1/transactions/search"]), 3)
+        self.assertEqual(metrics["pages"], {"Transaction": 3})
+        self.assertEqual(metrics["records"], {"Transaction": 250})
+        self.assertGreater(metrics["decode_seconds"], 0)
+
+
+if __name__ == "__main__":
+    pytest.main()
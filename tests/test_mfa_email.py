@@ -0,0 +1,287 @@
+"""
+MFA email retrieval tests
+"""
+import email.message
+import email.utils
+import socket
+import threading
+import time
+import unittest
+from datetime import date
+from unittest.mock import patch
+
+import pytest
+from mintapi.mfa_email import (
+    HEADER_FIELDS,
+    MFAMailbox,
+    MFAMailboxWatcher,
+    _PendingLogin,
+    code_from_body,
+    get_email_code,
+    match_mfa_email,
+    search_criteria,
+)
+
+
+def mfa_email(subject="123456 Mint code", body="", age=0, to="me@example.com"):
+    msg = email.message.EmailMessage()
+    msg["From"] = "Intuit <do_not_reply@intuit.com>"
+    msg["To"] = to
+    msg["Message-ID"] = email.utils.make_msgid()
+    msg["Subject"] = subject
+    msg["Date"] = email.utils.formatdate(time.time() - age, localtime=True)
+    msg.set_content(body)
+    return msg
+
+
+class FakeIMAP(object):
+    """
+    Just enough of imaplib.IMAP4_SSL for MFAMailbox, answering IDLE over a
+    socket pair so the wait is a real one
+    """
+
+    def __init__(self, messages=(), idle=True):
+        self.messages = [msg.as_bytes() for msg in messages]
+        self.idle = idle
+        self.sock, self.server = socket.socketpair()
+        self.file = self.sock.makefile("rb")
+        self.tagnum = 0
+        self.tagged_commands = {}
+        self.sent = []
+        self.deleted = []
+        self.fetched = []
+
+    def deliver(self, msg):
+        self.messages.append(msg.as_bytes())
+        self.server.sendall(b"* %d EXISTS\r\n" % len(self.messages))
+
+    def login(self, user, password):
+        return "OK", [b"Logged in"]
+
+    def capability(self):
+        return "OK", [b"IMAP4rev1 IDLE" if self.idle else b"IMAP4rev1"]
+
+    def select(self, folder):
+        return "OK", [str(len(self.messages)).encode()]
+
+    def search(self, charset, *criteria):
+        self.criteria = criteria
+        nums = [
+            str(num).encode()
+            for num, msg in enumerate(self.messages, 1)
+            if b"do_not_reply@intuit.com" in msg
+        ]
+        return "OK", [b" ".join(nums)]
+
+    def fetch(self, nums, parts):
+        data = []
+        for num in nums.split(b","):
+            self.fetched.append((num, parts))
+            msg = self.messages[int(num) - 1]
+            if "HEADER.FIELDS" in parts:
+                msg = msg.split(b"\n\n")[0] + b"\n\n"
+            data += [(num + b" (BODY[] {%d}" % len(msg), msg), b")"]
+        return "OK", data
+
+    def store(self, num, command, flags):
+        self.deleted.append(num)
+        return "OK", [None]
+
+    def expunge(self):
+        return "OK", [None]
+
+    def noop(self):
+        return "OK", [None]
+
+    def readline(self):
+        return self.file.readline()
+
+    def logout(self):
+        self.file.close()
+        self.sock.close()
+        self.server.close()
+        return "BYE", [None]
+
+    def _new_tag(self):
+        self.tagnum += 1
+        tag = b"A%d" % self.tagnum
+        self.tagged_commands[tag] = None
+        return tag
+
+    def send(self, data):
+        self.sent.append(data)
+        if data.endswith(b" IDLE\r\n"):
+            self.idle_tag = data.split()[0]
+            self.server.sendall(b"+ idling\r\n")
+        elif data == b"DONE\r\n":
+            self.server.sendall(self.idle_tag + b" OK IDLE terminated\r\n")
+
+
+class MFAMailboxTests(unittest.TestCase):
+    def mailbox(self, imap, **kwargs):
+        patcher = patch("mintapi.mfa_email.imaplib.IMAP4_SSL", return_value=imap)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return MFAMailbox("user", "password", "imap.example.com", **kwargs)
+
+    def test_code_already_received(self):
+        imap = FakeIMAP([mfa_email("Welcome"), mfa_email("654321 Mint code")])
+
+        with self.mailbox(imap) as mailbox:
+            self.assertEqual(mailbox.wait_for_code(timeout=1), "654321")
+        self.assertEqual(imap.deleted, [b"2"])
+        self.assertEqual(imap.sent, [])
+
+    def test_body_fetched_only_for_candidate(self):
+        other = email.message.EmailMessage()
+        other["From"] = "someone@example.com"
+        other.set_content("Verification code:<b>999999</b>")
+        imap = FakeIMAP(
+            [
+                mfa_email("Your Mint code", "Verification code:<b>112233</b>"),
+                other,
+                mfa_email("Your statement is ready"),
+            ]
+        )
+
+        with self.mailbox(imap) as mailbox:
+            self.assertEqual(mailbox.find_code(), "112233")
+        self.assertEqual(imap.criteria[:2], ("FROM", '"do_not_reply@intuit.com"'))
+        self.assertEqual(
+            imap.fetched,
+            [
+                (b"3", HEADER_FIELDS),
+                (b"1", HEADER_FIELDS),
+                (b"1", "(BODY.PEEK[])"),
+            ],
+        )
+
+    def test_idle_wakes_on_new_message(self):
+        imap = FakeIMAP([mfa_email(age=3600)])
+        threading.Timer(0.2, imap.deliver, [mfa_email()]).start()
+
+        start = time.monotonic()
+        # polling every minute would blow the test's time
+        with self.mailbox(imap, poll_interval=60) as mailbox:
+            code = mailbox.wait_for_code(timeout=10, delete=False)
+        self.assertEqual(code, "123456")
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual(imap.sent, [b"A1 IDLE\r\n", b"DONE\r\n"])
+        self.assertEqual(imap.deleted, [])
+
+    def test_idle_sees_buffered_responses(self):
+        imap = FakeIMAP()
+        # the EXISTS came in with the last response imaplib read, so it sits
+        # in imaplib's buffer rather than on the socket
+        imap.server.sendall(b"A0 OK NOOP completed\r\n* 1 EXISTS\r\n")
+        self.assertEqual(imap.readline(), b"A0 OK NOOP completed\r\n")
+
+        start = time.monotonic()
+        with self.mailbox(imap) as mailbox:
+            self.assertTrue(mailbox.wait_for_changes(10))
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual(imap.sent, [b"A1 IDLE\r\n", b"DONE\r\n"])
+
+    def test_polls_without_idle(self):
+        imap = FakeIMAP(idle=False)
+        threading.Timer(0.1, imap.deliver, [mfa_email()]).start()
+
+        with self.mailbox(imap, poll_interval=0.05) as mailbox:
+            self.assertEqual(mailbox.wait_for_code(timeout=10), "123456")
+        self.assertEqual(imap.sent, [])
+
+    def test_timeout(self):
+        imap = FakeIMAP()
+
+        with patch("mintapi.mfa_email.imaplib.IMAP4_SSL", return_value=imap):
+            code = get_email_code("user", "password", "imap.example.com", timeout=0.2)
+        self.assertIsNone(code)
+
+    def test_match_mfa_email(self):
+        self.assertEqual(match_mfa_email(mfa_email()), (True, "123456"))
+        in_body = mfa_email("Your Mint code", "Verification code:<b>112233</b>")
+        self.assertEqual(match_mfa_email(in_body), (True, None))
+        self.assertEqual(code_from_body(in_body), "112233")
+        self.assertEqual(match_mfa_email(mfa_email(age=600)), (False, None))
+        self.assertEqual(
+            match_mfa_email(mfa_email("Your statement is ready")), (False, None)
+        )
+
+    def test_search_criteria(self):
+        self.assertEqual(
+            search_criteria(date(2023, 3, 1)),
+            ["FROM", '"do_not_reply@intuit.com"', "SINCE", "28-Feb-2023"],
+        )
+
+
+class MFAMailboxWatcherTests(unittest.TestCase):
+    def setUp(self):
+        self.imap = FakeIMAP([mfa_email("111111 Mint code", age=3600)])
+        patcher = patch("mintapi.mfa_email.imaplib.IMAP4_SSL", return_value=self.imap)
+        self.connect = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.watcher = MFAMailboxWatcher("user", "password", "imap.example.com")
+        self.addCleanup(self.watcher.close)
+
+    def wait_in_thread(self, **kwargs):
+        result = {}
+
+        def wait():
+            result["code"] = self.watcher.wait_for_code(timeout=10, **kwargs)
+
+        thread = threading.Thread(target=wait)
+        thread.start()
+        return thread, result
+
+    def wait_for_pending(self, count):
+        deadline = time.monotonic() + 5
+        while len(self.watcher._pending) < count:
+            self.assertLess(time.monotonic(), deadline, "logins never registered")
+            time.sleep(0.01)
+
+    def deleted(self):
+        # claimed emails are deleted together when found in the same pass
+        return sorted(num for nums in self.imap.deleted for num in nums.split(b","))
+
+    def test_codes_matched_by_recipient(self):
+        first, first_code = self.wait_in_thread(recipient="First@example.com")
+        second, second_code = self.wait_in_thread(recipient="second@example.com")
+        self.wait_for_pending(2)
+        self.imap.deliver(mfa_email("222222 Mint code", to="second@example.com"))
+        self.imap.deliver(mfa_email("333333 Mint code", to="first@example.com"))
+        first.join()
+        second.join()
+
+        self.assertEqual(first_code["code"], "333333")
+        self.assertEqual(second_code["code"], "222222")
+        # one connection for both logins
+        self.connect.assert_called_once()
+        self.assertEqual(self.deleted(), [b"2", b"3"])
+
+    def test_codes_matched_by_time(self):
+        now = time.time()
+        self.imap.deliver(mfa_email("444444 Mint code", age=90))
+        self.imap.deliver(mfa_email("555555 Mint code"))
+
+        # the first email was sent before the second login started waiting
+        self.assertEqual(self.watcher.wait_for_code(since=now - 120), "444444")
+        self.assertEqual(self.watcher.wait_for_code(since=now), "555555")
+        self.assertIsNone(self.watcher.wait_for_code(since=now, timeout=0.2))
+        self.assertTrue(self.watcher.mailbox.idle_supported)
+
+    def test_code_kept_when_login_timed_out(self):
+        self.imap.deliver(mfa_email("666666 Mint code"))
+        self.watcher.mailbox.open()
+        # matched to a login that stopped waiting before the hand-off
+        timed_out = _PendingLogin(None, time.time())
+        with patch.object(self.watcher, "_login_for", return_value=timed_out):
+            self.watcher._dispatch()
+
+        self.assertIsNone(timed_out.code)
+        self.assertEqual(self.imap.deleted, [])
+        self.assertEqual(self.watcher.wait_for_code(timeout=5), "666666")
+        self.assertEqual(self.deleted(), [b"2"])
+
+
+if __name__ == "__main__":
+    pytest.main()
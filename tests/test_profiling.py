@@ -0,0 +1,76 @@
+"""
+Sign in profiling tests
+"""
+import unittest
+from unittest.mock import MagicMock
+
+import pytest
+from mintapi.profiling import SignInProfile
+from mintapi.signIn import sign_in
+from selenium.common.exceptions import NoSuchElementException
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class SignInProfileTests(unittest.TestCase):
+    def test_phases_and_lookups(self):
+        clock = FakeClock()
+        profile = SignInProfile(clock=clock)
+        driver = MagicMock()
+
+        def missing(*args):
+            # a lookup that waits out a 20 second implicit wait
+            clock.now += 20
+            raise NoSuchElementException()
+
+        driver.find_element.side_effect = missing
+        driver.find_elements.return_value = []
+        timed = profile.wrap(driver)
+        self.assertIs(profile.wrap(timed), timed)
+
+        with profile.phase("first"):
+            clock.now += 1
+            timed.find_elements("id", "nothing")
+        with self.assertRaises(RuntimeError):
+            with profile.phase("second"):
+                with self.assertRaises(NoSuchElementException):
+                    timed.find_element("id", "missing")
+                timed.current_url
+                raise RuntimeError()
+
+        first, second = profile.phases
+        self.assertEqual(
+            (first.name, first.seconds, first.failed_lookups), ("first", 1, 1)
+        )
+        self.assertEqual(
+            (
+                second.seconds,
+                second.lookups,
+                second.failed_lookup_seconds,
+                second.error,
+            ),
+            (20, 1, 20, "RuntimeError"),
+        )
+        self.assertEqual(profile.total_seconds, 21)
+        self.assertIn("20.00s in lookups that found nothing", profile.report())
+
+    def test_sign_in_records_phases(self):
+        driver = MagicMock()
+        driver.current_url = "https://mint.intuit.com/overview"
+        profile = SignInProfile()
+
+        sign_in("email", "password", driver, wait_for_sync=False, profile=profile)
+
+        # already signed in, so the first wait finds the overview
+        self.assertEqual([phase.name for phase in profile.phases], ["load", "wait"])
+        driver.get.assert_called_once_with("https://mint.intuit.com")
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,85 @@
+"""
+Rate limiter tests
+"""
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+import pytest
+from mintapi.constants import MINT_CREDIT_URL, MINT_ROOT_URL
+from mintapi.ratelimit import FileTokenBucket, RateLimiter, TokenBucket
+from mintapi.rest import RESTClient
+
+from tests.mock_server import MockMintServer
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TokenBucketTests(unittest.TestCase):
+    def test_burst_then_rate(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, capacity=2, clock=clock)
+
+        self.assertEqual([bucket.reserve() for _ in range(2)], [0, 0])
+        # later callers queue behind earlier reservations
+        self.assertEqual([bucket.reserve() for _ in range(2)], [0.5, 1.0])
+
+        # idle time refills up to capacity, never beyond
+        clock.now = 10
+        self.assertEqual([bucket.reserve() for _ in range(3)], [0, 0, 0.5])
+
+    def test_file_bucket_shares_budget(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "mint.bucket")
+            # separate instances stand in for separate processes
+            first = FileTokenBucket(path, rate=1, capacity=1)
+            second = FileTokenBucket(path, rate=1, capacity=1)
+
+            self.assertEqual(first.reserve(), 0)
+            self.assertAlmostEqual(second.reserve(), 1, delta=0.1)
+            self.assertAlmostEqual(first.reserve(), 2, delta=0.1)
+
+
+class RateLimiterTests(unittest.TestCase):
+    def test_per_host_buckets(self):
+        limiter = RateLimiter({MINT_ROOT_URL: 1, MINT_CREDIT_URL: 1})
+
+        self.assertEqual(limiter.reserve(f"{MINT_ROOT_URL}/pfm/v1/accounts"), 0)
+        self.assertEqual(limiter.reserve(f"{MINT_CREDIT_URL}/v1/creditreports"), 0)
+        self.assertGreater(limiter.reserve(f"{MINT_ROOT_URL}/pfm/v1/budgets"), 0)
+        self.assertEqual(limiter.reserve("https://example.com/unlimited"), 0)
+
+    @patch("mintapi.ratelimit.time.sleep")
+    def test_wait(self, mock_sleep):
+        limiter = RateLimiter({MINT_ROOT_URL: 4}, burst=1)
+        limiter.wait(MINT_ROOT_URL)
+        limiter.wait(MINT_ROOT_URL)
+
+        mock_sleep.assert_called_once()
+        self.assertAlmostEqual(mock_sleep.call_args.args[0], 0.25, delta=0.05)
+
+    def test_rest_client_paces_every_request(self):
+        limiter = MagicMock()
+        with MockMintServer(accounts=45) as server:
+            client = RESTClient(api_key="key", cookies="cookie", rate_limiter=limiter)
+            server.route(client.session)
+            client.get_account_data(limit=20)
+
+        self.assertEqual(limiter.wait.call_count, 3)
+        self.assertTrue(
+            all(
+                c.args[0].startswith(f"{MINT_ROOT_URL}/pfm/v1/accounts")
+                for c in limiter.wait.call_args_list
+            )
+        )
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -3,10 +3,17 @@ Rest client tests
 
 Focuses on client instantiation and request construction - not endpoint data
 """
+
 import unittest
+from unittest.mock import patch
 
 import pytest
-from mintapi.rest import RESTClient
+from mintapi.constants import MINT_CREDIT_URL, MINT_ROOT_URL
+from mintapi.rest import DEFAULT_POOL_MAXSIZE, RESTClient
+from mintapi.retry import RetryPolicy
+from requests import HTTPError, Timeout
+
+from tests.mock_server import MockMintServer
 
 
 class RestAuthTests(unittest.TestCase):
@@ -25,7 +32,35 @@ class RestRequestHandlingTests(unittest.TestCase):
         pass
 
     def test_pagination_call(self):
-        pass
+        with MockMintServer(accounts=45) as server:
+            client = RESTClient(api_key="key", cookies="cookie")
+            server.route(client.session)
+            accounts = client.get_account_data(limit=20)
+
+        self.assertEqual([a["id"] for a in accounts], [str(i) for i in range(45)])
+        self.assertEqual(server.requests["/pfm/v1/accounts"], 3)
+
+    def test_connection_pool_sizing(self):
+        for max_workers, expected in ((1, DEFAULT_POOL_MAXSIZE), (32, 32)):
+            client = RESTClient(max_workers=max_workers)
+            for host in (MINT_ROOT_URL, MINT_CREDIT_URL):
+                adapter = client.session.get_adapter(host)
+                self.assertEqual(adapter._pool_maxsize, expected)
+
+        client = RESTClient(max_workers=32, pool_maxsize=4)
+        self.assertEqual(client.session.get_adapter(MINT_ROOT_URL)._pool_maxsize, 4)
+
+    def test_read_timeout(self):
+        with MockMintServer(latency=0.5) as server:
+            client = RESTClient(
+                api_key="key",
+                cookies="cookie",
+                timeout=(1.0, 0.05),
+                retry_policy=RetryPolicy(max_attempts=1),
+            )
+            server.route(client.session)
+            with self.assertRaises(Timeout):
+                client.get_account_data()
 
 
 class RestEndpointTests(unittest.TestCase):
@@ -34,6 +69,75 @@ class RestEndpointTests(unittest.TestCase):
     (endpoint logic tested separately)
     """
 
+    def setUp(self):
+        self.server = MockMintServer(transactions=2500, bills=30).start()
+        self.addCleanup(self.server.stop)
+        self.client = RESTClient(api_key="key", cookies="cookie")
+        self.server.route(self.client.session)
+
+    def test_transaction_search(self):
+        transactions = self.client.get_transaction_data(
+            include_investment=True, remove_pending=False
+        )
+
+        self.assertEqual(len(transactions), 2500)
+        self.assertEqual(transactions[-1]["id"], "txn-2499")
+        self.assertEqual(self.server.requests["/pfm/v1/transactions/search"], 3)
+
+    def test_concurrent_transaction_search(self):
+        self.client.max_workers = 4
+        transactions = self.client.get_transaction_data(
+            include_investment=True, remove_pending=False, limit=100
+        )
+
+        self.assertEqual(
+            [t["id"] for t in transactions], [f"txn-{i}" for i in range(2500)]
+        )
+        self.assertEqual(self.server.requests["/pfm/v1/transactions/search"], 25)
+
+    @patch("mintapi.rest.time.sleep")
+    def test_retry_mid_pagination(self, mock_sleep):
+        path = "/pfm/v1/transactions/search"
+        self.server.fail(path, 503, 429, retry_after=7, offset=1000)
+        transactions = self.client.get_transaction_data(
+            include_investment=True, remove_pending=False
+        )
+
+        self.assertEqual(len(transactions), 2500)
+        # only the failed page is re-sent, after the server supplied delay
+        self.assertEqual(self.server.requests[path], 5)
+        self.assertEqual([c.args[0] for c in mock_sleep.call_args_list], [7.0, 7.0])
+        metrics = self.client.metrics.as_dict()
+        self.assertEqual(
+            {k: metrics[k] for k in ("requests", "retries", "failures")},
+            {"requests": 5, "retries": 2, "failures": 0},
+        )
+        self.assertEqual(metrics["status_codes"], {"200": 3, "503": 1, "429": 1})
+
+    @patch("mintapi.rest.time.sleep")
+    def test_retries_exhausted(self, mock_sleep):
+        self.client.retry_policy = RetryPolicy(max_attempts=2)
+        self.server.fail("/pfm/v1/accounts", 502, 502, 502)
+
+        with self.assertRaises(HTTPError):
+            self.client.get_account_data()
+        self.assertEqual(mock_sleep.call_count, 1)
+        self.assertEqual(self.client.metrics.failures, 1)
+
+    def test_bills_collection_metadata(self):
+        bills = self.client.get_bills_data(params={"limit": 10})
+
+        self.assertEqual(len(bills), 30)
+        self.assertEqual(self.server.requests["/bps/v2/payer/bills"], 3)
+
+    def test_batched_account_balance_history(self):
+        history = self.client.get_account_balance_history()
+
+        self.assertEqual(len(history), 48)
+        self.assertEqual(history[0]["account_id"], "0")
+        self.assertTrue(self.client.batched_balance_history)
+        self.assertEqual(self.server.requests["/pfm/v1/trends"], 2)
+
 
 if __name__ == "__main__":
     pytest.main()
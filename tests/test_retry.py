@@ -0,0 +1,48 @@
+"""
+Retry policy tests
+"""
+import unittest
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from unittest.mock import patch
+
+import pytest
+from mintapi.retry import RetryPolicy, parse_retry_after
+
+
+class RetryPolicyTests(unittest.TestCase):
+    def test_should_retry(self):
+        policy = RetryPolicy(max_attempts=3)
+
+        self.assertTrue(policy.should_retry(1, 503))
+        self.assertTrue(policy.should_retry(2, 429))
+        self.assertTrue(policy.should_retry(1, None))
+        self.assertFalse(policy.should_retry(3, 503))
+        self.assertFalse(policy.should_retry(1, 404))
+        self.assertFalse(
+            RetryPolicy(retry_connection_errors=False).should_retry(1, None)
+        )
+
+    @patch("mintapi.retry.random.random")
+    def test_backoff(self, mock_random):
+        policy = RetryPolicy(backoff_factor=1, max_backoff=10, jitter=0.5)
+
+        mock_random.return_value = 0
+        self.assertEqual([policy.backoff(i) for i in range(1, 6)], [1, 2, 4, 8, 10])
+        mock_random.return_value = 1
+        self.assertEqual(policy.backoff(3), 2)
+
+    def test_retry_after(self):
+        policy = RetryPolicy(max_backoff=60)
+
+        self.assertEqual(policy.backoff(1, "12"), 12)
+        self.assertEqual(policy.backoff(1, "600"), 60)
+        retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+        self.assertAlmostEqual(
+            parse_retry_after(format_datetime(retry_at, usegmt=True)), 30, delta=2
+        )
+        self.assertIsNone(parse_retry_after("soon"))
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,64 @@
+"""
+JSON codec tests, run against orjson (when installed) and the stdlib fallback
+"""
+import io
+import json
+import unittest
+from unittest.mock import patch
+
+import pytest
+from mintapi import serialization
+from mintapi.serialization import decode_response, dump, dumps, loads
+
+from tests.sample_endpoint_payloads import transactions_example
+
+BACKENDS = ["stdlib"] + (["orjson"] if serialization.orjson is not None else [])
+
+
+class FakeResponse(object):
+    def __init__(self, payload):
+        self.content = json.dumps(payload).encode()
+
+
+class SerializationTests(unittest.TestCase):
+    def backends(self):
+        for backend in BACKENDS:
+            with self.subTest(backend=backend):
+                if backend == "stdlib":
+                    with patch.object(serialization, "orjson", None):
+                        yield
+                else:
+                    yield
+
+    def test_round_trip(self):
+        for _ in self.backends():
+            self.assertEqual(loads(dumps(transactions_example)), transactions_example)
+            self.assertEqual(
+                json.loads(dumps(transactions_example, indent=2)), transactions_example
+            )
+
+    def test_output_matches_between_backends(self):
+        record = {"name": "Café", "amount": -1.5, "tags": [], "nested": {"a": None}}
+        outputs = set()
+        for _ in self.backends():
+            stream = io.StringIO()
+            dump(record, stream, indent=2)
+            outputs.add((dumps(record), stream.getvalue()))
+        self.assertEqual(len(outputs), 1)
+        self.assertEqual(
+            outputs.pop()[1], json.dumps(record, indent=2, ensure_ascii=False)
+        )
+
+    def test_unsupported_values_fall_back(self):
+        self.assertEqual(dumps({"big": 2**70}), '{"big":%d}' % 2**70)
+
+    def test_decode_response_keys(self):
+        response = FakeResponse(transactions_example)
+        for _ in self.backends():
+            self.assertEqual(decode_response(response), transactions_example)
+            data = decode_response(response, keys=("Transaction", None, "missing"))
+            self.assertEqual(data, {"Transaction": transactions_example["Transaction"]})
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,92 @@
+"""
+Tests for the Mint sessions shared by the api helper functions
+"""
+import unittest
+from unittest.mock import MagicMock, patch
+
+import pytest
+from mintapi import api
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class MintSessionsTests(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.sessions = api.MintSessions(idle_timeout=60, clock=self.clock)
+        self.mints = []
+
+        def mint(**kwargs):
+            self.mints.append(MagicMock(kwargs=kwargs))
+            return self.mints[-1]
+
+        for target, replacement in [
+            ("mintapi.api.Mint", mint),
+            ("mintapi.api._sessions", self.sessions),
+        ]:
+            patcher = patch(target, replacement)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(self.sessions.close)
+
+    def test_helpers_share_a_session(self):
+        api.get_accounts("me@example.com", "password", use_rest_client=True)
+        api.get_net_worth("Me@example.com", "password", use_rest_client=True)
+        api.get_credit_score("me@example.com", "password", use_rest_client=True)
+        api.get_credit_report("me@example.com", "password", use_rest_client=True)
+
+        self.assertEqual(len(self.mints), 1)
+        mint = self.mints[0]
+        mint.get_account_data.assert_called_once_with()
+        mint.get_net_worth_data.assert_called_once_with()
+        mint.get_credit_score_data.assert_called_once_with()
+        mint.get_credit_report_data.assert_called_once_with()
+
+        # a different password or different parameters is another identity
+        api.get_budgets("me@example.com", "other", use_rest_client=True)
+        api.get_budgets("me@example.com", "password")
+        self.assertEqual(len(self.mints), 3)
+
+    def test_close_sessions(self):
+        api.get_accounts("me@example.com", "password")
+        api.get_accounts("you@example.com", "password")
+
+        api.close_sessions("ME@example.com")
+        self.mints[0].close.assert_called_once_with()
+        self.mints[1].close.assert_not_called()
+        self.assertEqual(len(self.sessions), 1)
+
+        api.initiate_account_refresh("me@example.com", "password")
+        self.assertEqual(len(self.mints), 3)
+
+    def test_failed_call_closes_session(self):
+        api.get_accounts("me@example.com", "password")
+        self.mints[0].get_net_worth_data.side_effect = RuntimeError("expired")
+
+        with self.assertRaises(RuntimeError):
+            api.get_net_worth("me@example.com", "password")
+        self.mints[0].close.assert_called_once_with()
+
+        api.get_net_worth("me@example.com", "password")
+        self.assertEqual(len(self.mints), 2)
+
+    def test_idle_sessions_expire(self):
+        api.get_accounts("me@example.com", "password")
+        self.clock.now = 30
+        api.get_accounts("you@example.com", "password")
+
+        self.clock.now = 61
+        self.sessions.expire()
+        self.mints[0].close.assert_called_once_with()
+        self.mints[1].close.assert_not_called()
+        self.assertEqual(len(self.sessions), 1)
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,150 @@
+"""
+Sign in state machine tests
+"""
+import unittest
+from unittest.mock import MagicMock, patch
+
+import pytest
+from mintapi import constants
+from mintapi.profiling import SignInProfile
+from mintapi.signIn import (
+    ACCOUNT_SELECTION_PAGE,
+    HOME_PAGE,
+    HOME_PAGE_LOCATOR,
+    IDENTIFIER_PAGE,
+    LOGIN_FAILURE_PAGE,
+    MFA_PAGE,
+    PASSWORD_PAGE,
+    SIGN_IN_PAGES,
+    sign_in,
+)
+
+LOCATORS = dict(SIGN_IN_PAGES, **{HOME_PAGE: HOME_PAGE_LOCATOR})
+
+
+class FakeSignInDriver(object):
+    """
+    Shows one sign in page at a time, moving to the next one when `advance`
+    is called, and to the overview after the last
+    """
+
+    def __init__(self, pages):
+        self.pages = list(pages)
+        self.current_url = "https://accounts.intuit.com/app/sign-in"
+        self.elements = {page: MagicMock() for page in LOCATORS}
+        self.implicit_waits = []
+        self.lookup_waits = set()
+
+    def get(self, url):
+        pass
+
+    def implicitly_wait(self, seconds):
+        self.implicit_waits.append(seconds)
+
+    def find_elements(self, by, value):
+        self.lookup_waits.add(self.implicit_waits[-1])
+        if self.pages and LOCATORS[self.pages[0]] == (by, value):
+            return [self.elements[self.pages[0]]]
+        return []
+
+    def advance(self, *args, **kwargs):
+        self.pages.pop(0)
+        if not self.pages:
+            self.current_url = constants.MINT_ROOT_URL + "/overview"
+
+
+class SignInStateMachineTests(unittest.TestCase):
+    def patch_handlers(self, driver, **side_effects):
+        handlers = {}
+        for name in [
+            "_click_home_page",
+            "handle_different_page_username_password",
+            "password_page",
+            "mfa_selection_page",
+            "mfa_page",
+            "account_selection_page",
+        ]:
+            patcher = patch(
+                "mintapi.signIn." + name,
+                side_effect=side_effects.get(name, driver.advance),
+            )
+            handlers[name] = patcher.start()
+            self.addCleanup(patcher.stop)
+        return handlers
+
+    def test_handles_pages_as_they_appear(self):
+        driver = FakeSignInDriver(
+            [
+                HOME_PAGE,
+                IDENTIFIER_PAGE,
+                PASSWORD_PAGE,
+                MFA_PAGE,
+                ACCOUNT_SELECTION_PAGE,
+            ]
+        )
+        handlers = self.patch_handlers(driver, mfa_selection_page=None)
+        profile = SignInProfile()
+
+        sign_in(
+            "email",
+            "password",
+            driver,
+            mfa_method="sms",
+            wait_for_sync=False,
+            profile=profile,
+        )
+
+        self.assertEqual(
+            [phase.name for phase in profile.phases],
+            [
+                "load",
+                "wait",
+                HOME_PAGE,
+                "wait",
+                IDENTIFIER_PAGE,
+                "wait",
+                PASSWORD_PAGE,
+                "wait",
+                MFA_PAGE,
+                "wait",
+                ACCOUNT_SELECTION_PAGE,
+                "wait",
+            ],
+        )
+        self.assertEqual(handlers["password_page"].call_args[0][1], "password")
+        self.assertEqual(handlers["mfa_selection_page"].call_args[0][1], "sms")
+        # pages are detected without waiting on the ones that aren't there
+        self.assertEqual(driver.lookup_waits, {0})
+        self.assertEqual(driver.implicit_waits[-1], 20)
+
+    def test_page_is_handled_once(self):
+        # the identifier page never goes away, e.g. the submit did nothing
+        driver = FakeSignInDriver([IDENTIFIER_PAGE])
+        handlers = self.patch_handlers(
+            driver, handle_different_page_username_password=None
+        )
+
+        with self.assertRaisesRegex(RuntimeError, "after identifier_page"):
+            sign_in(
+                "email",
+                "password",
+                driver,
+                wait_for_sync=False,
+                beta=True,
+                page_timeout=0.3,
+            )
+        handlers["handle_different_page_username_password"].assert_called_once()
+
+    def test_login_failure(self):
+        driver = FakeSignInDriver([LOGIN_FAILURE_PAGE])
+
+        with patch(
+            "mintapi.signIn.handle_login_failures",
+            side_effect=RuntimeError("Login to Mint failed: incorrect password"),
+        ):
+            with self.assertRaisesRegex(RuntimeError, "incorrect password"):
+                sign_in("email", "password", driver, wait_for_sync=False, beta=True)
+
+
+if __name__ == "__main__":
+    pytest.main()
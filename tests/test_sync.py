@@ -0,0 +1,115 @@
+"""
+Incremental transaction sync tests
+
+Uses an in-memory store and a fake client in place of Mint
+"""
+
+import unittest
+from datetime import date
+
+from mintapi.filters import DateFilter
+from mintapi.sync import TransactionStore, sync_transactions
+
+
+def transaction(id, date, is_pending=False, type="CashAndCreditTransaction"):
+    return {
+        "id": id,
+        "date": date,
+        "isPending": is_pending,
+        "type": type,
+        "metaData": {"lastUpdatedDate": f"{date}T00:00:00Z"},
+    }
+
+
+class FakeClient(object):
+    def __init__(self, transactions):
+        self.transactions = transactions
+        self.calls = []
+
+    def iter_transaction_data(self, **kwargs):
+        self.calls.append(kwargs)
+        start_date = kwargs["start_date"] or ""
+        return iter([t for t in self.transactions if t["date"] >= start_date])
+
+
+class TransactionSyncTests(unittest.TestCase):
+    def setUp(self):
+        self.store = TransactionStore(":memory:")
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_initial_sync_pulls_all_time(self):
+        client = FakeClient(
+            [transaction("a", "2022-01-01"), transaction("b", "2022-03-01")]
+        )
+        result = sync_transactions(client, self.store, today=date(2022, 3, 5))
+
+        self.assertIsNone(result.start_date)
+        self.assertEqual(result.fetched, 2)
+        self.assertEqual(client.calls[0]["date_filter"], DateFilter.Options.ALL_TIME)
+        self.assertEqual(self.store.high_water_mark, "2022-03-01")
+        self.assertEqual(self.store.last_updated, "2022-03-01T00:00:00Z")
+
+    def test_incremental_sync_replaces_overlap_window(self):
+        client = FakeClient(
+            [
+                transaction("a", "2022-01-01"),
+                transaction("b", "2022-03-01", is_pending=True),
+            ]
+        )
+        sync_transactions(client, self.store, today=date(2022, 3, 5))
+
+        # pending transaction posts under a new id
+        client.transactions = [
+            transaction("a", "2022-01-01"),
+            transaction("c", "2022-03-02"),
+        ]
+        result = sync_transactions(
+            client, self.store, overlap_days=3, today=date(2022, 3, 5)
+        )
+
+        self.assertEqual(result.start_date, "2022-02-26")
+        self.assertEqual(result.fetched, 1)
+        self.assertEqual(client.calls[1]["date_filter"], DateFilter.Options.CUSTOM)
+        self.assertEqual(client.calls[1]["end_date"], "2022-03-05")
+        self.assertEqual(
+            [t["id"] for t in self.store.transactions(remove_pending=False)],
+            ["c", "a"],
+        )
+        self.assertEqual(self.store.high_water_mark, "2022-03-02")
+
+    def test_read_filters(self):
+        self.store.replace_window(
+            [
+                transaction("a", "2022-01-01"),
+                transaction("b", "2022-01-02", is_pending=True),
+                transaction("c", "2022-01-03", type="InvestmentTransaction"),
+            ]
+        )
+        self.assertEqual(len(self.store), 3)
+        self.assertEqual([t["id"] for t in self.store.transactions()], ["a"])
+        self.assertEqual(
+            [
+                t["id"]
+                for t in self.store.transactions(
+                    remove_pending=False, include_investment=True
+                )
+            ],
+            ["c", "b", "a"],
+        )
+
+    def test_failed_sync_leaves_store_untouched(self):
+        self.store.replace_window([transaction("a", "2022-01-01")])
+
+        def failing():
+            yield transaction("b", "2022-01-02")
+            raise RuntimeError("connection reset")
+
+        with self.assertRaises(RuntimeError):
+            self.store.replace_window(failing(), "2021-12-01")
+        self.assertEqual([t["id"] for t in self.store.transactions()], ["a"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+"""
+Streaming writer tests
+"""
+import datetime
+import io
+import json
+import os
+import tempfile
+import unittest
+
+import pytest
+from mintapi.constants import CSV_FORMAT, JSONL_FORMAT, TRANSACTION_KEY
+from mintapi.writers import write_csv, write_jsonl, write_parquet, write_records
+
+from tests.sample_endpoint_payloads import transactions_example
+
+
+def generated_records(count):
+    for i in range(count):
+        yield {"id": str(i), "amount": i * 1.5, "category": {"id": "7", "name": "Food"}}
+
+
+class WriterTests(unittest.TestCase):
+    def test_jsonl(self):
+        stream = io.StringIO()
+        count = write_jsonl(generated_records(3), stream)
+
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(count, 3)
+        self.assertEqual([json.loads(line)["id"] for line in lines], ["0", "1", "2"])
+
+    def test_csv_flattens_nested_records(self):
+        stream = io.StringIO()
+        write_csv(generated_records(2), stream)
+
+        self.assertEqual(
+            stream.getvalue().splitlines(),
+            [
+                "id,amount,category.id,category.name",
+                "0,0.0,7,Food",
+                "1,1.5,7,Food",
+            ],
+        )
+
+    def test_csv_fixed_columns(self):
+        records = [{"id": "1"}, {"id": "2", "late": True}]
+
+        stream = io.StringIO()
+        write_csv(records, stream, sample_size=1)
+        self.assertEqual(stream.getvalue().splitlines(), ["id", "1", "2"])
+
+        stream = io.StringIO()
+        write_csv(records, stream, columns=["late", "id"])
+        self.assertEqual(stream.getvalue().splitlines(), ["late,id", ",1", "True,2"])
+
+    def test_lists_and_single_records(self):
+        transaction = transactions_example["Transaction"][0]
+        stream = io.StringIO()
+        write_records({"net_worth": [{"net": 1}]}, stream, CSV_FORMAT)
+        self.assertEqual(
+            stream.getvalue().splitlines(), ["net_worth", '"[{""net"":1}]"']
+        )
+
+        stream = io.StringIO()
+        self.assertEqual(write_records(transaction, stream, JSONL_FORMAT), 1)
+        self.assertEqual(json.loads(stream.getvalue()), transaction)
+
+    def test_is_lazy(self):
+        stream = io.StringIO()
+        consumed = []
+
+        def records():
+            for record in generated_records(5):
+                consumed.append(record["id"])
+                # earlier records are already written when later ones are produced
+                self.assertEqual(stream.getvalue().count("\n"), len(consumed) - 1)
+                yield record
+
+        write_jsonl(records(), stream)
+        self.assertEqual(len(consumed), 5)
+
+
+class ParquetWriterTests(unittest.TestCase):
+    def setUp(self):
+        self.pq = pytest.importorskip("pyarrow.parquet")
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "out.parquet")
+
+    def test_typed_schema_in_row_groups(self):
+        transaction = transactions_example["Transaction"][0]
+        records = (dict(transaction, id=str(i)) for i in range(5))
+        count = write_parquet(
+            records, self.path, kind=TRANSACTION_KEY, row_group_size=2
+        )
+
+        parquet_file = self.pq.ParquetFile(self.path)
+        self.assertEqual(count, 5)
+        self.assertEqual(parquet_file.metadata.num_row_groups, 3)
+
+        table = parquet_file.read()
+        self.assertEqual(str(table.schema.field("date").type), "date32[day]")
+        self.assertEqual(str(table.schema.field("isPending").type), "bool")
+        row = table.to_pylist()[0]
+        self.assertEqual(row["date"], datetime.date(2022, 3, 24))
+        self.assertEqual(row["category.name"], "Income")
+        self.assertEqual(row["amount"], 420.0)
+        self.assertNotIn("etag", row)
+
+    def test_inferred_schema(self):
+        records = [{"id": "1", "value": 1}, {"id": "2", "value": 2.5, "tags": ["a"]}]
+        write_parquet(records, self.path)
+
+        self.assertEqual(
+            self.pq.read_table(self.path).to_pylist(),
+            [
+                {"id": "1", "value": 1.0, "tags": None},
+                {"id": "2", "value": 2.5, "tags": '["a"]'},
+            ],
+        )
+
+    def test_inferred_numbers_across_row_groups(self):
+        # the first row group alone would make value an integer column
+        records = [{"id": "1", "value": 1}, {"id": "2", "value": 2.5}]
+        write_parquet(records, self.path, row_group_size=1)
+
+        table = self.pq.read_table(self.path)
+        self.assertEqual(str(table.schema.field("value").type), "double")
+        self.assertEqual(table.column("value").to_pylist(), [1.0, 2.5])
+
+
+if __name__ == "__main__":
+    pytest.main()